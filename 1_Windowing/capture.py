@@ -0,0 +1,143 @@
+"""
+Classes for reading rendered frames back without stalling the render loop
+"""
+import ctypes
+import numpy as np
+from OpenGL import GL
+
+
+class FrameCapture:
+    """Reads frames back through a ring of pixel buffer objects. capture() is called after a frame is drawn,
+    e.g. at the end of paintGL, and starts copying the bound framebuffer into the next buffer of the ring
+    without waiting for the copy. The frame copied buffers - 1 captures earlier has had time to finish, so its
+    buffer is mapped and returned as a numpy view of the mapped memory instead of a copy. The view is only
+    valid until the next call to capture(), flush() or delete(), copy it to keep the frame.
+
+    :param width: width of frames
+    :type width: int
+    :param height: height of frames
+    :type height: int
+    :param buffers: number of pixel buffer objects in the ring, 3 maps frame N-2 while frame N renders
+    :type buffers: int
+    """
+    def __init__(self, width, height, buffers=3):
+        self.width = width
+        self.height = height
+        self.size = width * height * 4
+        self.buffers = list(np.atleast_1d(GL.glGenBuffers(buffers)))
+        self.fences = [None] * buffers
+        self.index = 0
+        self.pending = 0
+        self.mapped = None
+        self.stalls = 0
+
+        for buffer in self.buffers:
+            GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, buffer)
+            GL.glBufferData(GL.GL_PIXEL_PACK_BUFFER, self.size, None, GL.GL_STREAM_READ)
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+
+    def capture(self):
+        """Starts reading back the bound framebuffer and returns the oldest frame in the ring, a GL context
+        must be current
+
+        :return: height x width x 4 view of RGBA pixels with the first row at the top of the frame, or None
+                 until the ring is full
+        :rtype: Union[np.ndarray, None]
+        """
+        self.unmap()
+        buffer = self.buffers[self.index]
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, buffer)
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+        # With a pack buffer bound the last argument is an offset into the buffer and the call returns
+        # as soon as the copy is queued
+        GL.glReadPixels(0, 0, self.width, self.height, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+        if self.fences[self.index] is not None:
+            GL.glDeleteSync(self.fences[self.index])
+        self.fences[self.index] = GL.glFenceSync(GL.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        self.index = (self.index + 1) % len(self.buffers)
+        self.pending += 1
+
+        if self.pending < len(self.buffers):
+            return None
+        return self._map()
+
+    def flush(self):
+        """Returns the frames still in the ring, oldest first, a GL context must be current
+
+        :return: generator of views as returned by capture
+        :rtype: Generator[np.ndarray]
+        """
+        while self.pending:
+            self.unmap()
+            yield self._map()
+        self.unmap()
+
+    def _map(self):
+        """Maps the buffer of the oldest frame in the ring
+
+        :return: view of the frame
+        :rtype: np.ndarray
+        """
+        oldest = (self.index - self.pending) % len(self.buffers)
+        fence = self.fences[oldest]
+        # Counts the frames whose copy had not finished, when these are frequent more buffers are needed
+        if GL.glClientWaitSync(fence, 0, 0) == GL.GL_TIMEOUT_EXPIRED:
+            self.stalls += 1
+        GL.glDeleteSync(fence)
+        self.fences[oldest] = None
+        self.pending -= 1
+
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, self.buffers[oldest])
+        address = GL.glMapBufferRange(GL.GL_PIXEL_PACK_BUFFER, 0, self.size, GL.GL_MAP_READ_BIT)
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+        self.mapped = self.buffers[oldest]
+        pixels = np.ctypeslib.as_array((ctypes.c_uint8 * self.size).from_address(address))
+        # GL rows start at the bottom of the frame, reversing the rows is still a view
+        return pixels.reshape(self.height, self.width, 4)[::-1]
+
+    def unmap(self):
+        """Unmaps the buffer of the frame last returned, its view must no longer be used"""
+        if self.mapped is not None:
+            GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, self.mapped)
+            GL.glUnmapBuffer(GL.GL_PIXEL_PACK_BUFFER)
+            GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+            self.mapped = None
+
+    def resize(self, width, height):
+        """Reallocates the pixel buffer objects for frames of a new size e.g. from resizeGL, a GL context must be
+        current. The frames still in the ring have the old size and are dropped, iterate over flush() first to
+        keep them.
+
+        :param width: width of frames
+        :type width: int
+        :param height: height of frames
+        :type height: int
+        """
+        if (width, height) == (self.width, self.height):
+            return
+
+        self.unmap()
+        for index, fence in enumerate(self.fences):
+            if fence is not None:
+                GL.glDeleteSync(fence)
+                self.fences[index] = None
+        self.pending = 0
+        self.width = width
+        self.height = height
+        self.size = width * height * 4
+        for buffer in self.buffers:
+            GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, buffer)
+            GL.glBufferData(GL.GL_PIXEL_PACK_BUFFER, self.size, None, GL.GL_STREAM_READ)
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+
+    def delete(self):
+        """Deletes the pixel buffer objects and fences, a GL context must be current"""
+        self.unmap()
+        for fence in self.fences:
+            if fence is not None:
+                GL.glDeleteSync(fence)
+        GL.glDeleteBuffers(len(self.buffers), self.buffers)
+        self.fences = [None] * len(self.buffers)
+        self.buffers = []
+        self.pending = 0
@@ -0,0 +1,237 @@
+"""
+Classes and functions for writing captured frames to image sequences or an encoder process without
+blocking the render loop
+"""
+import abc
+import os
+import subprocess
+import tempfile
+import threading
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+
+class FrameWriter(abc.ABC):
+    """Hands frames to a pool of worker threads that write them, so the render loop does no disk or pipe I/O
+    itself. At most queue_size frames are queued or being written at a time, which keeps memory flat however
+    long the recording. By default a frame written while the queue is full is dropped and counted, so the
+    render loop never waits for the disk. With drop set to False write() waits for a slot instead
+    (back-pressure), which stalls the caller until a worker finishes writing a frame but keeps every frame,
+    as offline recordings need. Subclasses implement _encode.
+
+    :param workers: number of writing threads
+    :type workers: int
+    :param queue_size: maximum number of frames queued or being written
+    :type queue_size: int
+    :param drop: indicates frames are dropped instead of waiting when the queue is full
+    :type drop: bool
+    """
+    def __init__(self, workers=1, queue_size=8, drop=True):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='encoder')
+        self.slots = threading.BoundedSemaphore(queue_size)
+        self.lock = threading.Lock()
+        self.queue_size = queue_size
+        self.drop = drop
+        self.frame_count = 0
+        self.written = 0
+        self.dropped = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.wait_time = 0.0
+        self.error = None
+
+    def write(self, frame):
+        """Queues a frame to be written. The frame is copied, so views such as those of FrameCapture can be
+        passed and reused straight away.
+
+        :param frame: height x width x channels array of pixels with the first row at the top of the frame
+        :type frame: np.ndarray
+        :return: indicates the frame was queued, False if it was dropped
+        :rtype: bool
+        :raises Exception: the error of a frame that failed to be written
+        """
+        if self.error is not None:
+            raise self.error
+
+        if not self.slots.acquire(blocking=False):
+            if self.drop:
+                self.dropped += 1
+                return False
+            start = timeit.default_timer()
+            self.slots.acquire()
+            self.wait_time += timeit.default_timer() - start
+
+        with self.lock:
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        index = self.frame_count
+        self.frame_count += 1
+        future = self.executor.submit(self._encode, index, np.array(frame))
+        future.add_done_callback(self._done)
+        return True
+
+    def _done(self, future):
+        """Frees the slot of a written frame and keeps the first error
+
+        :param future: future of _encode
+        :type future: concurrent.futures.Future
+        """
+        with self.lock:
+            self.queued -= 1
+            if future.exception() is None:
+                self.written += 1
+            elif self.error is None:
+                self.error = future.exception()
+        self.slots.release()
+
+    @abc.abstractmethod
+    def _encode(self, index, frame):
+        """Writes a frame, called on a worker thread
+
+        :param index: index of frame among the queued frames
+        :type index: int
+        :param frame: height x width x channels array of pixels
+        :type frame: np.ndarray
+        """
+
+    def close(self):
+        """Waits for the queued frames to be written and stops the worker threads
+
+        :raises Exception: the error of a frame that failed to be written
+        """
+        self.executor.shutdown(wait=True)
+        if self.error is not None:
+            raise self.error
+
+
+class PNGSequenceWriter(FrameWriter):
+    """Writes frames as numbered PNG files, Pillow releases the GIL while compressing so with several cores the
+    workers compress frames in parallel
+
+    :param directory: directory of PNG files, it is created if it does not exist
+    :type directory: str
+    :param pattern: format of file names given the frame index
+    :type pattern: str
+    :param compress_level: zlib compression level from 0 to 9, low levels are much faster
+    :type compress_level: int
+    :param workers: number of writing threads
+    :type workers: int
+    :param queue_size: maximum number of frames queued or being written
+    :type queue_size: int
+    :param drop: indicates frames are dropped instead of waiting when the queue is full
+    :type drop: bool
+    """
+    def __init__(self, directory, pattern='frame_{:06d}.png', compress_level=1, workers=4, queue_size=16,
+                 drop=True):
+        super().__init__(workers, queue_size, drop)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.pattern = pattern
+        self.compress_level = compress_level
+
+    def _encode(self, index, frame):
+        Image.fromarray(frame).save(os.path.join(self.directory, self.pattern.format(index)),
+                                    compress_level=self.compress_level)
+
+
+class PipeWriter(FrameWriter):
+    """Writes raw frames to the standard input of an encoder process e.g. from ffmpeg_command. A single worker
+    writes the frames so they reach the encoder in order.
+
+    :param command: command line of encoder process
+    :type command: List[str]
+    :param queue_size: maximum number of frames queued or being written
+    :type queue_size: int
+    :param drop: indicates frames are dropped instead of waiting when the queue is full
+    :type drop: bool
+    """
+    def __init__(self, command, queue_size=8, drop=True):
+        super().__init__(1, queue_size, drop)
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def _encode(self, index, frame):
+        self.process.stdin.write(frame.data)
+
+    def close(self):
+        """Waits for the queued frames to be written and for the encoder process to finish
+
+        :raises Exception: the error of a frame that failed to be written
+        :raises RuntimeError: if the encoder process fails
+        """
+        try:
+            super().close()
+        finally:
+            self.process.stdin.close()
+            code = self.process.wait()
+        if code != 0:
+            raise RuntimeError(f'Encoder process failed with exit code {code}')
+
+
+def ffmpeg_command(path, width, height, fps=60, pixel_format='rgba'):
+    """Creates the ffmpeg command line for encoding raw frames from standard input into a video file
+
+    :param path: path of video file, the container is given by the extension e.g. .mp4
+    :type path: str
+    :param width: width of frames
+    :type width: int
+    :param height: height of frames
+    :type height: int
+    :param fps: frames per second of video
+    :type fps: int
+    :param pixel_format: ffmpeg name of the pixel format of the frames e.g. rgba or rgb24
+    :type pixel_format: str
+    :return: command line
+    :rtype: List[str]
+    """
+    return ['ffmpeg', '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pixel_format', pixel_format,
+            '-video_size', f'{width}x{height}', '-framerate', str(fps), '-i', '-', '-pix_fmt', 'yuv420p', path]
+
+
+def benchmark_encoder(frames=200, width=640, height=480):
+    """Compares the time the render loop spends saving PNG frames itself with handing them to a PNGSequenceWriter
+    using 1 and 4 workers, waiting when the queue is full or dropping frames. The frames are gradients with
+    a block of noise so they take a while to compress like renders with detail.
+
+    :param frames: number of frames
+    :type frames: int
+    :param width: width of frames
+    :type width: int
+    :param height: height of frames
+    :type height: int
+    """
+    generator = np.random.default_rng(0)
+    images = []
+    for _ in range(8):
+        image = np.empty((height, width, 4), np.uint8)
+        image[..., 0] = np.linspace(0, 255, width, dtype=np.uint8)
+        image[..., 1] = np.linspace(0, 255, height, dtype=np.uint8)[:, None]
+        image[..., 2:] = 128
+        image[:height // 4, :width // 4] = generator.integers(0, 256, (height // 4, width // 4, 4), np.uint8)
+        images.append(image)
+
+    print(f'Writing {frames} frames of {width}x{height}')
+    with tempfile.TemporaryDirectory() as directory:
+        start = timeit.default_timer()
+        for index in range(frames):
+            Image.fromarray(images[index % len(images)]).save(os.path.join(directory, f'{index:06d}.png'),
+                                                              compress_level=1)
+        elapsed = timeit.default_timer() - start
+        print(f'{"in render loop":>16}: loop {elapsed * 1000:8.1f} ms')
+
+        for name, workers, drop in (('1 worker', 1, False), ('4 workers', 4, False), ('4 workers, drop', 4, True)):
+            writer = PNGSequenceWriter(directory, workers=workers, drop=drop)
+            start = timeit.default_timer()
+            for index in range(frames):
+                writer.write(images[index % len(images)])
+            loop = timeit.default_timer() - start
+            writer.close()
+            elapsed = timeit.default_timer() - start
+            print(f'{name:>16}: loop {loop * 1000:8.1f} ms ({writer.wait_time * 1000:.1f} ms waiting), '
+                  f'total {elapsed * 1000:8.1f} ms, {writer.written} written, {writer.dropped} dropped, '
+                  f'at most {writer.peak_queued} frames queued')
+
+
+if __name__ == "__main__":
+    benchmark_encoder()
@@ -0,0 +1,319 @@
+"""
+Classes and functions for rendering the GLWidget of a demo without a window, for batch jobs on servers
+without a display. The EGL backend needs PyOpenGL to use EGL, set PYOPENGL_PLATFORM=egl before OpenGL is
+imported e.g. PYOPENGL_PLATFORM=egl QT_QPA_PLATFORM=offscreen python headless.py
+"""
+import ctypes
+import importlib.util
+import os
+import sys
+import tempfile
+import timeit
+import numpy as np
+from OpenGL import GL, platform
+from PyQt6 import QtGui, QtWidgets
+from capture import FrameCapture
+from encoder import PNGSequenceWriter
+
+
+def create_egl_context():
+    """Creates an EGL context for desktop GL with a 1x1 pbuffer surface, the surface is only used to make the
+    context current as the frames are rendered into a framebuffer object. Mesa provides EGL without a display
+    through its surfaceless platform (EGL_PLATFORM=surfaceless) e.g. with the llvmpipe software renderer.
+
+    :return: EGL display, surface and context
+    :rtype: Tuple[EGLDisplay, EGLSurface, EGLContext]
+    :raises RuntimeError: if EGL cannot be initialised or has no desktop GL config
+    """
+    from OpenGL import EGL
+
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    if display == EGL.EGL_NO_DISPLAY or not EGL.eglInitialize(display, None, None):
+        raise RuntimeError('EGL could not be initialised')
+
+    attributes = [EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT, EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+                  EGL.EGL_NONE]
+    config = EGL.EGLConfig()
+    count = EGL.EGLint()
+    EGL.eglChooseConfig(display, (EGL.EGLint * len(attributes))(*attributes), ctypes.pointer(config), 1,
+                        ctypes.pointer(count))
+    if count.value == 0:
+        raise RuntimeError('EGL has no config for desktop GL')
+
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+    surface_attributes = [EGL.EGL_WIDTH, 1, EGL.EGL_HEIGHT, 1, EGL.EGL_NONE]
+    surface = EGL.eglCreatePbufferSurface(display, config,
+                                          (EGL.EGLint * len(surface_attributes))(*surface_attributes))
+    if context == EGL.EGL_NO_CONTEXT or surface == EGL.EGL_NO_SURFACE:
+        raise RuntimeError('EGL context could not be created')
+    return display, surface, context
+
+
+class OffscreenContext:
+    """GL context without a window for benchmarks and batch jobs, which draw into their own framebuffer
+    objects. The context comes from Qt (QOffscreenSurface) or from EGL, it is made current when it is created.
+    PyOpenGL only finds the contexts of the platform it was loaded for, so EGL is used when PyOpenGL is using
+    EGL (PYOPENGL_PLATFORM=egl) and Qt otherwise.
+
+    Example:
+        context = OffscreenContext()
+        benchmark()
+        context.delete()
+
+    :param backend: 'qt' or 'egl', None chooses from the platform of PyOpenGL
+    :type backend: Union[str, None]
+    :raises RuntimeError: if the GL context cannot be created
+    """
+    def __init__(self, backend=None):
+        if backend is None:
+            backend = 'egl' if type(platform.PLATFORM).__name__ == 'EGLPlatform' else 'qt'
+        self.backend = backend
+        # Fonts, images and Qt contexts all need an application even though nothing is shown
+        self.app = QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+        if backend == 'egl':
+            self.egl = create_egl_context()
+        else:
+            self.surface = QtGui.QOffscreenSurface()
+            self.surface.create()
+            self.context = QtGui.QOpenGLContext()
+            if not self.context.create():
+                raise RuntimeError('Qt could not create a GL context, use the EGL backend by running with '
+                                   'PYOPENGL_PLATFORM=egl')
+        self.makeCurrent()
+
+    def makeCurrent(self):
+        """Makes the GL context current"""
+        if self.backend == 'egl':
+            from OpenGL import EGL
+            display, surface, context = self.egl
+            EGL.eglMakeCurrent(display, surface, surface, context)
+        else:
+            self.context.makeCurrent(self.surface)
+
+    def doneCurrent(self):
+        """Releases the GL context so no context is current"""
+        if self.backend == 'egl':
+            from OpenGL import EGL
+            EGL.eglMakeCurrent(self.egl[0], EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+        else:
+            self.context.doneCurrent()
+
+    def delete(self):
+        """Releases and destroys the GL context, GL objects should be deleted before"""
+        self.doneCurrent()
+        if self.backend == 'egl':
+            from OpenGL import EGL
+            display, surface, context = self.egl
+            EGL.eglDestroySurface(display, surface)
+            EGL.eglDestroyContext(display, context)
+
+
+def load_widget_class(path):
+    """Loads the GLWidget class of a demo script, the directory of the script is added to the path so the
+    script can import the modules of its chapter
+
+    :param path: path of demo script e.g. 4_3D/1_Pyramids.py
+    :type path: str
+    :return: GLWidget class of the demo
+    :rtype: Type[QtOpenGLWidgets.QOpenGLWidget]
+    """
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    if directory not in sys.path:
+        sys.path.append(directory)
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(f'demo_{name}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.GLWidget
+
+
+class HeadlessRenderer:
+    """Runs the initializeGL/resizeGL/paintGL of a QOpenGLWidget subclass, such as the GLWidget of the demos,
+    into a framebuffer object and returns the frames as numpy arrays. The widget is never shown, so it needs
+    no window or display. The GL context is an OffscreenContext.
+
+    :param widget_class: class of widget with initializeGL and paintGL methods
+    :type widget_class: Type[QtOpenGLWidgets.QOpenGLWidget]
+    :param width: width of frames
+    :type width: int
+    :param height: height of frames
+    :type height: int
+    :param backend: 'qt' or 'egl', None chooses from the platform of PyOpenGL
+    :type backend: Union[str, None]
+    :raises RuntimeError: if the GL context cannot be created
+    """
+    def __init__(self, widget_class, width=640, height=480, backend=None):
+        self.width = width
+        self.height = height
+        self.frame_count = 0
+
+        # QOpenGLWidget is a QWidget so a QApplication is needed even though nothing is shown
+        self.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+        self.context = OffscreenContext(backend)
+        self.backend = self.context.backend
+
+        # Colour and depth/stencil renderbuffers take the place of the widget's framebuffer
+        self.framebuffer = GL.glGenFramebuffers(1)
+        self.renderbuffers = GL.glGenRenderbuffers(2)
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self.framebuffer)
+        for renderbuffer, internal_format, attachment in zip(
+                self.renderbuffers, (GL.GL_RGBA8, GL.GL_DEPTH24_STENCIL8),
+                (GL.GL_COLOR_ATTACHMENT0, GL.GL_DEPTH_STENCIL_ATTACHMENT)):
+            GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, renderbuffer)
+            GL.glRenderbufferStorage(GL.GL_RENDERBUFFER, internal_format, width, height)
+            GL.glFramebufferRenderbuffer(GL.GL_FRAMEBUFFER, attachment, GL.GL_RENDERBUFFER, renderbuffer)
+        if GL.glCheckFramebufferStatus(GL.GL_FRAMEBUFFER) != GL.GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError('Framebuffer for headless rendering is incomplete')
+
+        self.widget = widget_class()
+        self.widget.resize(width, height)
+        GL.glViewport(0, 0, width, height)
+        self.widget.initializeGL()
+        self.widget.resizeGL(width, height)
+
+    def makeCurrent(self):
+        """Makes the GL context of the renderer current"""
+        self.context.makeCurrent()
+
+    def render(self):
+        """Paints one frame of the widget and reads it back
+
+        :return: height x width x 4 array of RGBA pixels, the first row is the top of the frame
+        :rtype: np.ndarray
+        """
+        self.makeCurrent()
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self.framebuffer)
+        GL.glViewport(0, 0, self.width, self.height)
+        self.widget.paintGL()
+        self.frame_count += 1
+
+        frame = np.empty((self.height, self.width, 4), np.uint8)
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+        GL.glReadBuffer(GL.GL_COLOR_ATTACHMENT0)
+        GL.glReadPixels(0, 0, self.width, self.height, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE,
+                        frame.ctypes.data_as(ctypes.c_void_p))
+        # GL rows start at the bottom of the frame
+        return frame[::-1]
+
+    def frames(self, count):
+        """Renders a number of frames
+
+        :param count: number of frames
+        :type count: int
+        :return: generator of frames as in render
+        :rtype: Generator[np.ndarray]
+        """
+        for _ in range(count):
+            yield self.render()
+
+    def stream(self, count, buffers=3):
+        """Renders a number of frames reading them back asynchronously with a FrameCapture, so rendering a frame
+        is not held up waiting for the readback of the one before
+
+        :param count: number of frames
+        :type count: int
+        :param buffers: number of pixel buffer objects in the ring
+        :type buffers: int
+        :return: generator of height x width x 4 views of RGBA pixels, each view is only valid until the
+                 next frame is requested
+        :rtype: Generator[np.ndarray]
+        """
+        self.makeCurrent()
+        capture = FrameCapture(self.width, self.height, buffers)
+        try:
+            for _ in range(count):
+                GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self.framebuffer)
+                GL.glViewport(0, 0, self.width, self.height)
+                self.widget.paintGL()
+                self.frame_count += 1
+                GL.glReadBuffer(GL.GL_COLOR_ATTACHMENT0)
+                frame = capture.capture()
+                if frame is not None:
+                    yield frame
+                    self.makeCurrent()
+            yield from capture.flush()
+        finally:
+            self.makeCurrent()
+            capture.delete()
+
+    def record(self, count, writer, buffers=3):
+        """Renders a number of frames into a FrameWriter e.g. a PNGSequenceWriter, or a PipeWriter with
+        ffmpeg_command to encode a video. The frames are read back asynchronously as in stream and written on
+        the threads of the writer. The drop policy of the writer decides what happens when its queue is full.
+        Offline recordings should create the writer with drop=False, so rendering waits for it and every frame
+        is kept. With the default drop=True, the frames the writer cannot keep up with are missing from the
+        recording. The writer is closed once every frame has been handed to it.
+
+        :param count: number of frames
+        :type count: int
+        :param writer: frame writer
+        :type writer: FrameWriter
+        :param buffers: number of pixel buffer objects in the ring
+        :type buffers: int
+        :return: number of frames written, frames dropped by the writer are not counted
+        :rtype: int
+        :raises Exception: the error of a frame that failed to be written
+        """
+        try:
+            for frame in self.stream(count, buffers):
+                writer.write(frame)
+        finally:
+            writer.close()
+        return writer.written
+
+    def delete(self):
+        """Deletes the framebuffer object and releases the GL context"""
+        self.makeCurrent()
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, 0)
+        GL.glDeleteFramebuffers(1, [self.framebuffer])
+        GL.glDeleteRenderbuffers(2, self.renderbuffers)
+        self.context.delete()
+
+
+def benchmark_headless(path, frames=200, width=640, height=480):
+    """Measures the throughput of rendering the GLWidget of a demo headless without reading the frames back,
+    reading each frame back synchronously, reading them back asynchronously through a ring of pixel buffers and
+    recording them as PNG files with a PNGSequenceWriter
+
+    :param path: path of demo script e.g. 4_3D/1_Pyramids.py
+    :type path: str
+    :param frames: number of frames to render
+    :type frames: int
+    :param width: width of frames
+    :type width: int
+    :param height: height of frames
+    :type height: int
+    """
+    renderer = HeadlessRenderer(load_widget_class(path), width, height)
+    renderer.render()
+
+    def render_only():
+        for _ in range(frames):
+            renderer.widget.paintGL()
+        # Waits for the frames to be drawn as reading back would
+        GL.glFinish()
+
+    def checksum(frame_iterator):
+        # Touches every frame so the asynchronous views are actually read
+        for frame in frame_iterator:
+            frame[0, 0].sum()
+
+    print(f'{os.path.basename(path)} ({renderer.backend}): {frames} frames of {width}x{height}')
+    with tempfile.TemporaryDirectory() as directory:
+        for name, run in (('render only', render_only),
+                          ('glReadPixels', lambda: checksum(renderer.frames(frames))),
+                          ('PBO ring', lambda: checksum(renderer.stream(frames))),
+                          ('PNG recording', lambda: renderer.record(frames, PNGSequenceWriter(directory, drop=False)))):
+            start = timeit.default_timer()
+            run()
+            elapsed = timeit.default_timer() - start
+            print(f'{name:>13}: {elapsed * 1000:8.1f} ms, {frames / elapsed:7.1f} frames per second')
+        if len(os.listdir(directory)) != frames:
+            raise ValueError(f'{len(os.listdir(directory))} PNG files were recorded instead of {frames}')
+    renderer.delete()
+
+
+if __name__ == "__main__":
+    benchmark_headless(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '4_3D', '1_Pyramids.py'))
@@ -1,8 +1,8 @@
 import sys
 import numpy as np
 from OpenGL import GL
-import OpenGL.GL.shaders as shaders
 from PyQt6 import QtOpenGLWidgets, QtWidgets, QtCore
+from program import program_cache
 
 
 VERTEX_SHADER = """
@@ -36,16 +36,15 @@ class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
     def initializeGL(self):
         GL.glClearColor(0.0, 0.0, 0.0, 0.0)
 
-        # Create and compile our GLSL program from the shaders
-        self.program_id = shaders.compileProgram(shaders.compileShader(VERTEX_SHADER, GL.GL_VERTEX_SHADER),
-                                                 shaders.compileShader(FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER))
+        # Create and compile our GLSL program from the shaders, the cache compiles identical shaders once
+        self.program = program_cache.get([(VERTEX_SHADER, GL.GL_VERTEX_SHADER),
+                                          (FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER)])
     
     def paintGL(self):
         GL.glClear(GL.GL_COLOR_BUFFER_BIT)
-        GL.glUseProgram(self.program_id)
+        self.program.use()
         
-        colourLoc = GL.glGetUniformLocation(self.program_id, "colour")
-        GL.glUniform3fv(colourLoc, 1, np.random.rand(3))
+        self.program.setUniform("colour", np.random.rand(3))
 
         GL.glDrawArrays(GL.GL_TRIANGLE_STRIP, 0, 4)
     
@@ -1,7 +1,7 @@
 import sys
 from OpenGL import GL
-import OpenGL.GL.shaders as shaders
 from PyQt6 import QtOpenGLWidgets, QtWidgets, QtCore
+from program import program_cache
 
 
 VERTEX_SHADER = """
@@ -46,19 +46,17 @@ class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
     def initializeGL(self):
         GL.glClearColor(0.0, 0.0, 0.0, 0.0)
 
-        # Create and compile our GLSL program from the shaders
-        self.program_id = shaders.compileProgram(shaders.compileShader(VERTEX_SHADER, GL.GL_VERTEX_SHADER),
-                                                 shaders.compileShader(FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER))
+        # Create and compile our GLSL program from the shaders, the cache compiles identical shaders once
+        self.program = program_cache.get([(VERTEX_SHADER, GL.GL_VERTEX_SHADER),
+                                          (FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER)])
     
     def paintGL(self):
         GL.glClear(GL.GL_COLOR_BUFFER_BIT)
-        GL.glUseProgram(self.program_id)
+        self.program.use()
 
-        resolution_loc = GL.glGetUniformLocation(self.program_id, "resolution")
-        GL.glUniform2f(resolution_loc, self.width(), self.height())
-
-        switch_loc = GL.glGetUniformLocation(self.program_id, "index")
-        GL.glUniform1i(switch_loc, self.index)
+        # Uniforms are only uploaded when the value changes i.e. after a resize or key press
+        self.program.setUniform("resolution", [self.width(), self.height()])
+        self.program.setUniform("index", self.index)
 
         GL.glDrawArrays(GL.GL_TRIANGLE_STRIP, 0, 4)
 
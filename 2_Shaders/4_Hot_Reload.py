@@ -0,0 +1,64 @@
+import logging
+import os
+import sys
+from OpenGL import GL
+from PyQt6 import QtOpenGLWidgets, QtWidgets, QtCore
+from program import WatchedProgram
+
+SHADER_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shaders')
+
+
+class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
+    def __init__(self, parent=None):
+        self.parent = parent
+        super().__init__(parent)
+
+    def initializeGL(self):
+        GL.glClearColor(0.0, 0.0, 0.0, 0.0)
+
+        # The shaders are read from files instead of strings so they can be edited while the demo runs
+        self.shader = WatchedProgram([os.path.join(SHADER_DIRECTORY, 'hot_reload.vert'),
+                                      os.path.join(SHADER_DIRECTORY, 'hot_reload.frag')])
+
+    def paintGL(self):
+        # Only the program is rebuilt after a change, the context and everything else in it stay alive
+        self.shader.reload()
+
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT)
+        self.shader.program.use()
+        self.shader.program.setUniform("resolution", [self.width(), self.height()])
+
+        GL.glDrawArrays(GL.GL_TRIANGLE_STRIP, 0, 4)
+
+
+class MainWindow(QtWidgets.QMainWindow):
+    def __init__(self):
+        super().__init__()
+
+        self.resize(500, 500)
+        self.setWindowTitle('Hot Reload [Edit shaders/hot_reload.frag]')
+
+        self.glWidget = GLWidget(self)
+        self.setCentralWidget(self.glWidget)
+
+        # Checking the modification times is cheap, the widget is only repainted when a file changed
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(250)
+        self.timer.timeout.connect(self.checkShaders)
+        self.timer.start()
+
+    def checkShaders(self):
+        shader = getattr(self.glWidget, 'shader', None)
+        if shader is not None and shader.changed():
+            self.glWidget.update()
+
+
+if __name__ == "__main__":
+    # Shaders that fail to compile are reported through the logger of the program module
+    logging.basicConfig(format='%(message)s')
+    app = QtWidgets.QApplication(sys.argv)
+
+    window = MainWindow()
+    window.show()
+
+    sys.exit(app.exec())
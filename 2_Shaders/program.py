@@ -0,0 +1,703 @@
+"""
+Classes for GLSL shader programs with cached uniforms and a cache of compiled programs
+"""
+import ctypes
+import hashlib
+import logging
+import os
+import struct
+import sys
+import tempfile
+import timeit
+import numpy as np
+from OpenGL import GL, contextdata
+from OpenGL.error import GLError
+import OpenGL.GL.shaders as shaders
+from OpenGL.GL.ARB.parallel_shader_compile import glMaxShaderCompilerThreadsARB
+from OpenGL.GL.KHR.parallel_shader_compile import glMaxShaderCompilerThreadsKHR
+
+logger = logging.getLogger(__name__)
+
+
+# Maps the uniform type to the upload function, the number of components and data type
+UNIFORM_SETTERS = {
+    GL.GL_FLOAT: (GL.glUniform1fv, 1, np.float32),
+    GL.GL_FLOAT_VEC2: (GL.glUniform2fv, 2, np.float32),
+    GL.GL_FLOAT_VEC3: (GL.glUniform3fv, 3, np.float32),
+    GL.GL_FLOAT_VEC4: (GL.glUniform4fv, 4, np.float32),
+    GL.GL_INT: (GL.glUniform1iv, 1, np.int32),
+    GL.GL_INT_VEC2: (GL.glUniform2iv, 2, np.int32),
+    GL.GL_INT_VEC3: (GL.glUniform3iv, 3, np.int32),
+    GL.GL_INT_VEC4: (GL.glUniform4iv, 4, np.int32),
+    GL.GL_BOOL: (GL.glUniform1iv, 1, np.int32),
+    GL.GL_SAMPLER_1D: (GL.glUniform1iv, 1, np.int32),
+    GL.GL_SAMPLER_2D: (GL.glUniform1iv, 1, np.int32),
+    GL.GL_SAMPLER_3D: (GL.glUniform1iv, 1, np.int32),
+    GL.GL_SAMPLER_CUBE: (GL.glUniform1iv, 1, np.int32),
+    GL.GL_FLOAT_MAT2: (GL.glUniformMatrix2fv, 4, np.float32),
+    GL.GL_FLOAT_MAT3: (GL.glUniformMatrix3fv, 9, np.float32),
+    GL.GL_FLOAT_MAT4: (GL.glUniformMatrix4fv, 16, np.float32),
+}
+
+MATRIX_TYPES = {GL.GL_FLOAT_MAT2, GL.GL_FLOAT_MAT3, GL.GL_FLOAT_MAT4}
+
+# Maps the extension of a shader file to the shader type
+SHADER_EXTENSIONS = {
+    '.vert': GL.GL_VERTEX_SHADER,
+    '.geom': GL.GL_GEOMETRY_SHADER,
+    '.frag': GL.GL_FRAGMENT_SHADER,
+    '.comp': GL.GL_COMPUTE_SHADER,
+}
+
+
+class Uniform:
+    """Active uniform of a shader program
+
+    :param name: name of uniform
+    :type name: str
+    :param location: location of uniform
+    :type location: int
+    :param uniform_type: GL type of uniform e.g. GL_FLOAT_VEC3
+    :type uniform_type: int
+    :param size: number of elements for array uniforms
+    :type size: int
+    """
+    def __init__(self, name, location, uniform_type, size):
+        self.name = name
+        self.location = location
+        self.type = uniform_type
+        self.size = size
+        self.value = None
+
+
+class Program:
+    """Wraps a linked shader program. The active uniforms and their locations are queried once
+    so uniforms can be set by name without calling glGetUniformLocation every frame, and the last
+    value uploaded for each uniform is kept so the glUniform call is skipped when it has not changed.
+
+    :param program_id: ID of a linked program e.g. from shaders.compileProgram
+    :type program_id: int
+    """
+    def __init__(self, program_id):
+        self.id = program_id
+        self.uniforms = {}
+        self.uploads = 0
+        self.skipped = 0
+
+        count = GL.glGetProgramiv(program_id, GL.GL_ACTIVE_UNIFORMS)
+        for index in range(count):
+            name, size, uniform_type = GL.glGetActiveUniform(program_id, index)
+            # Depending on the PyOpenGL and numpy versions the name is returned as a null terminated
+            # array of chars instead of bytes
+            if not isinstance(name, (bytes, str)):
+                name = np.asarray(name, np.uint8).tobytes()
+            if isinstance(name, bytes):
+                name = name.split(b'\0', 1)[0].decode()
+            # Arrays are reported as "name[0]" but are set using the base name
+            if name.endswith('[0]'):
+                name = name[:-3]
+            location = GL.glGetUniformLocation(program_id, name)
+            self.uniforms[name] = Uniform(name, location, int(uniform_type), size)
+
+    def use(self):
+        """Makes the program part of the current rendering state"""
+        GL.glUseProgram(self.id)
+
+    def location(self, name):
+        """Gets the cached location of a uniform
+
+        :param name: name of uniform
+        :type name: str
+        :return: location of uniform or -1 if the uniform is not active
+        :rtype: int
+        """
+        uniform = self.uniforms.get(name)
+        return -1 if uniform is None else uniform.location
+
+    def setUniform(self, name, value):
+        """Uploads the value of a uniform in the program, the program must be in use.
+        The upload is skipped if the value is the same as the last one uploaded. Matrices are
+        expected in row-major order (as the numpy matrices in camera.py) and are transposed by GL.
+        Names of uniforms that are not active are ignored as GL would for location -1.
+
+        :param name: name of uniform
+        :type name: str
+        :param value: value of uniform
+        :type value: Union[float, int, bool, List, np.ndarray]
+        """
+        uniform = self.uniforms.get(name)
+        if uniform is None:
+            return
+
+        setter, components, dtype = UNIFORM_SETTERS[uniform.type]
+        value = np.asarray(value, dtype).ravel()
+        if uniform.value is not None and np.array_equal(uniform.value, value):
+            self.skipped += 1
+            return
+
+        count = len(value) // components
+        if uniform.type in MATRIX_TYPES:
+            setter(uniform.location, count, GL.GL_TRUE, value)
+        else:
+            setter(uniform.location, count, value)
+        uniform.value = value.copy()
+        self.uploads += 1
+
+    def resetCounters(self):
+        """Resets the counts of uploaded and skipped uniform updates"""
+        self.uploads = 0
+        self.skipped = 0
+
+
+def link_program(shader_ids, retrievable=False):
+    """Links compiled shaders into a program, the shaders are detached and deleted after linking
+
+    :param shader_ids: IDs of compiled shaders e.g. from shaders.compileShader
+    :type shader_ids: List[int]
+    :param retrievable: indicates the program binary will be retrieved with glGetProgramBinary
+    :type retrievable: bool
+    :return: ID of linked program
+    :rtype: int
+    :raises shaders.ShaderLinkError: if the program fails to link
+    """
+    program = GL.glCreateProgram()
+    for shader in shader_ids:
+        GL.glAttachShader(program, shader)
+    if retrievable:
+        GL.glProgramParameteri(program, GL.GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL.GL_TRUE)
+    GL.glLinkProgram(program)
+    for shader in shader_ids:
+        GL.glDetachShader(program, shader)
+        GL.glDeleteShader(shader)
+
+    if GL.glGetProgramiv(program, GL.GL_LINK_STATUS) == GL.GL_FALSE:
+        log = GL.glGetProgramInfoLog(program)
+        GL.glDeleteProgram(program)
+        raise shaders.ShaderLinkError(f'Link failure: {log}')
+    return program
+
+
+def compile_program(sources, retrievable=False):
+    """Compiles and links a program from shader sources, like shaders.compileProgram but without
+    validation and with the option to make the binary retrievable
+
+    :param sources: list of (source, shader type) for each shader e.g. (VERTEX_SHADER, GL_VERTEX_SHADER)
+    :type sources: List[Tuple[str, int]]
+    :param retrievable: indicates the program binary will be retrieved with glGetProgramBinary
+    :type retrievable: bool
+    :return: ID of linked program
+    :rtype: int
+    :raises shaders.ShaderCompilationError: if a shader fails to compile
+    :raises shaders.ShaderLinkError: if the program fails to link
+    """
+    shader_ids = []
+    try:
+        for source, shader_type in sources:
+            shader_ids.append(shaders.compileShader(source, shader_type))
+    except shaders.ShaderCompilationError:
+        for shader in shader_ids:
+            GL.glDeleteShader(shader)
+        raise
+    return link_program(shader_ids, retrievable)
+
+
+def parallel_shader_compile(threads=0xFFFFFFFF):
+    """Sets the number of threads the driver may use to compile shaders and link programs in the background
+    when it supports KHR_parallel_shader_compile (or the ARB version). With background threads, glCompileShader
+    and glLinkProgram return straight away and only querying the status of the shader or program waits for
+    the result. A GL context must be current.
+
+    :param threads: maximum number of compiler threads, 0 compiles on the calling thread and the default
+                    0xFFFFFFFF lets the driver choose
+    :type threads: int
+    :return: indicates the driver supports parallel compiling
+    :rtype: bool
+    """
+    count = GL.glGetIntegerv(GL.GL_NUM_EXTENSIONS)
+    extensions = {GL.glGetStringi(GL.GL_EXTENSIONS, index).decode() for index in range(count)}
+    if 'GL_KHR_parallel_shader_compile' in extensions:
+        glMaxShaderCompilerThreadsKHR(threads)
+    elif 'GL_ARB_parallel_shader_compile' in extensions:
+        glMaxShaderCompilerThreadsARB(threads)
+    else:
+        return False
+    return True
+
+
+def compile_programs(sources_list, retrievable=False):
+    """Compiles and links a batch of programs. Every shader compile and program link is submitted before the
+    status of any of them is queried, so a driver compiling in parallel (see parallel_shader_compile) works on
+    the whole batch at once instead of waiting for each program in turn. A program that fails does not stop
+    the others, its error is returned in its place.
+
+    :param sources_list: list of (source, shader type) for each shader of each program
+    :type sources_list: List[List[Tuple[str, int]]]
+    :param retrievable: indicates the program binaries will be retrieved with glGetProgramBinary
+    :type retrievable: bool
+    :return: ID of linked program, or the ShaderCompilationError or ShaderLinkError, for each program
+    :rtype: List[Union[int, shaders.ShaderCompilationError, shaders.ShaderLinkError]]
+    """
+    shader_lists = []
+    for sources in sources_list:
+        shader_ids = []
+        for source, shader_type in sources:
+            shader = GL.glCreateShader(shader_type)
+            GL.glShaderSource(shader, source)
+            GL.glCompileShader(shader)
+            shader_ids.append(shader)
+        shader_lists.append(shader_ids)
+
+    # Links are submitted without waiting for the compiles, a shader that fails to compile only fails the link
+    program_ids = []
+    for shader_ids in shader_lists:
+        program = GL.glCreateProgram()
+        for shader in shader_ids:
+            GL.glAttachShader(program, shader)
+        if retrievable:
+            GL.glProgramParameteri(program, GL.GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL.GL_TRUE)
+        GL.glLinkProgram(program)
+        program_ids.append(program)
+
+    results = []
+    for sources, shader_ids, program in zip(sources_list, shader_lists, program_ids):
+        error = None
+        for (source, shader_type), shader in zip(sources, shader_ids):
+            if error is None and GL.glGetShaderiv(shader, GL.GL_COMPILE_STATUS) == GL.GL_FALSE:
+                error = shaders.ShaderCompilationError(f'Shader compile failure: {GL.glGetShaderInfoLog(shader)}',
+                                                       source, shader_type)
+            GL.glDetachShader(program, shader)
+            GL.glDeleteShader(shader)
+
+        if error is None and GL.glGetProgramiv(program, GL.GL_LINK_STATUS) == GL.GL_FALSE:
+            error = shaders.ShaderLinkError(f'Link failure: {GL.glGetProgramInfoLog(program)}')
+        if error is not None:
+            GL.glDeleteProgram(program)
+        results.append(program if error is None else error)
+
+    return results
+
+
+class ProgramCache:
+    """Process-wide cache of shader programs keyed by the SHA-256 hash of their shader sources. Each
+    GL context (or group of contexts sharing objects, given as the share key) gets one Program per set
+    of sources, so widgets with identical shaders compile them once and share the Program and its cached
+    uniform values. Programs in the cache are owned by it and should not be deleted by their users.
+
+    When the driver supports program binaries (GL 4.1 or ARB_get_program_binary, Mesa's llvmpipe included)
+    the linked binaries are also saved in the directory, and later runs load them with glProgramBinary
+    instead of compiling. Binary files are keyed by the sources and the GL vendor, renderer and version so
+    a driver update does not load stale binaries, and a binary the driver rejects is replaced by compiling.
+
+    :param directory: directory of the program binaries, None uses ~/.cache/practical_opengl/programs
+    :type directory: Union[str, None]
+    :param persist: indicates program binaries should be loaded from and saved to the directory
+    :type persist: bool
+    """
+    magic = b'PGLPRG01'
+    # magic and binary format
+    header = struct.Struct('<8sI')
+
+    def __init__(self, directory=None, persist=True):
+        if directory is None:
+            directory = os.path.join(os.path.expanduser('~'), '.cache', 'practical_opengl', 'programs')
+        self.directory = directory
+        self.persist = persist
+        self.programs = {}
+        self.hits = 0
+        self.compiles = 0
+        self.binary_loads = 0
+
+    @staticmethod
+    def key(sources):
+        """Computes the hash of the shader sources and types of a program
+
+        :param sources: list of (source, shader type) for each shader
+        :type sources: List[Tuple[str, int]]
+        :return: hash of sources
+        :rtype: str
+        """
+        sha = hashlib.sha256()
+        for source, shader_type in sources:
+            source = source.encode() if isinstance(source, str) else source
+            sha.update(struct.pack('<IQ', int(shader_type), len(source)))
+            sha.update(source)
+        return sha.hexdigest()
+
+    def get(self, sources, share_key=None):
+        """Gets the program for shader sources, the program is loaded from its binary or compiled the
+        first time it is requested in a context. A GL context must be current.
+
+        :param sources: list of (source, shader type) for each shader e.g. (VERTEX_SHADER, GL_VERTEX_SHADER)
+        :type sources: List[Tuple[str, int]]
+        :param share_key: key of the group of contexts that share objects e.g. QOpenGLContext.shareGroup(),
+                          None uses the current context
+        :type share_key: Any
+        :return: program
+        :rtype: Program
+        :raises shaders.ShaderCompilationError: if a shader fails to compile
+        :raises shaders.ShaderLinkError: if the program fails to link
+        """
+        program = self.getMany([sources], share_key)[0]
+        if isinstance(program, Exception):
+            raise program
+        return program
+
+    def getMany(self, sources_list, share_key=None):
+        """Gets the programs for a batch of shader sources e.g. every program of a scene at startup. Programs
+        without a binary are compiled together with compile_programs so the driver can compile them in
+        parallel. A GL context must be current.
+
+        :param sources_list: list of (source, shader type) for each shader of each program
+        :type sources_list: List[List[Tuple[str, int]]]
+        :param share_key: key of the group of contexts that share objects e.g. QOpenGLContext.shareGroup(),
+                          None uses the current context
+        :type share_key: Any
+        :return: program, or the ShaderCompilationError or ShaderLinkError if it failed, for each program
+        :rtype: List[Union[Program, shaders.ShaderCompilationError, shaders.ShaderLinkError]]
+        """
+        share_key = contextdata.getContext() if share_key is None else share_key
+        keys = [self.key(sources) for sources in sources_list]
+        persist = self.persist and GL.glGetIntegerv(GL.GL_NUM_PROGRAM_BINARY_FORMATS) > 0
+
+        missing = {}
+        for key, sources in zip(keys, sources_list):
+            if (share_key, key) in self.programs:
+                self.hits += 1
+                continue
+            if key in missing:
+                continue
+            program_id = self._load(key) if persist else None
+            if program_id is None:
+                missing[key] = sources
+            else:
+                self.binary_loads += 1
+                self.programs[(share_key, key)] = Program(program_id)
+
+        errors = {}
+        for key, program_id in zip(missing, compile_programs(list(missing.values()), retrievable=persist)):
+            if isinstance(program_id, Exception):
+                errors[key] = program_id
+                continue
+            self.compiles += 1
+            if persist:
+                self._save(key, program_id)
+            self.programs[(share_key, key)] = Program(program_id)
+
+        return [errors[key] if key in errors else self.programs[(share_key, key)] for key in keys]
+
+    def binaryPath(self, key):
+        """Gets the path of the binary file of a program for the current driver, a GL context must be current
+
+        :param key: hash of the shader sources
+        :type key: str
+        :return: path of binary file
+        :rtype: str
+        """
+        sha = hashlib.sha256(key.encode())
+        for name in (GL.GL_VENDOR, GL.GL_RENDERER, GL.GL_VERSION):
+            sha.update(GL.glGetString(name) or b'')
+        return os.path.join(self.directory, f'{sha.hexdigest()}.bin')
+
+    def _load(self, key):
+        """Creates a program from its binary file
+
+        :param key: hash of the shader sources
+        :type key: str
+        :return: ID of program or None if there is no binary or the driver rejects it
+        :rtype: Union[int, None]
+        """
+        try:
+            with open(self.binaryPath(key), 'rb') as file:
+                data = file.read()
+            magic, binary_format = self.header.unpack_from(data)
+        except (OSError, struct.error):
+            return None
+        if magic != self.magic:
+            return None
+
+        binary = np.frombuffer(data, np.uint8, offset=self.header.size)
+        program = GL.glCreateProgram()
+        try:
+            # Binaries in a format the driver no longer supports raise GL_INVALID_ENUM
+            GL.glProgramBinary(program, binary_format, binary.ctypes.data_as(ctypes.c_void_p), binary.nbytes)
+            linked = GL.glGetProgramiv(program, GL.GL_LINK_STATUS) != GL.GL_FALSE
+        except GLError:
+            linked = False
+        if not linked:
+            GL.glDeleteProgram(program)
+            return None
+        return program
+
+    def _save(self, key, program_id):
+        """Writes the binary of a linked program into its binary file, the file is written under a
+        temporary name and then renamed so other processes never read a partially written file
+
+        :param key: hash of the shader sources
+        :type key: str
+        :param program_id: ID of linked program
+        :type program_id: int
+        :return: indicates the binary file was written
+        :rtype: bool
+        """
+        size = GL.glGetProgramiv(program_id, GL.GL_PROGRAM_BINARY_LENGTH)
+        if not size:
+            return False
+
+        binary = np.empty(size, np.uint8)
+        length = GL.GLsizei(0)
+        binary_format = GL.GLenum(0)
+        GL.glGetProgramBinary(program_id, size, ctypes.byref(length), ctypes.byref(binary_format),
+                              binary.ctypes.data_as(ctypes.c_void_p))
+
+        temporary = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp', delete=False) as file:
+                temporary = file.name
+                file.write(self.header.pack(self.magic, binary_format.value))
+                file.write(binary[:length.value].data)
+            os.replace(temporary, self.binaryPath(key))
+        except OSError:
+            if temporary is not None and os.path.exists(temporary):
+                os.remove(temporary)
+            return False
+
+        return True
+
+    def delete(self, share_key=None):
+        """Deletes the programs of a context or group of contexts, the context must be current
+
+        :param share_key: key of the group of contexts that share objects, None uses the current context
+        :type share_key: Any
+        """
+        share_key = contextdata.getContext() if share_key is None else share_key
+        for cache_key in [cache_key for cache_key in self.programs if cache_key[0] == share_key]:
+            GL.glDeleteProgram(self.programs.pop(cache_key).id)
+
+
+# Programs shared by every widget in the process
+program_cache = ProgramCache()
+
+
+def load_sources(paths):
+    """Reads the shader sources of a program from files, the shader type is given by the file extension
+    (.vert, .geom, .frag or .comp)
+
+    :param paths: paths of shader files
+    :type paths: List[str]
+    :return: list of (source, shader type) for each shader
+    :rtype: List[Tuple[str, int]]
+    :raises ValueError: if the extension of a file is not a shader extension
+    """
+    sources = []
+    for path in paths:
+        shader_type = SHADER_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if shader_type is None:
+            raise ValueError(f'Unknown shader file extension: {path}')
+        with open(path) as file:
+            sources.append((file.read(), shader_type))
+    return sources
+
+
+class WatchedProgram:
+    """Program built from shader files that is rebuilt when the files change, so shaders can be edited while
+    the application runs and keeps its buffers and textures. changed() only compares the modification times of
+    the files and can be called from a timer, reload() recompiles and must be called with the GL context
+    current e.g. at the start of paintGL. When the edited shaders fail to compile the last good program is kept,
+    the exception is kept in error and logged as a warning with the logger of the module.
+
+    The first program is taken from the cache so it loads from its binary on later runs, the reloaded programs
+    are owned by the WatchedProgram and deleted when replaced. Vertex attributes should have fixed locations
+    (layout(location = n)) so the vertex arrays set up for the first program work with the reloaded ones.
+
+    :param paths: paths of shader files
+    :type paths: List[str]
+    :param cache: cache of the first program, None uses the program_cache of the module
+    :type cache: Union[ProgramCache, None]
+    :raises shaders.ShaderCompilationError: if a shader of the first program fails to compile
+    :raises shaders.ShaderLinkError: if the first program fails to link
+    """
+    def __init__(self, paths, cache=None):
+        self.paths = list(paths)
+        self.mtimes = self._mtimes()
+        self.program = (program_cache if cache is None else cache).get(load_sources(self.paths))
+        self.owned = False
+        self.reloads = 0
+        self.error = None
+
+    def _mtimes(self):
+        """Gets the modification times of the shader files
+
+        :return: modification time in nanoseconds of each file or None if the file is missing
+        :rtype: List[Union[int, None]]
+        """
+        mtimes = []
+        for path in self.paths:
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return mtimes
+
+    def changed(self):
+        """Checks if any shader file changed since the program was last built
+
+        :return: indicates a file changed
+        :rtype: bool
+        """
+        return self._mtimes() != self.mtimes
+
+    def reload(self):
+        """Rebuilds the program if any shader file changed, a GL context must be current
+
+        :return: indicates the program was replaced
+        :rtype: bool
+        """
+        mtimes = self._mtimes()
+        if mtimes == self.mtimes:
+            return False
+
+        # The times are kept even when compiling fails so a broken shader is compiled once per save
+        self.mtimes = mtimes
+        try:
+            program_id = compile_program(load_sources(self.paths))
+        except (OSError, shaders.ShaderCompilationError, shaders.ShaderLinkError) as error:
+            self.error = error
+            # Compile errors also hold the source, only the compile log is reported
+            message = error.args[0] if isinstance(error, shaders.ShaderCompilationError) else error
+            logger.warning('Keeping the last good program, reloading %s failed: %s', ', '.join(self.paths), message)
+            return False
+
+        if self.owned:
+            GL.glDeleteProgram(self.program.id)
+        self.program = Program(program_id)
+        self.owned = True
+        self.reloads += 1
+        self.error = None
+        return True
+
+    def delete(self):
+        """Deletes the reloaded program, the first program is owned by the cache"""
+        if self.owned:
+            GL.glDeleteProgram(self.program.id)
+            self.owned = False
+
+
+def synthetic_sources(count, start=0):
+    """Creates the shader sources of distinct programs for benchmarking, each program has a different
+    constant so the driver cannot reuse an earlier compile
+
+    :param count: number of programs
+    :type count: int
+    :param start: index of the first program, batches with different starts have no programs in common
+    :type start: int
+    :return: list of (source, shader type) for each program
+    :rtype: List[List[Tuple[str, int]]]
+    """
+    vertex_shader = """
+    #version 330
+    in vec3 position;
+    in vec3 normal;
+    uniform mat4 MVP;
+    out vec3 outNormal;
+    void main()
+    {
+        outNormal = normal;
+        gl_Position = MVP * vec4(position, 1.0);
+    }
+    """
+    fragment_shader = """
+    #version 330
+    in vec3 outNormal;
+    uniform vec3 light;
+    out vec4 colour;
+    void main()
+    {
+        float diffuse = max(dot(normalize(outNormal), normalize(light)), 0.0);
+        float specular = pow(max(reflect(-normalize(light), normalize(outNormal)).z, 0.0), %d.0);
+        colour = vec4(vec3(0.1 + diffuse + specular) * %f, 1.0);
+    }
+    """
+    return [[(vertex_shader, GL.GL_VERTEX_SHADER), (fragment_shader % (index + 1, 1.0 - index * 1e-3),
+                                                     GL.GL_FRAGMENT_SHADER)] for index in range(start, start + count)]
+
+
+def _offscreen_context():
+    """Creates the GL context of the benchmarks, headless.py is only imported when a benchmark runs so using
+    the module does not load it
+
+    :return: current offscreen context
+    :rtype: OffscreenContext
+    """
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '1_Windowing'))
+    from headless import OffscreenContext
+    return OffscreenContext()
+
+
+def benchmark_program_cache(count=50):
+    """Compares the startup time of getting programs from a ProgramCache when the programs are compiled
+    (first run) and when they are loaded from their binaries (later runs). An offscreen GL context is
+    created so no window is shown.
+
+    :param count: number of programs
+    :type count: int
+    """
+    context = _offscreen_context()
+
+    sources = synthetic_sources(count)
+    with tempfile.TemporaryDirectory() as directory:
+        print(f'Getting {count} programs')
+        for name in ('first run', 'later run'):
+            # A new cache is like a new process, only the binary files are kept between runs
+            cache = ProgramCache(directory)
+            start = timeit.default_timer()
+            for program_sources in sources:
+                cache.get(program_sources)
+            elapsed = timeit.default_timer() - start
+            print(f'{name:>10}: {elapsed * 1000:8.1f} ms, {cache.compiles} compiled, '
+                  f'{cache.binary_loads} loaded from binaries')
+            cache.delete()
+
+    context.delete()
+
+
+def benchmark_parallel_compile(count=50):
+    """Compares the startup time of compiling programs one at a time, checking the status of each before
+    the next, with submitting them as a batch with compile_programs, with and without parallel compiling
+    in the driver. An offscreen GL context is created so no window is shown.
+
+    :param count: number of programs
+    :type count: int
+    """
+    context = _offscreen_context()
+
+    def serial(sources_list):
+        return [compile_program(sources) for sources in sources_list]
+
+    parallel = parallel_shader_compile(0)
+    runs = [('one at a time', serial, 0), ('batch', compile_programs, 0)]
+    if parallel:
+        runs.append(('batch, parallel', compile_programs, 0xFFFFFFFF))
+    else:
+        print('KHR_parallel_shader_compile is not supported, batches are compiled on the calling thread')
+
+    print(f'Compiling {count} programs')
+    for index, (name, compile_function, threads) in enumerate(runs):
+        if parallel:
+            parallel_shader_compile(threads)
+        # Each run gets its own sources so the driver's in-memory shader cache does not hold any of them,
+        # on Mesa set MESA_SHADER_CACHE_DISABLE=true so they are not read from the disk cache of a previous run
+        sources_list = synthetic_sources(count, start=index * count)
+        start = timeit.default_timer()
+        program_ids = compile_function(sources_list)
+        elapsed = timeit.default_timer() - start
+        print(f'{name:>16}: {elapsed * 1000:8.1f} ms')
+        for program_id in program_ids:
+            GL.glDeleteProgram(program_id)
+
+    context.delete()
+
+
+if __name__ == "__main__":
+    benchmark_program_cache()
+    benchmark_parallel_compile()
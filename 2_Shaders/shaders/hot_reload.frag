@@ -0,0 +1,10 @@
+#version 330
+out vec4 fragColour;
+uniform vec2 resolution;
+
+// Edit and save this file while 4_Hot_Reload.py is running
+void main() {
+    vec2 st = gl_FragCoord.xy/resolution;
+    float rings = 0.5 + 0.5 * cos(40.0 * length(st - 0.5));
+    fragColour = vec4(st.x, st.y, rings, 1.0);
+}
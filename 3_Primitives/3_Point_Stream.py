@@ -0,0 +1,95 @@
+import sys
+import numpy as np
+from OpenGL import GL
+import OpenGL.GL.shaders as shaders
+from PyQt6 import QtOpenGLWidgets, QtWidgets
+from points import PointCloud
+
+# Points arriving every frame and number of chunks of 1M points kept, older points are overwritten
+BATCH = 200000
+CHUNKS = 16
+
+
+VERTEX_SHADER = """
+#version 330
+in vec2 position;
+
+void main()
+{
+  gl_Position = vec4(position, 0.0, 1.0);
+}
+"""
+
+
+FRAGMENT_SHADER = """
+#version 330
+out vec4 colour;
+
+void main(){
+  colour = vec4(0.01, 0.004, 0.0015, 0);
+}
+"""
+
+class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
+    def __init__(self, parent=None):
+        self.parent = parent
+        super().__init__(parent)
+        self.frame = 0
+        self.generator = np.random.default_rng()
+
+    def initializeGL(self):
+        GL.glClearColor(0.0, 0.0, 0.0, 0.0)
+
+        # Create and compile our GLSL program from the shaders
+        self.program_id = shaders.compileProgram(shaders.compileShader(VERTEX_SHADER, GL.GL_VERTEX_SHADER),
+                                                 shaders.compileShader(FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER))
+
+        # The points are added up so dense areas are brighter
+        GL.glEnable(GL.GL_BLEND)
+        GL.glBlendFunc(GL.GL_ONE, GL.GL_ONE)
+
+        # The chunks are a ring so the cloud is a sliding window over the last CHUNKS million points
+        self.cloud = PointCloud(GL.glGetAttribLocation(self.program_id, "position"), max_chunks=CHUNKS,
+                                upload='map')
+        self.points = np.empty((BATCH, 2), np.float32)
+
+    def paintGL(self):
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT)
+
+        # A new batch of noisy samples along a slowly turning Lissajous curve is written into the same array
+        # and appended, only the new points are uploaded
+        self.frame += 1
+        t = self.generator.uniform(0.0, 2.0 * np.pi, BATCH).astype(np.float32)
+        phase = self.frame * 0.01
+        self.points[:, 0] = np.sin(3.0 * t + phase) * 0.8
+        self.points[:, 1] = np.sin(2.0 * t) * 0.8
+        self.points += self.generator.normal(0.0, 0.02, (BATCH, 2)).astype(np.float32)
+        self.cloud.append(self.points)
+
+        # Use our shader
+        GL.glUseProgram(self.program_id)
+        self.cloud.draw()
+
+        if self.frame % 30 == 1 and self.parent is not None:
+            self.parent.setWindowTitle(f'Point Stream ({self.cloud.count} points of {self.cloud.total} received)')
+        self.update()
+
+
+class MainWindow(QtWidgets.QMainWindow):
+    def __init__(self):
+        super().__init__()
+
+        self.resize(500, 500)
+        self.setWindowTitle('Point Stream')
+
+        self.glWidget = GLWidget(self)
+        self.setCentralWidget(self.glWidget)
+
+
+if __name__ == "__main__":
+    app = QtWidgets.QApplication(sys.argv)
+
+    window = MainWindow()
+    window.show()
+
+    sys.exit(app.exec())
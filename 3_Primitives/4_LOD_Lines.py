@@ -0,0 +1,113 @@
+import sys
+import numpy as np
+from OpenGL import GL
+import OpenGL.GL.shaders as shaders
+from PyQt6 import QtOpenGLWidgets, QtWidgets, QtCore
+from lines import DecimatedLine, MinMaxPyramid, random_walk
+
+# Number of samples of the signal, the pyramid takes a few seconds to build at startup
+SAMPLES = 100000000
+
+
+VERTEX_SHADER = """
+#version 330
+// Scale and offset of x and y from sample positions and values to normalised device coordinates
+uniform vec4 transform;
+in vec2 position;
+
+void main()
+{
+  gl_Position = vec4(position * transform.xy + transform.zw, 0.0, 1.0);
+}
+"""
+
+
+FRAGMENT_SHADER = """
+#version 330
+out vec4 colour;
+
+void main(){
+  colour = vec4(1, 0, 0, 0);
+}
+"""
+
+class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
+    def __init__(self, parent=None):
+        self.parent = parent
+        super().__init__(parent)
+        self.start = 0.0
+        self.end = float(SAMPLES)
+        self.setFocusPolicy(QtCore.Qt.FocusPolicy.StrongFocus)
+
+    def initializeGL(self):
+        GL.glClearColor(0.0, 0.0, 0.4, 0.0)
+
+        # Create and compile our GLSL program from the shaders
+        self.program_id = shaders.compileProgram(shaders.compileShader(VERTEX_SHADER, GL.GL_VERTEX_SHADER),
+                                                 shaders.compileShader(FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER))
+        self.transform_id = GL.glGetUniformLocation(self.program_id, "transform")
+
+        # The signal stays in main memory, only a few vertices per pixel column are sent to the GPU
+        self.pyramid = MinMaxPyramid(random_walk(SAMPLES))
+        self.y_range = (-1.0, 1.0)
+        self.line = DecimatedLine(GL.glGetAttribLocation(self.program_id, "position"), self.pyramid)
+
+    def paintGL(self):
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT)
+
+        # The line is only decimated again when the range or the width has changed
+        columns = max(int(self.width() * self.devicePixelRatioF()), 1)
+        start, end = int(self.start), int(np.ceil(self.end))
+        if self.line.setView(start, end, columns):
+            # The values are scaled to fit the view, there are at most two vertices per column to look at
+            values = self.line.vertices[:self.line.count, 1]
+            self.y_range = (float(values.min()), max(float(values.max()), float(values.min()) + 1e-6))
+            if self.parent is not None:
+                self.parent.setWindowTitle(f'LOD Lines ({end - start} samples as {self.line.count} vertices)')
+
+        # Use our shader
+        GL.glUseProgram(self.program_id)
+        y_scale = 1.8 / (self.y_range[1] - self.y_range[0])
+        GL.glUniform4f(self.transform_id, 2.0 / (end - start), y_scale, -1.0, -0.9 - self.y_range[0] * y_scale)
+        self.line.draw()
+
+    def wheelEvent(self, event):
+        # Zooms around the sample under the cursor
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        anchor = self.start + (self.end - self.start) * event.position().x() / max(self.width(), 1)
+        length = min(max((self.end - self.start) * factor, 10.0), SAMPLES)
+        self._setRange(anchor - (anchor - self.start) * length / (self.end - self.start), length)
+
+    def keyPressEvent(self, event):
+        length = self.end - self.start
+        if event.key() == QtCore.Qt.Key.Key_Right:
+            self._setRange(self.start + length * 0.1, length)
+        elif event.key() == QtCore.Qt.Key.Key_Left:
+            self._setRange(self.start - length * 0.1, length)
+        elif event.key() == QtCore.Qt.Key.Key_Home:
+            self._setRange(0.0, SAMPLES)
+
+    def _setRange(self, start, length):
+        self.start = min(max(start, 0.0), SAMPLES - length)
+        self.end = self.start + length
+        self.update()
+
+
+class MainWindow(QtWidgets.QMainWindow):
+    def __init__(self):
+        super().__init__()
+
+        self.resize(500, 500)
+        self.setWindowTitle('LOD Lines (Wheel to zoom, Left/Right key to pan, Home to reset)')
+
+        self.glWidget = GLWidget(self)
+        self.setCentralWidget(self.glWidget)
+
+
+if __name__ == "__main__":
+    app = QtWidgets.QApplication(sys.argv)
+
+    window = MainWindow()
+    window.show()
+
+    sys.exit(app.exec())
@@ -0,0 +1,247 @@
+"""
+Classes and functions for drawing very long time series as line strips with a level of detail that
+follows the number of pixel columns instead of the number of samples
+"""
+import ctypes
+import timeit
+import numpy as np
+from OpenGL import GL
+
+
+class MinMaxPyramid:
+    """Precomputed minimums and maximums of a signal over blocks of factor, factor^2, ... samples. Each level
+    is computed from the level below with a reshape and an element-wise minimum and maximum, so the pyramid
+    takes about 2 / (factor - 1) times the memory of the signal.
+
+    :param samples: N samples, uniformly spaced
+    :type samples: np.ndarray
+    :param factor: number of blocks of a level combined into a block of the next level
+    :type factor: int
+    """
+    def __init__(self, samples, factor=4):
+        self.samples = np.asarray(samples, np.float32).ravel()
+        self.factor = factor
+        self.levels = []
+        lower = upper = self.samples
+        while len(lower) >= 2 * factor:
+            lower = _combine(lower, factor, np.minimum)
+            upper = _combine(upper, factor, np.maximum)
+            self.levels.append((lower, upper))
+
+    def blockSize(self, level):
+        """Gets the number of samples in a block of a level, level 0 is the samples themselves
+
+        :param level: level of pyramid
+        :type level: int
+        :return: number of samples
+        :rtype: int
+        """
+        return self.factor ** level
+
+    def decimate(self, start, end, columns, out=None):
+        """Decimates a range of samples to a minimum and a maximum per pixel column. Drawn as a line strip going
+        from the minimum to the maximum of each column in turn, they draw the envelope of the signal exactly at
+        that width. The coarsest level with at least two blocks per column is used, so the cost depends on
+        the number of columns rather than on the number of samples in the range. The column edges are rounded
+        to the blocks of that level. Ranges with fewer than two samples per column are returned as they are.
+
+        :param start: index of first sample
+        :type start: int
+        :param end: index after the last sample
+        :type end: int
+        :param columns: number of pixel columns e.g. the width of the widget
+        :type columns: int
+        :param out: at least 2 * columns x 2 float32 array to write the vertices into instead of allocating one
+        :type out: Union[np.ndarray, None]
+        :return: M x 2 vertices of position in samples after start and value, M is at most 2 * columns. The
+                 positions are relative to start as float32 cannot hold the indices of long signals exactly.
+        :rtype: np.ndarray
+        """
+        start = max(int(start), 0)
+        end = min(int(end), len(self.samples))
+        if out is None:
+            out = np.empty((2 * columns, 2), np.float32)
+
+        if end - start <= 2 * columns:
+            count = max(end - start, 0)
+            out[:count, 0] = np.arange(count, dtype=np.float32)
+            out[:count, 1] = self.samples[start:end]
+            return out[:count]
+
+        level, edges = self.columnEdges(start, end, columns)
+        lower, upper = self.levels[level - 1] if level else (self.samples, self.samples)
+        blocks = slice(edges[0], edges[-1])
+        out[0:2 * columns:2, 1] = np.minimum.reduceat(lower[blocks], edges[:-1] - edges[0])
+        out[1:2 * columns:2, 1] = np.maximum.reduceat(upper[blocks], edges[:-1] - edges[0])
+        # Both vertices of a column are at its centre
+        out[0:2 * columns:2, 0] = (edges[:-1] + edges[1:]) * (self.blockSize(level) * 0.5) - start
+        out[1:2 * columns:2, 0] = out[0:2 * columns:2, 0]
+        return out[:2 * columns]
+
+    def columnEdges(self, start, end, columns):
+        """Chooses the coarsest level with at least two blocks per column in a range of samples and splits
+        the blocks covering the range between the columns
+
+        :param start: index of first sample
+        :type start: int
+        :param end: index after the last sample, more than 2 * columns samples after start
+        :type end: int
+        :param columns: number of pixel columns
+        :type columns: int
+        :return: level and columns + 1 increasing block indices of the column edges
+        :rtype: Tuple[int, np.ndarray]
+        """
+        level = 0
+        while level < len(self.levels) and (end - start) // self.blockSize(level + 1) >= 2 * columns:
+            level += 1
+        size = self.blockSize(level)
+        first = start // size
+        last = -(-end // size)
+        # Every column gets at least one block as there are at least two per column
+        return level, first + (np.arange(columns + 1) * (last - first)) // columns
+
+
+def _combine(values, factor, function):
+    """Combines consecutive groups of values
+
+    :param values: N values
+    :type values: np.ndarray
+    :param factor: number of values in a group
+    :type factor: int
+    :param function: element-wise function e.g. np.minimum
+    :type function: np.ufunc
+    :return: ceil(N / factor) values
+    :rtype: np.ndarray
+    """
+    padding = -len(values) % factor
+    if padding:
+        # Repeating the last value does not change the minimum or maximum of the last group
+        values = np.append(values, np.full(padding, values[-1], values.dtype))
+    groups = values.reshape(-1, factor)
+    combined = groups[:, 0].copy()
+    # Combining the columns one at a time is much faster than reducing along the rows
+    for index in range(1, factor):
+        function(combined, groups[:, index], out=combined)
+    return combined
+
+
+class DecimatedLine:
+    """Draws a range of a long signal as a line strip decimated by a MinMaxPyramid. The signal is never sent
+    to the GPU, only the decimated vertices are, and they are only computed and uploaded again when the range
+    or the number of columns changes.
+
+    :param location: attribute location of the vertices, position in samples after the start of the view and value
+    :type location: int
+    :param pyramid: min/max pyramid of the signal
+    :type pyramid: MinMaxPyramid
+    """
+    def __init__(self, location, pyramid):
+        self.pyramid = pyramid
+        self.view = None
+        self.count = 0
+        self.vertices = np.empty((0, 2), np.float32)
+        self.vertex_buffer = GL.glGenBuffers(1)
+        self.vertex_array = GL.glGenVertexArrays(1)
+        GL.glBindVertexArray(self.vertex_array)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+        GL.glEnableVertexAttribArray(location)
+        GL.glVertexAttribPointer(location, 2, GL.GL_FLOAT, GL.GL_FALSE, 0, ctypes.c_void_p(0))
+        GL.glBindVertexArray(0)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+    def setView(self, start, end, columns):
+        """Sets the range of samples drawn across a number of pixel columns
+
+        :param start: index of first sample
+        :type start: int
+        :param end: index after the last sample
+        :type end: int
+        :param columns: number of pixel columns e.g. the width of the widget
+        :type columns: int
+        :return: indicates the vertices were decimated again
+        :rtype: bool
+        """
+        view = (int(start), int(end), int(columns))
+        if view == self.view:
+            return False
+        self.view = view
+
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+        if len(self.vertices) < 2 * columns:
+            # The buffer grows with the widget and keeps its size otherwise
+            self.vertices = np.empty((2 * columns, 2), np.float32)
+            GL.glBufferData(GL.GL_ARRAY_BUFFER, self.vertices.nbytes, None, GL.GL_DYNAMIC_DRAW)
+        vertices = self.pyramid.decimate(start, end, columns, out=self.vertices)
+        self.count = len(vertices)
+        GL.glBufferSubData(GL.GL_ARRAY_BUFFER, 0, vertices.nbytes, vertices)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+        return True
+
+    def draw(self):
+        """Draws the decimated line strip"""
+        GL.glBindVertexArray(self.vertex_array)
+        GL.glDrawArrays(GL.GL_LINE_STRIP, 0, self.count)
+        GL.glBindVertexArray(0)
+
+    def delete(self):
+        """Deletes the buffer and the vertex array object"""
+        GL.glDeleteVertexArrays(1, [self.vertex_array])
+        GL.glDeleteBuffers(1, [self.vertex_buffer])
+
+
+def random_walk(count, seed=0):
+    """Creates a long test signal, a random walk with a slow sine so it has detail at every scale
+
+    :param count: number of samples
+    :type count: int
+    :param seed: seed of random generator
+    :type seed: int
+    :return: count float32 samples
+    :rtype: np.ndarray
+    """
+    generator = np.random.default_rng(seed)
+    samples = generator.standard_normal(count, np.float32)
+    np.cumsum(samples, out=samples)
+    samples *= np.float32(1.0 / np.sqrt(count))
+    samples += np.sin(np.linspace(0.0, 20.0 * np.pi, count, dtype=np.float32))
+    return samples
+
+
+def benchmark_decimation(counts=(1000000, 10000000, 100000000), columns=(1000, 4000), repeat=5):
+    """Measures building the min/max pyramid of signals of increasing length and decimating the whole signal
+    and a tenth of it to pixel columns, the decimated envelope is checked against reducing the samples of each
+    column directly
+
+    :param counts: numbers of samples
+    :type counts: Tuple[int]
+    :param columns: numbers of pixel columns
+    :type columns: Tuple[int]
+    :param repeat: number of timed runs, the best run is reported
+    :type repeat: int
+    """
+    for count in counts:
+        samples = random_walk(count)
+        start = timeit.default_timer()
+        pyramid = MinMaxPyramid(samples)
+        build = timeit.default_timer() - start
+        memory = sum(lower.nbytes + upper.nbytes for lower, upper in pyramid.levels) / samples.nbytes
+        print(f'{count} samples: pyramid {build * 1000:.1f} ms, {memory:.2f} x the memory of the samples')
+
+        for width in columns:
+            for first, last in ((0, count), (count // 3, count // 3 + count // 10)):
+                vertices = pyramid.decimate(first, last, width)
+                level, edges = pyramid.columnEdges(first, last, width)
+                edges = np.minimum(edges * pyramid.blockSize(level), count)
+                columns_samples = samples[edges[0]:edges[-1]]
+                if not (np.array_equal(np.minimum.reduceat(columns_samples, edges[:-1] - edges[0]), vertices[0::2, 1])
+                        and np.array_equal(np.maximum.reduceat(columns_samples, edges[:-1] - edges[0]),
+                                           vertices[1::2, 1])):
+                    raise ValueError(f'Decimation of {first}:{last} does not match the samples')
+                elapsed = min(timeit.repeat(lambda: pyramid.decimate(first, last, width), number=1, repeat=repeat))
+                print(f'{f"{last - first} to {width} columns":>30}: {elapsed * 1000:7.3f} ms, '
+                      f'{len(vertices)} vertices instead of {last - first}')
+        del samples, pyramid
+
+
+if __name__ == "__main__":
+    benchmark_decimation()
@@ -0,0 +1,215 @@
+"""
+Classes and functions for drawing point clouds that grow continuously, in fixed size chunks of GPU memory
+"""
+import ctypes
+import os
+import sys
+import timeit
+import numpy as np
+from OpenGL import GL
+
+
+class PointCloud:
+    """Stores points in a list of fixed size chunks, each with its own Vertex Buffer Object and Vertex Array
+    Object. Appended points are written after the last point with glBufferSubData or through a mapped range,
+    so only the new points are uploaded and the chunks are never reallocated or copied. With max_chunks set
+    the chunks are a ring holding the last max_chunks * chunk_size points: once they are full the oldest
+    points are overwritten by the new ones, a sliding window over the stream.
+
+    :param location: attribute location of the point positions
+    :type location: int
+    :param components: number of components of a position, 2 or 3
+    :type components: int
+    :param chunk_size: number of points in a chunk
+    :type chunk_size: int
+    :param max_chunks: maximum number of chunks before the oldest points are overwritten, None to keep every
+                       point
+    :type max_chunks: Union[int, None]
+    :param upload: 'subdata' to upload with glBufferSubData or 'map' to write into a mapped range of the buffer
+    :type upload: str
+    :raises ValueError: if upload is not 'subdata' or 'map'
+    """
+    def __init__(self, location, components=2, chunk_size=1 << 20, max_chunks=None, upload='subdata'):
+        if upload not in ('subdata', 'map'):
+            raise ValueError(f'Unknown upload method: {upload}')
+        self.location = location
+        self.components = components
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.upload = upload
+        self.stride = components * np.dtype(np.float32).itemsize
+        self.buffers = []
+        self.arrays = []
+        self.counts = []
+        self.chunk = -1
+        self.offset = chunk_size
+        self.total = 0
+
+    @property
+    def capacity(self):
+        """Gets the number of points kept before the oldest are overwritten
+
+        :return: number of points, None if every point is kept
+        :rtype: Union[int, None]
+        """
+        return None if self.max_chunks is None else self.max_chunks * self.chunk_size
+
+    @property
+    def count(self):
+        """Gets the number of points drawn
+
+        :return: number of points
+        :rtype: int
+        """
+        return sum(self.counts)
+
+    def _nextChunk(self):
+        """Moves writing to the start of a new chunk, or of the oldest chunk once the ring is full"""
+        if self.max_chunks is None or len(self.buffers) < self.max_chunks:
+            buffer = GL.glGenBuffers(1)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, buffer)
+            # The storage is allocated once, points are only ever written into it
+            GL.glBufferData(GL.GL_ARRAY_BUFFER, self.chunk_size * self.stride, None, GL.GL_DYNAMIC_DRAW)
+            array = GL.glGenVertexArrays(1)
+            GL.glBindVertexArray(array)
+            GL.glEnableVertexAttribArray(self.location)
+            GL.glVertexAttribPointer(self.location, self.components, GL.GL_FLOAT, GL.GL_FALSE, self.stride,
+                                     ctypes.c_void_p(0))
+            GL.glBindVertexArray(0)
+            self.buffers.append(buffer)
+            self.arrays.append(array)
+            self.counts.append(0)
+            self.chunk = len(self.buffers) - 1
+        else:
+            # The old points after the write position are still drawn until they are overwritten
+            self.chunk = (self.chunk + 1) % len(self.buffers)
+        self.offset = 0
+
+    def append(self, points):
+        """Appends points, they are uploaded straight from the array without building a flattened copy
+
+        :param points: N x components float32 positions, other types or non-contiguous arrays are converted
+        :type points: np.ndarray
+        """
+        points = np.ascontiguousarray(points, np.float32).reshape(-1, self.components)
+        self.total += len(points)
+        if self.capacity is not None and len(points) > self.capacity:
+            # Points older than the window would be overwritten by the same call, the others fill the whole ring
+            points = points[-self.capacity:]
+
+        start = 0
+        while start < len(points):
+            if self.offset == self.chunk_size:
+                self._nextChunk()
+            count = min(self.chunk_size - self.offset, len(points) - start)
+            self._upload(points[start:start + count])
+            self.offset += count
+            self.counts[self.chunk] = max(self.counts[self.chunk], self.offset)
+            start += count
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+    def _upload(self, points):
+        """Writes points at the write position of the current chunk
+
+        :param points: contiguous M x components float32 positions that fit in the chunk
+        :type points: np.ndarray
+        """
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.buffers[self.chunk])
+        if self.upload == 'subdata':
+            GL.glBufferSubData(GL.GL_ARRAY_BUFFER, self.offset * self.stride, points.nbytes, points)
+        else:
+            # Invalidating the range lets the driver hand out memory the GPU is not reading from
+            address = GL.glMapBufferRange(GL.GL_ARRAY_BUFFER, self.offset * self.stride, points.nbytes,
+                                          GL.GL_MAP_WRITE_BIT | GL.GL_MAP_INVALIDATE_RANGE_BIT)
+            ctypes.memmove(address, points.ctypes.data, points.nbytes)
+            GL.glUnmapBuffer(GL.GL_ARRAY_BUFFER)
+
+    def draw(self, primitive=GL.GL_POINTS):
+        """Draws every point, one draw call per chunk
+
+        :param primitive: type of primitive
+        :type primitive: int
+        """
+        for array, count in zip(self.arrays, self.counts):
+            GL.glBindVertexArray(array)
+            GL.glDrawArrays(primitive, 0, count)
+        GL.glBindVertexArray(0)
+
+    def clear(self):
+        """Removes every point, the chunks are kept and written again from the start"""
+        self.counts = [0] * len(self.counts)
+        self.chunk = 0 if self.buffers else -1
+        self.offset = 0 if self.buffers else self.chunk_size
+
+    def delete(self):
+        """Deletes the buffers and vertex array objects of the chunks"""
+        if self.buffers:
+            GL.glDeleteVertexArrays(len(self.arrays), self.arrays)
+            GL.glDeleteBuffers(len(self.buffers), self.buffers)
+        self.buffers = []
+        self.arrays = []
+        self.counts = []
+        self.chunk = -1
+        self.offset = self.chunk_size
+
+
+def _offscreen_context():
+    """Creates the GL context of the benchmarks, headless.py is only imported when a benchmark runs so using
+    the module does not load it
+
+    :return: current offscreen context
+    :rtype: OffscreenContext
+    """
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '1_Windowing'))
+    from headless import OffscreenContext
+    return OffscreenContext()
+
+
+def benchmark_point_cloud(total=10000000, batch=100000, chunk_size=1 << 20):
+    """Compares appending batches of points to a PointCloud with re-uploading the whole cloud with
+    glBufferData on every batch, as the point demo would if it grew. An offscreen GL context is created so no
+    window is shown.
+
+    :param total: number of points appended
+    :type total: int
+    :param batch: number of points in each append
+    :type batch: int
+    :param chunk_size: number of points in a chunk
+    :type chunk_size: int
+    """
+    context = _offscreen_context()
+
+    generator = np.random.default_rng(0)
+    points = generator.uniform(-1.0, 1.0, (total, 2)).astype(np.float32)
+    batches = total // batch
+    print(f'{total} points in batches of {batch}')
+
+    def reupload():
+        buffer = GL.glGenBuffers(1)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, buffer)
+        for index in range(1, batches + 1):
+            cloud = points[:index * batch]
+            GL.glBufferData(GL.GL_ARRAY_BUFFER, cloud.nbytes, cloud, GL.GL_DYNAMIC_DRAW)
+        GL.glFinish()
+        GL.glDeleteBuffers(1, [buffer])
+
+    def append(upload, max_chunks=None):
+        def run():
+            cloud = PointCloud(0, chunk_size=chunk_size, max_chunks=max_chunks, upload=upload)
+            for index in range(batches):
+                cloud.append(points[index * batch:(index + 1) * batch])
+            GL.glFinish()
+            cloud.delete()
+        return run
+
+    for name, run in (('re-upload all', reupload), ('subdata', append('subdata')), ('map', append('map')),
+                      ('ring of 4', append('subdata', 4))):
+        start = timeit.default_timer()
+        run()
+        elapsed = timeit.default_timer() - start
+        print(f'{name:>14}: {elapsed * 1000:8.1f} ms, {elapsed * 1e6 / batches:8.1f} us per append')
+    context.delete()
+
+
+if __name__ == "__main__":
+    benchmark_point_cloud()
@@ -1,9 +1,9 @@
-import ctypes
 import sys
 import numpy as np
 from OpenGL import GL
 import OpenGL.GL.shaders as shaders
 from PyQt6 import QtOpenGLWidgets, QtWidgets
+from mesh import Mesh
 
 
 VERTEX_SHADER = """
@@ -56,18 +56,11 @@ class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
                                        1.0, 1.0, 0.0, 
                                        1.0, 0.0, 1.0], np.float32)
         element_buffer_data = np.array([1, 2, 3, 0, 1, 2, 0, 2, 3, 0, 3, 1], np.uint32)
-        
-        self.vertex_buffer = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
-        GL.glBufferData(GL.GL_ARRAY_BUFFER, vertex_buffer_data.itemsize * len(vertex_buffer_data),  vertex_buffer_data, GL.GL_STATIC_DRAW)
-
-        self.colour_buffer = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.colour_buffer)
-        GL.glBufferData(GL.GL_ARRAY_BUFFER, colour_buffer_data.itemsize * len(colour_buffer_data),  colour_buffer_data, GL.GL_STATIC_DRAW)
 
-        self.element_buffer = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.element_buffer)
-        GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, element_buffer_data.itemsize * len(element_buffer_data), element_buffer_data, GL.GL_STATIC_DRAW)
+        # The attributes are interleaved into a single buffer and the layout is recorded once in the
+        # mesh's Vertex Array Object
+        self.mesh = Mesh([(self.vertex_position_id, vertex_buffer_data, 3), (self.vertex_colour_id, colour_buffer_data, 3)],
+                         element_buffer_data, interleaved=True)
     
     
     def paintGL(self):
@@ -76,26 +69,8 @@ class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
         # Use our shader
         GL.glUseProgram(self.program_id)
 
-        # 1st attribute buffer : vertices
-        GL.glEnableVertexAttribArray(self.vertex_position_id)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
-        GL.glVertexAttribPointer(self.vertex_position_id, # The attribute we want to configure
-                                 3,                     # size
-                                 GL.GL_FLOAT,              # type
-                                 GL.GL_FALSE,              # normalized?
-                                 0,                     # stride
-                                 ctypes.c_void_p(0)     # array buffer offset
-                                )
-        
-        # 2nd attribute buffer : colour
-        GL.glEnableVertexAttribArray(self.vertex_colour_id)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.colour_buffer)
-        GL.glVertexAttribPointer(self.vertex_colour_id, 3, GL.GL_FLOAT, GL.GL_FALSE, 0, ctypes.c_void_p(0))
-                             
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.element_buffer)
-        GL.glDrawElements(GL.GL_TRIANGLES, 12, GL.GL_UNSIGNED_INT, ctypes.c_void_p(0))
-        GL.glDisableVertexAttribArray(self.vertex_position_id)
-        GL.glDisableVertexAttribArray(self.vertex_colour_id)
+        # Binds the mesh's Vertex Array Object and draws the pyramid
+        self.mesh.draw()
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -1,10 +1,10 @@
-import ctypes
 import sys
 import numpy as np
 from OpenGL import GL
 import OpenGL.GL.shaders as shaders
-from PIL import Image
 from PyQt6 import QtOpenGLWidgets, QtWidgets
+from mesh import Mesh
+from texture import TextureManager
 
 
 VERTEX_SHADER = """
@@ -46,23 +46,17 @@ class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
         self.program_id = shaders.compileProgram(shaders.compileShader(VERTEX_SHADER, GL.GL_VERTEX_SHADER),
                                                  shaders.compileShader(FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER))
                
-        self.texture = GL.glGenTextures(1)
-        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
-       
+        # The image is decoded on a worker thread so the window does not stall, the texture holds a
+        # placeholder pixel until the decoded image is uploaded in paintGL. A TextureCache (cache=TextureCache())
+        # would keep the mipmaps for later runs and compress=True would block compress them, see texture.py
+        self.texture_manager = TextureManager()
+        self.texture = self.texture_manager.load("4_3D/bricks.jpg", GL.GL_LINEAR_MIPMAP_LINEAR, GL.GL_LINEAR)
+
         # Set the texture wrapping parameters
+        # GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
         # GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_REPEAT)
         # GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_REPEAT)
 
-        # Set texture filtering parameters
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
-    
-        # load image
-        image = Image.open("4_3D/bricks.jpg")
-        img_data = np.array(list(image.getdata()), np.uint8)
-        GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGB, image.width, image.height, 0, GL.GL_RGB, GL.GL_UNSIGNED_BYTE, img_data)
-        GL.glBindTexture(GL.GL_TEXTURE_2D, GL.GL_FALSE)
-
 
         # Get a handle for our buffers
         self.vertex_position_id = GL.glGetAttribLocation(self.program_id, "position")
@@ -87,22 +81,20 @@ class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
                                    0.0, 0.0, 0.5, 1.0,  0.0, 1.0, 
                                    0.0, 0.0, 0.5, 1.0,  0.0, 1.0], np.float32) 
         element_buffer_data = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11], np.uint32)
-        
-        self.vertex_buffer = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
-        GL.glBufferData(GL.GL_ARRAY_BUFFER, vertex_buffer_data.itemsize * len(vertex_buffer_data),  vertex_buffer_data, GL.GL_STATIC_DRAW)
-
-        self.uv_buffer = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.uv_buffer)
-        GL.glBufferData(GL.GL_ARRAY_BUFFER, uv_buffer_data.itemsize * len(uv_buffer_data),  uv_buffer_data, GL.GL_STATIC_DRAW)
 
-        self.element_buffer = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.element_buffer)
-        GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, element_buffer_data.itemsize * len(element_buffer_data), element_buffer_data, GL.GL_STATIC_DRAW)
+        # The attributes are interleaved into a single buffer and the layout is recorded once in the
+        # mesh's Vertex Array Object
+        self.mesh = Mesh([(self.vertex_position_id, vertex_buffer_data, 3), (self.vertex_uv_id, uv_buffer_data, 2)],
+                         element_buffer_data, interleaved=True)
     
     
     def paintGL(self):
         GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+
+        # Upload textures that have finished decoding and repaint until all have been uploaded
+        self.texture_manager.update()
+        if self.texture_manager.loading:
+            self.update()
         
         # Use our shader
         GL.glUseProgram(self.program_id)
@@ -113,26 +105,8 @@ class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
         # Set our texture sampler to user Texture Unit 0
         GL.glUniform1i(self.texture_id, 0)
 
-        # 1st attribute buffer : vertices
-        GL.glEnableVertexAttribArray(self.vertex_position_id)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
-        GL.glVertexAttribPointer(self.vertex_position_id, # The attribute we want to configure
-                                 3,                     # size
-                                 GL.GL_FLOAT,              # type
-                                 GL.GL_FALSE,              # normalized?
-                                 0,                     # stride
-                                 ctypes.c_void_p(0)     # array buffer offset
-                                )
-        
-        # 2nd attribute buffer : uvs
-        GL.glEnableVertexAttribArray(self.vertex_uv_id)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.uv_buffer)
-        GL.glVertexAttribPointer(self.vertex_uv_id, 2, GL.GL_FLOAT, GL.GL_FALSE, 0, ctypes.c_void_p(0))
-                             
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.element_buffer)
-        GL.glDrawElements(GL.GL_TRIANGLES, 12, GL.GL_UNSIGNED_INT, ctypes.c_void_p(0))
-        GL.glDisableVertexAttribArray(self.vertex_position_id)
-        GL.glDisableVertexAttribArray(self.vertex_uv_id)
+        # Binds the mesh's Vertex Array Object and draws the pyramid
+        self.mesh.draw()
         GL.glBindTexture(GL.GL_TEXTURE_2D, GL.GL_FALSE)
 
 
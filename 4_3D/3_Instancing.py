@@ -0,0 +1,114 @@
+import colorsys
+import sys
+import numpy as np
+from OpenGL import GL
+import OpenGL.GL.shaders as shaders
+from PyQt6 import QtOpenGLWidgets, QtWidgets
+from mesh import InstancedMesh, Mesh, model_batch
+
+COUNT = 100000
+
+
+VERTEX_SHADER = """
+#version 330
+in vec3 position;
+in vec3 vertexColour;
+// Per instance attributes, the model matrix takes 4 attribute locations
+in mat4 model;
+in vec4 instanceColour;
+out vec3 outColour;
+
+void main(){
+  outColour = vertexColour * instanceColour.rgb;
+  gl_Position = model * vec4(position, 1.0);
+}
+"""
+
+
+FRAGMENT_SHADER = """
+#version 330
+
+out vec4 colour;
+in vec3 outColour;
+
+void main(){
+  colour = vec4(outColour, 0);
+}
+"""
+
+class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
+    def __init__(self, parent=None):
+        self.parent = parent
+        super().__init__(parent)
+        self.frame = 0
+
+    def initializeGL(self):
+        GL.glClearColor(0.0, 0.0, 0.4, 0.0)
+        GL.glEnable(GL.GL_DEPTH_TEST)
+
+        # Create and compile our GLSL program from the shaders
+        self.program_id = shaders.compileProgram(shaders.compileShader(VERTEX_SHADER, GL.GL_VERTEX_SHADER),
+                                                 shaders.compileShader(FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER))
+
+        vertex_buffer_data = np.array([-0.0, 0.1, 0.0,
+                                       -0.8, -0.8, 0.8,
+                                       0.8, -0.8, 0.8,
+                                       0.0, 0.8, 0.8], np.float32)
+        colour_buffer_data = np.array([0.0, 0.0, 0.0,
+                                       1.0, 0.0, 0.0,
+                                       1.0, 1.0, 0.0,
+                                       1.0, 0.0, 1.0], np.float32)
+        element_buffer_data = np.array([1, 2, 3, 0, 1, 2, 0, 2, 3, 0, 3, 1], np.uint32)
+        self.mesh = Mesh([(GL.glGetAttribLocation(self.program_id, "position"), vertex_buffer_data, 3),
+                          (GL.glGetAttribLocation(self.program_id, "vertexColour"), colour_buffer_data, 3)],
+                         element_buffer_data, interleaved=True)
+
+        # Every pyramid is an instance of the same mesh, all of them are drawn with one draw call
+        self.instances = InstancedMesh(self.mesh, {'model': GL.glGetAttribLocation(self.program_id, "model"),
+                                                   'colour': GL.glGetAttribLocation(self.program_id, "instanceColour")},
+                                       capacity=COUNT)
+
+        # The pyramids are laid out in a grid and coloured by their distance from the centre
+        side = int(np.ceil(np.sqrt(COUNT)))
+        cells = np.stack(np.unravel_index(np.arange(COUNT), (side, side)), axis=1)
+        self.positions = np.zeros((COUNT, 3), np.float32)
+        self.positions[:, :2] = (cells + 0.5) * (2.0 / side) - 1.0
+        self.scale = 0.9 / side
+        distance = np.linalg.norm(self.positions[:, :2], axis=1)
+        self.colours = np.array([(*colorsys.hsv_to_rgb(hue, 0.7, 1.0), 1.0) for hue in np.linspace(0, 1, 64)],
+                                np.float32)[np.minimum((distance * 45).astype(int), 63)]
+        self.phase = distance * 8.0
+        self.models = np.empty((COUNT, 4, 4), np.float32)
+
+    def paintGL(self):
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+
+        # All the model matrices are computed and uploaded at once every frame
+        self.frame += 1
+        model_batch(self.positions, self.phase + self.frame * 0.05, self.scale, out=self.models)
+        self.instances.setInstances(self.models, self.colours if self.frame == 1 else None)
+
+        # Use our shader
+        GL.glUseProgram(self.program_id)
+        self.instances.draw()
+        self.update()
+
+
+class MainWindow(QtWidgets.QMainWindow):
+    def __init__(self):
+        super().__init__()
+
+        self.resize(500, 500)
+        self.setWindowTitle(f'{COUNT} Pyramids')
+
+        self.glWidget = GLWidget(self)
+        self.setCentralWidget(self.glWidget)
+
+
+if __name__ == "__main__":
+    app = QtWidgets.QApplication(sys.argv)
+
+    window = MainWindow()
+    window.show()
+
+    sys.exit(app.exec())
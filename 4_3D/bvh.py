@@ -0,0 +1,547 @@
+"""
+Classes and functions for bounding volume hierarchies, for picking with rays and finding what is inside
+a region without testing every triangle
+"""
+import timeit
+import numpy as np
+
+eps = 1e-7
+
+
+def morton_codes(points):
+    """Computes 30 bit Morton codes of points, the bits of the x, y and z cells of a 1024 x 1024 x 1024
+    grid over the points are interleaved so sorting by code keeps points that are close together
+
+    :param points: N x 3 points
+    :type points: np.ndarray
+    :return: N codes
+    :rtype: np.ndarray
+    """
+    lower = points.min(axis=0)
+    extent = np.maximum(points.max(axis=0) - lower, eps)
+    cells = np.minimum((points - lower) * (1024 / extent), 1023).astype(np.uint32)
+    # Spreads the 10 bits of each cell two bits apart
+    for shift, mask in ((16, 0x030000FF), (8, 0x0300F00F), (4, 0x030C30C3), (2, 0x09249249)):
+        cells = (cells | (cells << shift)) & mask
+    return (cells[:, 0] << 2) | (cells[:, 1] << 1) | cells[:, 2]
+
+
+def _reduce(values, group, function, fill):
+    """Reduces consecutive groups of rows, the last group may be smaller
+
+    :param values: N x 3 values
+    :type values: np.ndarray
+    :param group: number of rows in a group
+    :type group: int
+    :param function: element-wise function e.g. np.minimum
+    :type function: np.ufunc
+    :param fill: value the last group is padded with, it must not change the reduction
+    :type fill: float
+    :return: ceil(N / group) x 3 reduced values
+    :rtype: np.ndarray
+    """
+    padding = -len(values) % group
+    if padding:
+        values = np.concatenate([values, np.full((padding, 3), fill, values.dtype)])
+    # Combining the rows of each group one at a time is much faster than reducing along the short middle axis
+    values = values.reshape(-1, group, 3)
+    reduced = values[:, 0].copy()
+    for index in range(1, group):
+        function(reduced, values[:, index], out=reduced)
+    return reduced
+
+
+def _slab_test(origins, inverse_directions, t_max, lower, upper):
+    """Tests rays against boxes with the slab method, row i of each array is one test
+
+    :param origins: N x 3 ray origins
+    :type origins: np.ndarray
+    :param inverse_directions: N x 3 reciprocals of the ray directions
+    :type inverse_directions: np.ndarray
+    :param t_max: N maximum ray distances
+    :type t_max: np.ndarray
+    :param lower: N x 3 box minimums
+    :type lower: np.ndarray
+    :param upper: N x 3 box maximums
+    :type upper: np.ndarray
+    :return: N hit mask
+    :rtype: np.ndarray
+    """
+    t1 = (lower - origins) * inverse_directions
+    t2 = (upper - origins) * inverse_directions
+    near = np.minimum(t1, t2)
+    far = np.maximum(t1, t2)
+    # Combining the columns is much faster than reducing along the rows of N x 3 arrays
+    t_near = np.maximum(np.maximum(near[:, 0], near[:, 1]), np.maximum(near[:, 2], 0.0))
+    t_far = np.minimum(np.minimum(far[:, 0], far[:, 1]), np.minimum(far[:, 2], t_max))
+    return t_near <= t_far
+
+
+def _dot(a, b):
+    """Computes the dot product of each row
+
+    :param a: N x 3 vectors
+    :type a: np.ndarray
+    :param b: N x 3 vectors
+    :type b: np.ndarray
+    :return: N dot products
+    :rtype: np.ndarray
+    """
+    return a[:, 0] * b[:, 0] + a[:, 1] * b[:, 1] + a[:, 2] * b[:, 2]
+
+
+def _cross(a, b):
+    """Computes the cross product of each row, np.cross is several times slower on small arrays
+
+    :param a: N x 3 vectors
+    :type a: np.ndarray
+    :param b: N x 3 vectors
+    :type b: np.ndarray
+    :return: N x 3 cross products
+    :rtype: np.ndarray
+    """
+    return np.stack([a[:, 1] * b[:, 2] - a[:, 2] * b[:, 1],
+                     a[:, 2] * b[:, 0] - a[:, 0] * b[:, 2],
+                     a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]], axis=1)
+
+
+def _prepare_rays(origins, directions, t_max):
+    """Converts rays to float32 arrays with the reciprocals of the directions, zero direction components
+    are replaced by a tiny value so the slab test has no division by zero
+
+    :return: origins, directions, inverse directions and maximum distances
+    :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+    """
+    origins = np.asarray(origins, np.float32).reshape(-1, 3)
+    directions = np.asarray(directions, np.float32).reshape(-1, 3)
+    safe = np.where(np.abs(directions) < 1e-30, np.copysign(np.float32(1e-30), directions), directions)
+    t_max = np.broadcast_to(np.asarray(t_max, np.float32), (len(origins),))
+    return origins, directions, 1.0 / safe, t_max
+
+
+def _nearest(count, rays, distances, ids):
+    """Keeps the nearest hit of each ray among candidate hits
+
+    :param count: number of rays
+    :type count: int
+    :param rays: M ray indices of the candidates
+    :type rays: np.ndarray
+    :param distances: M distances, inf for candidates that are missed
+    :type distances: np.ndarray
+    :param ids: M x K identifiers of what each candidate hit
+    :type ids: np.ndarray
+    :return: N distances (inf for rays that hit nothing) and N x K identifiers (-1 for rays that hit nothing)
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    nearest = np.full(count, np.inf, np.float32)
+    np.minimum.at(nearest, rays, distances)
+    hits = np.full((count, ids.shape[1]), -1, np.int64)
+    found = np.isfinite(distances) & (distances == nearest[rays])
+    hits[rays[found]] = ids[found]
+    return nearest, hits
+
+
+class BVH:
+    """Bounding volume hierarchy over the bounding boxes of primitives. The primitives are sorted by the
+    Morton code of their centres and the tree is built over this order: the leaves hold leaf_size
+    consecutive primitives and each node above holds branching consecutive nodes of the level below, which
+    splits every node at the median of the Morton curve. Building therefore needs one sort and the node
+    bounds are computed a level at a time with array reductions, the same way refit recomputes them.
+
+    The nodes are stored in arrays with the root first and the leaves last, node i of a level has the
+    nodes i * branching to i * branching + branching - 1 of the next level as children so no child
+    indices are stored. Queries walk the tree a level at a time for every query at once.
+
+    :param lower: N x 3 minimums of the primitive boxes
+    :type lower: np.ndarray
+    :param upper: N x 3 maximums of the primitive boxes
+    :type upper: np.ndarray
+    :param leaf_size: number of primitives in a leaf
+    :type leaf_size: int
+    :param branching: number of children of a node
+    :type branching: int
+    """
+    def __init__(self, lower, upper, leaf_size=8, branching=8):
+        lower = np.asarray(lower, np.float32).reshape(-1, 3)
+        upper = np.asarray(upper, np.float32).reshape(-1, 3)
+        self.count = len(lower)
+        self.leaf_size = leaf_size
+        self.branching = branching
+        self.order = np.argsort(morton_codes((lower + upper) * 0.5), kind='stable')
+
+        sizes = [-(-self.count // leaf_size)]
+        while sizes[-1] > 1:
+            sizes.append(-(-sizes[-1] // branching))
+        self.sizes = sizes[::-1]
+        self.offsets = np.concatenate([[0], np.cumsum(self.sizes)])
+        self.lower = np.empty((self.offsets[-1], 3), np.float32)
+        self.upper = np.empty((self.offsets[-1], 3), np.float32)
+        self._fit(lower[self.order], upper[self.order])
+
+    @property
+    def bounds(self):
+        """Gets the box around every primitive
+
+        :return: minimum and maximum
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        return self.lower[0], self.upper[0]
+
+    def _fit(self, lower, upper):
+        """Keeps the primitive boxes and computes the node bounds from them, bottom up
+
+        :param lower: N x 3 minimums of the primitive boxes in tree order
+        :type lower: np.ndarray
+        :param upper: N x 3 maximums of the primitive boxes in tree order
+        :type upper: np.ndarray
+        """
+        self.primitive_lower = lower
+        self.primitive_upper = upper
+        group = self.leaf_size
+        for level in range(len(self.sizes) - 1, -1, -1):
+            start, end = self.offsets[level], self.offsets[level + 1]
+            self.lower[start:end] = lower = _reduce(lower, group, np.minimum, np.inf)
+            self.upper[start:end] = upper = _reduce(upper, group, np.maximum, -np.inf)
+            group = self.branching
+
+    def refit(self, lower, upper):
+        """Recomputes the node bounds after the primitives moved, the tree keeps the order it was built with
+        so it gets looser if the primitives move far, a new BVH is better then
+
+        :param lower: N x 3 minimums of the primitive boxes
+        :type lower: np.ndarray
+        :param upper: N x 3 maximums of the primitive boxes
+        :type upper: np.ndarray
+        """
+        self._fit(np.asarray(lower, np.float32).reshape(-1, 3)[self.order],
+                  np.asarray(upper, np.float32).reshape(-1, 3)[self.order])
+
+    def _traverse(self, count, test):
+        """Walks the tree a level at a time for several queries
+
+        :param count: number of queries
+        :type count: int
+        :param test: function of query indices and node indices (into lower and upper) returning whether
+                     each query overlaps each node
+        :type test: Callable[[np.ndarray, np.ndarray], np.ndarray]
+        :return: query indices and primitive indices in tree order of the primitives in the leaves the queries
+                 overlap
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        queries = np.arange(count)
+        nodes = np.zeros(count, np.int64)
+        for level in range(len(self.sizes)):
+            overlapping = test(queries, nodes + self.offsets[level])
+            queries, nodes = queries[overlapping], nodes[overlapping]
+            last = level == len(self.sizes) - 1
+            group = self.leaf_size if last else self.branching
+            children = nodes[:, None] * group + np.arange(group)
+            valid = children < (self.count if last else self.sizes[level + 1])
+            queries = np.repeat(queries, group)[valid.ravel()]
+            nodes = children[valid]
+        return queries, nodes
+
+    def candidates(self, origins, directions, t_max=np.inf):
+        """Finds the primitives whose leaves the rays pass through, p = origin + t * direction for t from 0
+        to t_max
+
+        :param origins: N x 3 ray origins
+        :type origins: np.ndarray
+        :param directions: N x 3 ray directions
+        :type directions: np.ndarray
+        :param t_max: maximum distance along the rays, one per ray or one for all
+        :type t_max: Union[float, np.ndarray]
+        :return: ray indices and primitive indices, one pair per candidate
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        origins, _, inverse_directions, t_max = _prepare_rays(origins, directions, t_max)
+        rays, primitives = self._traverse(len(origins), lambda rays, nodes: _slab_test(
+            origins[rays], inverse_directions[rays], t_max[rays], self.lower[nodes], self.upper[nodes]))
+        return rays, self.order[primitives]
+
+    def queryBox(self, lower, upper):
+        """Finds the primitives whose boxes overlap a box e.g. for selecting with a region
+
+        :param lower: minimum of box
+        :type lower: np.ndarray
+        :param upper: maximum of box
+        :type upper: np.ndarray
+        :return: primitive indices
+        :rtype: np.ndarray
+        """
+        lower = np.asarray(lower, np.float32).reshape(1, 3)
+        upper = np.asarray(upper, np.float32).reshape(1, 3)
+        _, nodes = self._traverse(1, lambda queries, nodes: ((self.lower[nodes] <= upper) &
+                                                             (self.upper[nodes] >= lower)).all(axis=1))
+        # The leaves overlap the box but their primitives may not
+        overlapping = ((self.primitive_lower[nodes] <= upper) & (self.primitive_upper[nodes] >= lower)).all(axis=1)
+        return np.sort(self.order[nodes[overlapping]])
+
+
+class TriangleBVH(BVH):
+    """Bounding volume hierarchy over the triangles of a mesh given by its vertex and element arrays, as used
+    for the Vertex Buffer and Element Buffer Objects
+
+    :param vertices: V x 3 (or flat) vertex positions
+    :type vertices: np.ndarray
+    :param elements: T x 3 (or flat) vertex indices of the triangles, None if every 3 vertices are a triangle
+    :type elements: Union[np.ndarray, None]
+    :param leaf_size: number of triangles in a leaf
+    :type leaf_size: int
+    :param branching: number of children of a node
+    :type branching: int
+    """
+    def __init__(self, vertices, elements=None, leaf_size=8, branching=8):
+        vertices = np.asarray(vertices, np.float32).reshape(-1, 3)
+        if elements is None:
+            elements = np.arange(len(vertices) - len(vertices) % 3)
+        self.elements = np.asarray(elements, np.int64).reshape(-1, 3)
+        corners = [vertices[self.elements[:, corner]] for corner in range(3)]
+        super().__init__(np.minimum(np.minimum(corners[0], corners[1]), corners[2]),
+                         np.maximum(np.maximum(corners[0], corners[1]), corners[2]), leaf_size, branching)
+        self.tree_elements = self.elements[self.order]
+        self._setTriangles(vertices)
+
+    def _setTriangles(self, vertices):
+        """Keeps the first vertex and the edges of the triangles in tree order for the intersection test
+
+        :param vertices: V x 3 vertex positions
+        :type vertices: np.ndarray
+        :return: the three corners of the triangles in tree order
+        :rtype: List[np.ndarray]
+        """
+        corners = [vertices[self.tree_elements[:, corner]] for corner in range(3)]
+        self.v0 = corners[0]
+        self.edge1 = corners[1] - corners[0]
+        self.edge2 = corners[2] - corners[0]
+        return corners
+
+    def refit(self, vertices):
+        """Recomputes the bounds after the vertices moved e.g. for an animated mesh, see BVH.refit
+
+        :param vertices: V x 3 (or flat) vertex positions
+        :type vertices: np.ndarray
+        """
+        corners = self._setTriangles(np.asarray(vertices, np.float32).reshape(-1, 3))
+        self._fit(np.minimum(np.minimum(corners[0], corners[1]), corners[2]),
+                  np.maximum(np.maximum(corners[0], corners[1]), corners[2]))
+
+    def intersect(self, origins, directions, t_max=np.inf):
+        """Finds the nearest triangle hit by each ray with the Moller-Trumbore test, only the triangles in the
+        leaves a ray passes through are tested
+
+        :param origins: N x 3 ray origins
+        :type origins: np.ndarray
+        :param directions: N x 3 ray directions, they need not be unit length
+        :type directions: np.ndarray
+        :param t_max: maximum distance along the rays in multiples of the direction
+        :type t_max: Union[float, np.ndarray]
+        :return: N distances along the rays (inf if nothing is hit) and N triangle indices (-1 if nothing is hit)
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        origins, directions, inverse_directions, t_max = _prepare_rays(origins, directions, t_max)
+        rays, ranks = self._traverse(len(origins), lambda rays, nodes: _slab_test(
+            origins[rays], inverse_directions[rays], t_max[rays], self.lower[nodes], self.upper[nodes]))
+
+        direction = directions[rays]
+        edge1, edge2 = self.edge1[ranks], self.edge2[ranks]
+        p = _cross(direction, edge2)
+        determinant = _dot(edge1, p)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inverse_determinant = 1.0 / determinant
+            s = origins[rays] - self.v0[ranks]
+            u = _dot(s, p) * inverse_determinant
+            q = _cross(s, edge1)
+            v = _dot(direction, q) * inverse_determinant
+            t = _dot(edge2, q) * inverse_determinant
+            # Degenerate triangles have infinite or NaN coordinates, they fail the tests without a warning
+            hit = (np.abs(determinant) > eps) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0) & (t <= t_max[rays])
+        distances, triangles = _nearest(len(origins), rays, np.where(hit, t, np.inf), self.order[ranks, None])
+        return distances, triangles[:, 0]
+
+
+class InstanceBVH(BVH):
+    """Bounding volume hierarchy over the instances of a mesh, each with a model matrix as drawn with an
+    InstancedMesh. The boxes of the instances are the box of the mesh's TriangleBVH transformed by their
+    model matrices, rays that reach an instance's box are moved into its model space and tested against the
+    mesh's BVH, so moving instances only needs the top level to be refitted.
+
+    :param mesh: BVH of the mesh in model space
+    :type mesh: TriangleBVH
+    :param models: N x 4 x 4 model matrices in row-major order e.g. from model_batch
+    :type models: np.ndarray
+    :param leaf_size: number of instances in a leaf
+    :type leaf_size: int
+    :param branching: number of children of a node
+    :type branching: int
+    """
+    def __init__(self, mesh, models, leaf_size=4, branching=8):
+        self.mesh = mesh
+        self.models = np.asarray(models, np.float32).reshape(-1, 4, 4)
+        self.inverses = np.linalg.inv(self.models)
+        lower, upper = self._instanceBounds()
+        super().__init__(lower, upper, leaf_size, branching)
+
+    def _instanceBounds(self):
+        """Transforms the box of the mesh by the model matrices, the transformed box is centred on the
+        transformed centre and its extent along each axis is the extent projected with the absolute matrix
+
+        :return: N x 3 minimums and maximums
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        lower, upper = self.mesh.bounds
+        centres = self.models[:, :3, :3] @ ((lower + upper) * 0.5) + self.models[:, :3, 3]
+        extents = np.abs(self.models[:, :3, :3]) @ ((upper - lower) * 0.5)
+        return centres - extents, centres + extents
+
+    def setModels(self, models):
+        """Replaces the model matrices and refits the instance boxes, the mesh's BVH is unchanged
+
+        :param models: N x 4 x 4 model matrices in row-major order
+        :type models: np.ndarray
+        """
+        self.models = np.asarray(models, np.float32).reshape(-1, 4, 4)
+        self.inverses = np.linalg.inv(self.models)
+        self.refit(*self._instanceBounds())
+
+    def intersect(self, origins, directions, t_max=np.inf):
+        """Finds the nearest instance and triangle hit by each ray
+
+        :param origins: N x 3 ray origins
+        :type origins: np.ndarray
+        :param directions: N x 3 ray directions, they need not be unit length
+        :type directions: np.ndarray
+        :param t_max: maximum distance along the rays in multiples of the direction
+        :type t_max: Union[float, np.ndarray]
+        :return: N distances (inf if nothing is hit), N instance indices and N triangle indices (-1 if nothing
+                 is hit)
+        :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray]
+        """
+        origins, directions, _, t_max = _prepare_rays(origins, directions, t_max)
+        rays, instances = self.candidates(origins, directions, t_max)
+        # The model matrices are affine so distances along the moved rays are the same as along the rays
+        inverses = self.inverses[instances]
+        local_origins = (inverses[:, :3, :3] @ origins[rays, :, None])[:, :, 0] + inverses[:, :3, 3]
+        local_directions = (inverses[:, :3, :3] @ directions[rays, :, None])[:, :, 0]
+        distances, triangles = self.mesh.intersect(local_origins, local_directions, t_max[rays])
+        distances, hits = _nearest(len(origins), rays, distances, np.stack([instances, triangles], axis=1))
+        return distances, hits[:, 0], hits[:, 1]
+
+
+def grid_mesh(side, height=0.1):
+    """Creates a bumpy square of side x side quads, two triangles each, for testing large meshes
+
+    :param side: number of quads along a side
+    :type side: int
+    :param height: height of the bumps
+    :type height: float
+    :return: (side + 1)^2 x 3 vertices and 2 * side^2 x 3 elements
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    x, z = np.meshgrid(np.linspace(-1, 1, side + 1, dtype=np.float32), np.linspace(-1, 1, side + 1, dtype=np.float32))
+    y = height * np.sin(x * 20) * np.cos(z * 20)
+    vertices = np.stack([x, y, z], axis=-1).reshape(-1, 3)
+    corners = (np.arange(side)[:, None] * (side + 1) + np.arange(side)).ravel()
+    elements = np.stack([corners, corners + side + 1, corners + 1,
+                         corners + 1, corners + side + 1, corners + side + 2], axis=1).reshape(-1, 3)
+    return vertices, elements.astype(np.uint32)
+
+
+def intersect_brute_force(vertices, elements, origin, direction):
+    """Finds the nearest triangle hit by one ray by testing every triangle, for comparison with TriangleBVH
+
+    :return: distance (inf if nothing is hit) and triangle index (-1 if nothing is hit)
+    :rtype: Tuple[float, int]
+    """
+    triangles = np.asarray(vertices, np.float32).reshape(-1, 3)[np.asarray(elements).reshape(-1, 3)]
+    count = len(triangles)
+    edge1 = triangles[:, 1] - triangles[:, 0]
+    edge2 = triangles[:, 2] - triangles[:, 0]
+    direction = np.broadcast_to(np.asarray(direction, np.float32), (count, 3))
+    p = _cross(direction, edge2)
+    determinant = _dot(edge1, p)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.asarray(origin, np.float32) - triangles[:, 0]
+        u = _dot(s, p) / determinant
+        q = _cross(s, edge1)
+        v = _dot(direction, q) / determinant
+        t = _dot(edge2, q) / determinant
+        t = np.where((np.abs(determinant) > eps) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0), t, np.inf)
+    index = int(t.argmin())
+    return (float(t[index]), index) if np.isfinite(t[index]) else (np.inf, -1)
+
+
+def benchmark_bvh(side=1000, rays=1000, repeat=5):
+    """Measures building and refitting a TriangleBVH over a grid mesh of 2 * side^2 triangles, the latency of
+    picking with one ray against testing every triangle and the throughput of a batch of rays
+
+    :param side: number of quads along a side of the grid mesh
+    :type side: int
+    :param rays: number of rays in the batch
+    :type rays: int
+    :param repeat: number of timed runs, the best run is reported
+    :type repeat: int
+    """
+    vertices, elements = grid_mesh(side)
+    print(f'{len(elements)} triangles, best of {repeat} runs')
+
+    start = timeit.default_timer()
+    bvh = TriangleBVH(vertices, elements)
+    print(f'{"build":>20}: {(timeit.default_timer() - start) * 1000:8.1f} ms, {len(bvh.lower)} nodes')
+    moved = vertices * np.float32(1.01)
+    refit_time = min(timeit.repeat(lambda: bvh.refit(moved), number=1, repeat=repeat))
+    print(f'{"refit":>20}: {refit_time * 1000:8.1f} ms')
+    bvh.refit(vertices)
+
+    generator = np.random.default_rng(0)
+    origins = np.column_stack([generator.uniform(-1, 1, rays), np.ones(rays), generator.uniform(-1, 1, rays)])
+    directions = np.column_stack([generator.uniform(-0.5, 0.5, rays), -np.ones(rays),
+                                  generator.uniform(-0.5, 0.5, rays)])
+
+    distances, triangles = bvh.intersect(origins[:10], directions[:10])
+    for index in range(10):
+        expected = intersect_brute_force(vertices, elements, origins[index], directions[index])
+        if expected[1] != triangles[index] and not np.isclose(expected[0], distances[index]):
+            raise ValueError(f'Ray {index} hits {triangles[index]} instead of {expected[1]}')
+
+    brute_force_time = min(timeit.repeat(lambda: intersect_brute_force(vertices, elements, origins[0],
+                                                                       directions[0]), number=1, repeat=repeat))
+    pick_times = [min(timeit.repeat(lambda: bvh.intersect(origins[index], directions[index]), number=1,
+                                    repeat=repeat)) for index in range(100)]
+    batch_time = min(timeit.repeat(lambda: bvh.intersect(origins, directions), number=1, repeat=repeat))
+    print(f'{"1 ray, brute force":>20}: {brute_force_time * 1000:8.1f} ms')
+    print(f'{"1 ray, BVH":>20}: {np.median(pick_times) * 1000:8.3f} ms median, {max(pick_times) * 1000:.3f} ms '
+          f'worst of 100 rays')
+    print(f'{f"{rays} rays, BVH":>20}: {batch_time * 1000:8.1f} ms, {batch_time * 1e6 / rays:.1f} us per ray')
+
+
+def benchmark_instances(count=10000, repeat=5):
+    """Measures refitting an InstanceBVH after every instance moved and picking one instance with a ray
+
+    :param count: number of instances
+    :type count: int
+    :param repeat: number of timed runs, the best run is reported
+    :type repeat: int
+    """
+    from mesh import model_batch
+
+    vertices, elements = grid_mesh(32)
+    mesh = TriangleBVH(vertices, elements)
+    generator = np.random.default_rng(0)
+    positions = generator.uniform(-100, 100, (count, 3)).astype(np.float32)
+    angles = generator.uniform(0, 2 * np.pi, count).astype(np.float32)
+    instances = InstanceBVH(mesh, model_batch(positions, angles))
+    moved = model_batch(positions + 1.0, angles + 0.1)
+
+    refit_time = min(timeit.repeat(lambda: instances.setModels(moved), number=1, repeat=repeat))
+    target = positions[0] + 1.0
+    origin = target + np.float32([0.0, 10.0, 0.0])
+    pick_time = min(timeit.repeat(lambda: instances.intersect(origin, target - origin), number=1, repeat=repeat))
+    _, instance, _ = instances.intersect(origin, target - origin)
+    print(f'{count} instances of {len(elements)} triangles: refit {refit_time * 1000:.2f} ms, '
+          f'pick {pick_time * 1000:.3f} ms (instance {instance[0]})')
+
+
+if __name__ == "__main__":
+    benchmark_bvh()
+    benchmark_instances()
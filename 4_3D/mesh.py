@@ -0,0 +1,553 @@
+"""
+Classes for meshes drawn with a Vertex Array Object, once or as many instances
+"""
+import ctypes
+import os
+import sys
+import timeit
+import numpy as np
+from OpenGL import GL
+
+
+def interleave(attributes):
+    """Packs named vertex attributes into one interleaved structured array. Each field of the array
+    holds one attribute so the stride is the item size of the array and the offset of an attribute is
+    the offset of its field.
+
+    :param attributes: dictionary of attribute name to (data, number of components)
+    :type attributes: Dict[str, Tuple[np.ndarray, int]]
+    :return: structured array with a float32 field for each attribute
+    :rtype: np.ndarray
+    """
+    count = None
+    fields = []
+    for name, (data, size) in attributes.items():
+        data = np.asarray(data, np.float32).reshape(-1, size)
+        if count is not None and len(data) != count:
+            raise ValueError(f'Attribute "{name}" has {len(data)} vertices but {count} are expected')
+        count = len(data)
+        fields.append((name, data))
+
+    vertices = np.empty(count, np.dtype([(name, np.float32, (data.shape[1],)) for name, data in fields]))
+    for name, data in fields:
+        vertices[name] = data
+
+    return vertices
+
+
+class Mesh:
+    """Uploads the vertex attributes and indices of a mesh into buffers and records the attribute
+    layout once in a Vertex Array Object (VAO), so drawing the mesh only needs to bind the VAO
+    and issue the draw call. The attributes are uploaded into a buffer each, or packed into a single
+    interleaved buffer for better vertex fetch locality. A GL context must be current when the mesh
+    is created.
+
+    :param attributes: list of (attribute location, data, number of components) for each vertex attribute
+    :type attributes: List[Tuple[int, np.ndarray, int]]
+    :param indices: element indices or None to draw the vertices in order
+    :type indices: Union[np.ndarray, None]
+    :param primitive: primitive type to draw e.g. GL_TRIANGLES
+    :type primitive: int
+    :param usage: buffer usage hint e.g. GL_STATIC_DRAW
+    :type usage: int
+    :param interleaved: indicates the attributes should be packed into a single buffer
+    :type interleaved: bool
+    """
+    def __init__(self, attributes, indices=None, primitive=GL.GL_TRIANGLES, usage=GL.GL_STATIC_DRAW,
+                 interleaved=False):
+        # Field names are only used to find the attribute locations when building the layout
+        names = [f'attribute_{index}' for index in range(len(attributes))]
+        locations = {name: location for name, (location, _, _) in zip(names, attributes)}
+        if interleaved:
+            vertex_arrays = [interleave({name: (data, size) for name, (_, data, size) in zip(names, attributes)})]
+        else:
+            vertex_arrays = [interleave({name: (data, size)}) for name, (_, data, size) in zip(names, attributes)]
+
+        self._create(vertex_arrays, locations, indices, primitive, usage)
+
+    @classmethod
+    def fromVertices(cls, vertices, locations, indices=None, primitive=GL.GL_TRIANGLES, usage=GL.GL_STATIC_DRAW):
+        """Creates a mesh from an interleaved structured array e.g. from the interleave function
+
+        :param vertices: structured array with a float32 field for each attribute
+        :type vertices: np.ndarray
+        :param locations: dictionary of field name to attribute location
+        :type locations: Dict[str, int]
+        :param indices: element indices or None to draw the vertices in order
+        :type indices: Union[np.ndarray, None]
+        :param primitive: primitive type to draw e.g. GL_TRIANGLES
+        :type primitive: int
+        :param usage: buffer usage hint e.g. GL_STATIC_DRAW
+        :type usage: int
+        :return: mesh
+        :rtype: Mesh
+        """
+        mesh = cls.__new__(cls)
+        mesh._create([vertices], locations, indices, primitive, usage)
+        return mesh
+
+    def _create(self, vertex_arrays, locations, indices, primitive, usage):
+        """Creates the VAO, vertex buffers and element buffer of the mesh
+
+        :param vertex_arrays: structured arrays to upload into a buffer each
+        :type vertex_arrays: List[np.ndarray]
+        :param locations: dictionary of field name to attribute location
+        :type locations: Dict[str, int]
+        :param indices: element indices or None to draw the vertices in order
+        :type indices: Union[np.ndarray, None]
+        :param primitive: primitive type to draw e.g. GL_TRIANGLES
+        :type primitive: int
+        :param usage: buffer usage hint e.g. GL_STATIC_DRAW
+        :type usage: int
+        """
+        self.primitive = primitive
+        self.usage = usage
+        self.vertex_buffers = []
+        self.element_buffer = None
+        self.vertex_count = 0
+
+        self.vao = GL.glGenVertexArrays(1)
+        GL.glBindVertexArray(self.vao)
+
+        for vertices in vertex_arrays:
+            self._addVertexBuffer(vertices, locations)
+
+        self.count = self.vertex_count
+        if indices is not None:
+            indices = np.ascontiguousarray(indices, np.uint32)
+            self.count = indices.size
+            self.element_buffer = GL.glGenBuffers(1)
+            # The element buffer binding is recorded in the VAO
+            GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.element_buffer)
+            GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, usage)
+
+        GL.glBindVertexArray(0)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def _addVertexBuffer(self, vertices, locations):
+        """Uploads a structured array into a new buffer and sets the attribute pointer of each field,
+        the VAO must be bound.
+
+        :param vertices: structured array with a float32 field for each attribute
+        :type vertices: np.ndarray
+        :param locations: dictionary of field name to attribute location
+        :type locations: Dict[str, int]
+        """
+        vertices = np.ascontiguousarray(vertices)
+        self.vertex_count = len(vertices)
+
+        buffer = GL.glGenBuffers(1)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, buffer)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, vertices.nbytes, vertices, self.usage)
+        self.vertex_buffers.append(buffer)
+
+        stride = vertices.dtype.itemsize
+        for name in vertices.dtype.names:
+            location = locations[name]
+            # Attributes that are not used by the shader have location -1
+            if location == -1:
+                continue
+            field_type, offset = vertices.dtype.fields[name][:2]
+            GL.glEnableVertexAttribArray(location)
+            GL.glVertexAttribPointer(location, field_type.shape[0], GL.GL_FLOAT, GL.GL_FALSE, stride,
+                                     ctypes.c_void_p(offset))
+
+    def updateVertices(self, vertices, offset=0, index=0):
+        """Replaces vertices in a vertex buffer of the mesh without reallocating the buffer, so the
+        vertices must fit in the existing buffer. Only the replaced range is uploaded.
+
+        :param vertices: structured array with the same fields as the vertex buffer
+        :type vertices: np.ndarray
+        :param offset: index of the first vertex to replace
+        :type offset: int
+        :param index: index of the vertex buffer, meshes that are not interleaved have a buffer per attribute
+        :type index: int
+        """
+        vertices = np.ascontiguousarray(vertices)
+        if offset + len(vertices) > self.vertex_count:
+            raise ValueError(f'{offset + len(vertices)} vertices do not fit in a buffer of {self.vertex_count}')
+
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffers[index])
+        GL.glBufferSubData(GL.GL_ARRAY_BUFFER, offset * vertices.dtype.itemsize, vertices.nbytes, vertices)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+    def draw(self):
+        """Draws the mesh with the current shader program. The VAO is left bound so buffers should
+        not be bound to GL_ELEMENT_ARRAY_BUFFER afterwards without binding another VAO"""
+        GL.glBindVertexArray(self.vao)
+        if self.element_buffer is None:
+            GL.glDrawArrays(self.primitive, 0, self.count)
+        else:
+            GL.glDrawElements(self.primitive, self.count, GL.GL_UNSIGNED_INT, ctypes.c_void_p(0))
+
+    def delete(self):
+        """Deletes the VAO and buffers of the mesh, a GL context must be current"""
+        GL.glDeleteVertexArrays(1, [self.vao])
+        buffers = self.vertex_buffers if self.element_buffer is None else [*self.vertex_buffers, self.element_buffer]
+        GL.glDeleteBuffers(len(buffers), buffers)
+        self.vertex_buffers = []
+        self.element_buffer = None
+
+
+def model_batch(positions, angles=0.0, scales=1.0, out=None):
+    """Computes the model matrices of many instances at once, each is a uniform scale followed by a
+    rotation about the y axis and a translation
+
+    :param positions: N x 3 positions
+    :type positions: np.ndarray
+    :param angles: rotation about y in radians, one per instance or a single angle for all
+    :type angles: Union[float, np.ndarray]
+    :param scales: scale factor, one per instance or a single factor for all
+    :type scales: Union[float, np.ndarray]
+    :param out: N x 4 x 4 float32 array to write the matrices into instead of allocating one
+    :type out: Union[np.ndarray, None]
+    :return: N x 4 x 4 model matrices in row-major order
+    :rtype: np.ndarray
+    """
+    positions = np.asarray(positions, np.float32).reshape(-1, 3)
+    count = len(positions)
+    if out is None:
+        out = np.zeros((count, 4, 4), np.float32)
+    else:
+        out[:] = 0.0
+    angles = np.broadcast_to(np.asarray(angles, np.float32), (count,))
+    scales = np.broadcast_to(np.asarray(scales, np.float32), (count,))
+    cos = np.cos(angles) * scales
+    sin = np.sin(angles) * scales
+    out[:, 0, 0] = cos
+    out[:, 0, 2] = sin
+    out[:, 1, 1] = scales
+    out[:, 2, 0] = -sin
+    out[:, 2, 2] = cos
+    out[:, :3, 3] = positions
+    out[:, 3, 3] = 1.0
+    return out
+
+
+# Per instance model matrix (stored column-major as GLSL expects) and colour
+INSTANCE_TYPE = np.dtype([('model', np.float32, (4, 4)), ('colour', np.float32, (4,))])
+
+
+class InstancedMesh:
+    """Draws many copies of a mesh with a single glDrawElementsInstanced (or glDrawArraysInstanced) call. The
+    model matrix and colour of each instance are held in an instance buffer whose attributes advance once
+    per instance (divisor 1), the attribute layout is recorded in the mesh's VAO. In the shader the model
+    matrix is a mat4 attribute, which takes 4 consecutive locations, and the colour a vec4 attribute.
+
+    Instances are set in bulk from numpy arrays so moving every instance is one array operation and one
+    upload, not a Python loop of uniform uploads and draw calls. A GL context must be current.
+
+    :param mesh: mesh to draw, its VAO is shared so drawing the mesh alone uses the first instance attributes
+    :type mesh: Mesh
+    :param locations: attribute locations of the model matrix and colour e.g. {'model': 2, 'colour': 6}
+    :type locations: Dict[str, int]
+    :param capacity: initial number of instances the instance buffer holds
+    :type capacity: int
+    :param usage: buffer usage hint of the instance buffer
+    :type usage: int
+    """
+    def __init__(self, mesh, locations, capacity=1024, usage=GL.GL_DYNAMIC_DRAW):
+        self.mesh = mesh
+        self.usage = usage
+        self.instances = np.zeros(capacity, INSTANCE_TYPE)
+        self.instances['model'] = np.eye(4, dtype=np.float32)
+        self.instances['colour'] = 1.0
+        self.count = 0
+
+        self.instance_buffer = GL.glGenBuffers(1)
+        GL.glBindVertexArray(mesh.vao)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.instance_buffer)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, self.instances.nbytes, self.instances, usage)
+        stride = INSTANCE_TYPE.itemsize
+        for name, columns in (('model', 4), ('colour', 1)):
+            location = locations.get(name, -1)
+            # Attributes that are not used by the shader have location -1
+            if location == -1:
+                continue
+            offset = INSTANCE_TYPE.fields[name][1]
+            for column in range(columns):
+                GL.glEnableVertexAttribArray(location + column)
+                GL.glVertexAttribPointer(location + column, 4, GL.GL_FLOAT, GL.GL_FALSE, stride,
+                                         ctypes.c_void_p(offset + column * 16))
+                GL.glVertexAttribDivisor(location + column, 1)
+        GL.glBindVertexArray(0)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+    @property
+    def capacity(self):
+        """Gets the number of instances the instance buffer holds
+
+        :return: capacity of instance buffer
+        :rtype: int
+        """
+        return len(self.instances)
+
+    def setInstances(self, models, colours=None):
+        """Replaces all instances, only the N instances are uploaded. The instance buffer is reallocated
+        (doubling its capacity) if they do not fit.
+
+        :param models: N x 4 x 4 model matrices in row-major order (as the numpy matrices in camera.py)
+        :type models: np.ndarray
+        :param colours: N x 4 RGBA colours or None to keep the colours of the first N instances
+        :type colours: Union[np.ndarray, None]
+        """
+        models = np.asarray(models, np.float32).reshape(-1, 4, 4)
+        count = len(models)
+        if count > self.capacity:
+            instances = np.zeros(max(count, 2 * self.capacity), INSTANCE_TYPE)
+            instances[:self.capacity] = self.instances
+            instances['colour'][self.capacity:] = 1.0
+            self.instances = instances
+
+        self.count = count
+        self.instances['model'][:count] = models.transpose(0, 2, 1)
+        if colours is not None:
+            self.instances['colour'][:count] = colours
+        # Orphaning the buffer lets the driver hand out new memory instead of waiting for draws that still
+        # read the old instances, then only the instances that are drawn are uploaded
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.instance_buffer)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, self.instances.nbytes, None, self.usage)
+        GL.glBufferSubData(GL.GL_ARRAY_BUFFER, 0, count * INSTANCE_TYPE.itemsize, self.instances[:count])
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+    def updateInstances(self, start, models=None, colours=None):
+        """Replaces a range of the existing instances, only the range is uploaded
+
+        :param start: index of first instance to replace
+        :type start: int
+        :param models: M x 4 x 4 model matrices in row-major order or None to keep them
+        :type models: Union[np.ndarray, None]
+        :param colours: M x 4 RGBA colours or None to keep them
+        :type colours: Union[np.ndarray, None]
+        :raises ValueError: if the range is beyond the instances
+        """
+        if models is None and colours is None:
+            return
+        count = len(models if models is not None else colours)
+        if start < 0 or start + count > self.count:
+            raise ValueError(f'Instances {start} to {start + count} are not in the {self.count} instances')
+
+        if models is not None:
+            self.instances['model'][start:start + count] = np.asarray(models, np.float32).transpose(0, 2, 1)
+        if colours is not None:
+            self.instances['colour'][start:start + count] = colours
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.instance_buffer)
+        GL.glBufferSubData(GL.GL_ARRAY_BUFFER, start * INSTANCE_TYPE.itemsize, count * INSTANCE_TYPE.itemsize,
+                           self.instances[start:start + count])
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+    def draw(self):
+        """Draws every instance with the current shader program, the VAO is left bound as in Mesh.draw"""
+        mesh = self.mesh
+        GL.glBindVertexArray(mesh.vao)
+        if mesh.element_buffer is None:
+            GL.glDrawArraysInstanced(mesh.primitive, 0, mesh.count, self.count)
+        else:
+            GL.glDrawElementsInstanced(mesh.primitive, mesh.count, GL.GL_UNSIGNED_INT, ctypes.c_void_p(0), self.count)
+
+    def delete(self):
+        """Deletes the instance buffer, the mesh is not deleted"""
+        GL.glDeleteBuffers(1, [self.instance_buffer])
+        self.instance_buffer = None
+        self.count = 0
+
+
+class GLCallCounter:
+    """Counts the calls made through the OpenGL.GL module while it is active. Calls are counted by
+    temporarily replacing the gl functions in the module so code must call them as GL.glFunction.
+
+    Example:
+        with GLCallCounter() as counter:
+            paint()
+        print(counter.total, counter.calls)
+    """
+    def __init__(self):
+        self.calls = {}
+        self._originals = {}
+
+    @property
+    def total(self):
+        """Gets the total number of GL calls
+
+        :return: number of calls
+        :rtype: int
+        """
+        return sum(self.calls.values())
+
+    def _wrap(self, name, function):
+        def counted(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return function(*args, **kwargs)
+        return counted
+
+    def __enter__(self):
+        for name in dir(GL):
+            function = getattr(GL, name)
+            if name.startswith('gl') and callable(function):
+                self._originals[name] = function
+                setattr(GL, name, self._wrap(name, function))
+        return self
+
+    def __exit__(self, *exc):
+        for name, function in self._originals.items():
+            setattr(GL, name, function)
+        self._originals = {}
+
+
+def _offscreen_context():
+    """Creates the GL context of the benchmarks, headless.py is only imported when a benchmark runs so using
+    the module does not load it
+
+    :return: current offscreen context
+    :rtype: OffscreenContext
+    """
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '1_Windowing'))
+    from headless import OffscreenContext
+    return OffscreenContext()
+
+
+def benchmark_draw_calls(frames=100):
+    """Counts the GL calls per frame for drawing the pyramid by setting up the attributes every frame
+    and by drawing a Mesh. An offscreen GL context is created so no window is shown.
+
+    :param frames: number of frames to draw
+    :type frames: int
+    """
+    context = _offscreen_context()
+
+    vertex_buffer_data = np.array([-0.0, 0.1, 0.0, -0.8, -0.8, 0.8, 0.8, -0.8, 0.8, 0.0, 0.8, 0.8], np.float32)
+    colour_buffer_data = np.array([0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 1.0, 0.0, 1.0], np.float32)
+    element_buffer_data = np.array([1, 2, 3, 0, 1, 2, 0, 2, 3, 0, 3, 1], np.uint32)
+    position_id, colour_id = 0, 1
+
+    buffers = GL.glGenBuffers(3)
+    for target, buffer, data in zip((GL.GL_ARRAY_BUFFER, GL.GL_ARRAY_BUFFER, GL.GL_ELEMENT_ARRAY_BUFFER), buffers,
+                                    (vertex_buffer_data, colour_buffer_data, element_buffer_data)):
+        GL.glBindBuffer(target, buffer)
+        GL.glBufferData(target, data.nbytes, data, GL.GL_STATIC_DRAW)
+
+    def per_frame_setup():
+        for location, buffer in ((position_id, buffers[0]), (colour_id, buffers[1])):
+            GL.glEnableVertexAttribArray(location)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, buffer)
+            GL.glVertexAttribPointer(location, 3, GL.GL_FLOAT, GL.GL_FALSE, 0, ctypes.c_void_p(0))
+        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, buffers[2])
+        GL.glDrawElements(GL.GL_TRIANGLES, 12, GL.GL_UNSIGNED_INT, ctypes.c_void_p(0))
+        GL.glDisableVertexAttribArray(position_id)
+        GL.glDisableVertexAttribArray(colour_id)
+
+    mesh = Mesh([(position_id, vertex_buffer_data, 3), (colour_id, colour_buffer_data, 3)], element_buffer_data)
+
+    print(f'GL calls per frame over {frames} frames')
+    for name, draw in (('per frame setup', per_frame_setup), ('Mesh', mesh.draw)):
+        with GLCallCounter() as counter:
+            for _ in range(frames):
+                draw()
+        GL.glFinish()
+        elapsed = min(timeit.repeat(draw, number=frames, repeat=5)) / frames
+        print(f'{name:>16}: {counter.total / frames:4.1f} calls, {elapsed * 1e6:8.1f} us per frame')
+
+    mesh.delete()
+    GL.glDeleteBuffers(3, buffers)
+    context.delete()
+
+
+def benchmark_instancing(counts=(1000, 10000, 100000), loop_limit=10000, frames=5):
+    """Compares drawing N pyramids with a Python loop of uniform uploads and draw calls with an InstancedMesh,
+    including computing and uploading every model matrix each frame. An offscreen GL context is created so
+    no window is shown.
+
+    :param counts: numbers of pyramids
+    :type counts: Tuple[int]
+    :param loop_limit: largest number of pyramids drawn with the loop, larger counts take too long
+    :type loop_limit: int
+    :param frames: number of frames to draw
+    :type frames: int
+    """
+    import OpenGL.GL.shaders as shaders
+
+    context = _offscreen_context()
+
+    vertex_shader = """
+    #version 330
+    in vec3 position;
+    in vec3 vertexColour;
+    in mat4 model;
+    in vec4 instanceColour;
+    uniform mat4 uniformModel;
+    uniform vec4 uniformColour;
+    uniform bool instanced;
+    out vec3 outColour;
+    void main()
+    {
+        outColour = vertexColour * (instanced ? instanceColour.rgb : uniformColour.rgb);
+        gl_Position = (instanced ? model : uniformModel) * vec4(position, 1.0);
+    }
+    """
+    fragment_shader = """
+    #version 330
+    in vec3 outColour;
+    out vec4 colour;
+    void main()
+    {
+        colour = vec4(outColour, 1.0);
+    }
+    """
+    program = shaders.compileProgram(shaders.compileShader(vertex_shader, GL.GL_VERTEX_SHADER),
+                                     shaders.compileShader(fragment_shader, GL.GL_FRAGMENT_SHADER))
+    GL.glUseProgram(program)
+    model_id = GL.glGetUniformLocation(program, 'uniformModel')
+    colour_id = GL.glGetUniformLocation(program, 'uniformColour')
+    instanced_id = GL.glGetUniformLocation(program, 'instanced')
+
+    vertex_buffer_data = np.array([-0.0, 0.1, 0.0, -0.8, -0.8, 0.8, 0.8, -0.8, 0.8, 0.0, 0.8, 0.8], np.float32)
+    colour_buffer_data = np.array([0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 1.0, 0.0, 1.0], np.float32)
+    element_buffer_data = np.array([1, 2, 3, 0, 1, 2, 0, 2, 3, 0, 3, 1], np.uint32)
+    mesh = Mesh([(GL.glGetAttribLocation(program, 'position'), vertex_buffer_data, 3),
+                 (GL.glGetAttribLocation(program, 'vertexColour'), colour_buffer_data, 3)],
+                element_buffer_data, interleaved=True)
+    instanced_mesh = InstancedMesh(mesh, {'model': GL.glGetAttribLocation(program, 'model'),
+                                          'colour': GL.glGetAttribLocation(program, 'instanceColour')})
+
+    generator = np.random.default_rng(0)
+    print('Drawing pyramids, every model matrix changes each frame')
+    for count in counts:
+        positions = generator.uniform(-1.0, 1.0, (count, 3)).astype(np.float32)
+        colours = generator.uniform(0.0, 1.0, (count, 4)).astype(np.float32)
+        scale = 0.5 / np.sqrt(count)
+        models = np.empty((count, 4, 4), np.float32)
+
+        def loop(frame):
+            GL.glUniform1i(instanced_id, 0)
+            model_batch(positions, frame * 0.1, scale, out=models)
+            for model, colour in zip(models, colours):
+                GL.glUniformMatrix4fv(model_id, 1, GL.GL_TRUE, model)
+                GL.glUniform4fv(colour_id, 1, colour)
+                mesh.draw()
+
+        def instanced(frame):
+            GL.glUniform1i(instanced_id, 1)
+            instanced_mesh.setInstances(model_batch(positions, frame * 0.1, scale, out=models), colours)
+            instanced_mesh.draw()
+
+        for name, draw in (('loop', loop), ('instanced', instanced)):
+            if name == 'loop' and count > loop_limit:
+                continue
+            start = timeit.default_timer()
+            for frame in range(frames):
+                GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+                draw(frame)
+            GL.glFinish()
+            elapsed = (timeit.default_timer() - start) / frames
+            print(f'{count:>7} {name:>9}: {elapsed * 1000:8.1f} ms per frame')
+
+    instanced_mesh.delete()
+    mesh.delete()
+    GL.glDeleteProgram(program)
+    context.delete()
+
+
+if __name__ == "__main__":
+    benchmark_draw_calls()
+    benchmark_instancing()
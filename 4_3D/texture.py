@@ -0,0 +1,641 @@
+"""
+Class and functions for loading images into textures
+"""
+import ctypes
+import hashlib
+import io
+import mmap
+import os
+import struct
+import tempfile
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from OpenGL import GL
+from OpenGL.GL.EXT.texture_compression_s3tc import (GL_COMPRESSED_RGB_S3TC_DXT1_EXT,
+                                                     GL_COMPRESSED_RGBA_S3TC_DXT5_EXT)
+from OpenGL.raw.GL.VERSION.GL_1_3 import glCompressedTexImage2D, glGetCompressedTexImage
+from PIL import Image
+
+
+# Maps the image mode to the pixel format, internal format and swizzle of the texture. Single and two
+# channel images are stored in red (and green) and swizzled so they are sampled as grey (with alpha)
+IMAGE_FORMATS = {
+    'L': (GL.GL_RED, GL.GL_R8, (GL.GL_RED, GL.GL_RED, GL.GL_RED, GL.GL_ONE)),
+    'LA': (GL.GL_RG, GL.GL_RG8, (GL.GL_RED, GL.GL_RED, GL.GL_RED, GL.GL_GREEN)),
+    'RGB': (GL.GL_RGB, GL.GL_RGB8, None),
+    'RGBA': (GL.GL_RGBA, GL.GL_RGBA8, None),
+}
+
+# Maps the image mode to the block compressed internal format and the extension required for it (RGTC is core)
+COMPRESSED_FORMATS = {
+    'L': (GL.GL_COMPRESSED_RED_RGTC1, None),
+    'LA': (GL.GL_COMPRESSED_RG_RGTC2, None),
+    'RGB': (GL_COMPRESSED_RGB_S3TC_DXT1_EXT, 'GL_EXT_texture_compression_s3tc'),
+    'RGBA': (GL_COMPRESSED_RGBA_S3TC_DXT5_EXT, 'GL_EXT_texture_compression_s3tc'),
+}
+
+MIPMAP_FILTERS = {GL.GL_NEAREST_MIPMAP_NEAREST, GL.GL_LINEAR_MIPMAP_NEAREST, GL.GL_NEAREST_MIPMAP_LINEAR,
+                  GL.GL_LINEAR_MIPMAP_LINEAR}
+
+
+def load_image(image):
+    """Decodes an image into a contiguous uint8 array without creating python objects per pixel.
+    Images with modes other than L, LA, RGB or RGBA are converted to RGB or RGBA (if they have transparency).
+
+    :param image: path of image file or an opened image
+    :type image: Union[str, Image.Image]
+    :return: height x width x channels array of pixels and the image mode
+    :rtype: Tuple[np.ndarray, str]
+    """
+    if not isinstance(image, Image.Image):
+        image = Image.open(image)
+
+    if image.mode not in IMAGE_FORMATS:
+        has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    # np.asarray uses the array interface of the image so the pixels are copied once into the array
+    pixels = np.asarray(image, np.uint8)
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, np.newaxis]
+
+    return np.ascontiguousarray(pixels), image.mode
+
+
+def unpack_alignment(pixels):
+    """Computes the largest valid GL_UNPACK_ALIGNMENT for the rows of the pixels, rows
+    with a byte size that is not a multiple of 4 (e.g. RGB images with an odd width) need a smaller
+    alignment than the default of 4.
+
+    :param pixels: height x width x channels array of pixels
+    :type pixels: np.ndarray
+    :return: alignment in bytes
+    :rtype: int
+    """
+    row_size = pixels.shape[1] * pixels.shape[2] * pixels.itemsize
+    for alignment in (8, 4, 2):
+        if row_size % alignment == 0:
+            return alignment
+    return 1
+
+
+def upload_texture(pixels, mode, target=GL.GL_TEXTURE_2D, from_buffer=False, level=0, offset=0,
+                   internal_format=None):
+    """Uploads pixels into a level of the texture bound to the target
+
+    :param pixels: height x width x channels array of pixels from load_image
+    :type pixels: np.ndarray
+    :param mode: image mode of the pixels
+    :type mode: str
+    :param target: texture target
+    :type target: int
+    :param from_buffer: indicates the pixels have been copied to the bound pixel unpack buffer and
+                        should be read from there
+    :type from_buffer: bool
+    :param level: mipmap level
+    :type level: int
+    :param offset: byte offset of the pixels in the pixel unpack buffer
+    :type offset: int
+    :param internal_format: internal format to use instead of the one for the mode e.g. a compressed format
+    :type internal_format: Union[int, None]
+    """
+    pixel_format, default_format, swizzle = IMAGE_FORMATS[mode]
+    internal_format = default_format if internal_format is None else internal_format
+    height, width = pixels.shape[:2]
+    data = ctypes.c_void_p(offset) if from_buffer else pixels
+
+    GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, unpack_alignment(pixels))
+    GL.glTexImage2D(target, level, internal_format, width, height, 0, pixel_format, GL.GL_UNSIGNED_BYTE, data)
+    GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 4)
+    if swizzle is not None and level == 0:
+        GL.glTexParameteriv(target, GL.GL_TEXTURE_SWIZZLE_RGBA, np.array(swizzle, np.int32))
+
+
+def build_mipmaps(pixels):
+    """Builds the mip chain of an image by averaging 2 x 2 blocks of pixels down to a 1 x 1 level.
+    Level sizes are halved and rounded down as GL expects, so the last row or column of odd sized
+    levels is dropped, and a dimension that has reached 1 is kept while the other is halved.
+
+    :param pixels: height x width x channels array of pixels from load_image
+    :type pixels: np.ndarray
+    :return: pixels of each level starting with the base level
+    :rtype: List[np.ndarray]
+    """
+    levels = [pixels]
+    while max(pixels.shape[:2]) > 1:
+        height, width, channels = pixels.shape
+        rows, columns = min(height, 2), min(width, 2)
+        height, width = height // rows, width // columns
+        blocks = pixels[:height * rows, :width * columns].reshape(height, rows, width, columns, channels)
+        count = rows * columns
+        pixels = ((blocks.sum(axis=(1, 3), dtype=np.uint32) + count // 2) // count).astype(np.uint8)
+        levels.append(pixels)
+
+    return levels
+
+
+def has_extension(name):
+    """Checks if the current GL context supports an extension, a GL context must be current
+
+    :param name: name of extension e.g. GL_EXT_texture_compression_s3tc
+    :type name: str
+    :return: indicates the extension is supported
+    :rtype: bool
+    """
+    count = GL.glGetIntegerv(GL.GL_NUM_EXTENSIONS)
+    return any(GL.glGetStringi(GL.GL_EXTENSIONS, index).decode() == name for index in range(count))
+
+
+class MipChain:
+    """Pixels of every mipmap level of a texture. The levels are either uncompressed height x width x
+    channels arrays or, when a compressed format is given, flat arrays of compressed blocks.
+
+    :param mode: image mode of the pixels
+    :type mode: str
+    :param levels: pixels of each level starting with the base level
+    :type levels: List[np.ndarray]
+    :param compressed_format: compressed internal format of the levels or None if uncompressed
+    :type compressed_format: Union[int, None]
+    :param sizes: (width, height) of each level, only needed for compressed levels
+    :type sizes: Union[List[Tuple[int, int]], None]
+    """
+    def __init__(self, mode, levels, compressed_format=None, sizes=None):
+        self.mode = mode
+        self.levels = levels
+        self.compressed_format = compressed_format
+        self.sizes = [(level.shape[1], level.shape[0]) for level in levels] if sizes is None else sizes
+
+    def layout(self, start=0):
+        """Computes the byte offsets of the levels when they are packed one after the other, each level
+        is aligned to 16 bytes. The same layout is used in the cache files and pixel buffers.
+
+        :param start: offset of the first byte available for the levels
+        :type start: int
+        :return: offset of each level and the end offset of the last level
+        :rtype: Tuple[List[int], int]
+        """
+        offsets = []
+        end = start
+        for level in self.levels:
+            offset = (end + 15) // 16 * 16
+            offsets.append(offset)
+            end = offset + level.nbytes
+
+        return offsets, end
+
+    def upload(self, target=GL.GL_TEXTURE_2D, from_buffer=False):
+        """Uploads all levels into the texture bound to the target and limits the texture to those levels
+
+        :param target: texture target
+        :type target: int
+        :param from_buffer: indicates the levels have been copied to the bound pixel unpack buffer at
+                            the offsets from layout and should be read from there
+        :type from_buffer: bool
+        """
+        offsets, _ = self.layout()
+        for level, (pixels, (width, height), offset) in enumerate(zip(self.levels, self.sizes, offsets)):
+            if self.compressed_format is None:
+                upload_texture(pixels, self.mode, target, from_buffer, level, offset)
+            else:
+                # The raw function is used as the PyOpenGL wrapper cannot read from a pixel unpack buffer
+                data = ctypes.c_void_p(offset) if from_buffer else pixels.ctypes.data_as(ctypes.c_void_p)
+                glCompressedTexImage2D(target, level, self.compressed_format, width, height, 0, pixels.nbytes, data)
+
+        swizzle = IMAGE_FORMATS[self.mode][2]
+        if self.compressed_format is not None and swizzle is not None:
+            GL.glTexParameteriv(target, GL.GL_TEXTURE_SWIZZLE_RGBA, np.array(swizzle, np.int32))
+        GL.glTexParameteri(target, GL.GL_TEXTURE_MAX_LEVEL, len(self.levels) - 1)
+
+    def compress(self, target=GL.GL_TEXTURE_2D, from_buffer=False, read_back=True):
+        """Uploads the levels into the texture bound to the target with the block compressed format of
+        the mode, so the driver compresses them, and reads the compressed blocks back. The levels are
+        uploaded uncompressed if they are already compressed or the format is not supported. Reading the
+        blocks back waits for the driver to finish compressing them.
+
+        :param target: texture target
+        :type target: int
+        :param from_buffer: indicates the levels have been copied to the bound pixel unpack buffer at
+                            the offsets from layout and should be read from there
+        :type from_buffer: bool
+        :param read_back: indicates the compressed blocks should be read back e.g. to write them to a cache
+        :type read_back: bool
+        :return: compressed mip chain or this mip chain if it was not read back or could not be compressed
+        :rtype: MipChain
+        """
+        compressed_format, extension = COMPRESSED_FORMATS[self.mode]
+        if self.compressed_format is not None or (extension is not None and not has_extension(extension)):
+            self.upload(target, from_buffer)
+            return self
+
+        offsets, _ = self.layout()
+        for level, (pixels, offset) in enumerate(zip(self.levels, offsets)):
+            upload_texture(pixels, self.mode, target, from_buffer, level, offset, compressed_format)
+        GL.glTexParameteri(target, GL.GL_TEXTURE_MAX_LEVEL, len(self.levels) - 1)
+        if not read_back or not GL.glGetTexLevelParameteriv(target, 0, GL.GL_TEXTURE_COMPRESSED):
+            return self
+
+        levels = []
+        for level in range(len(self.levels)):
+            size = GL.glGetTexLevelParameteriv(target, level, GL.GL_TEXTURE_COMPRESSED_IMAGE_SIZE)
+            blocks = np.empty(size, np.uint8)
+            glGetCompressedTexImage(target, level, blocks.ctypes.data_as(ctypes.c_void_p))
+            levels.append(blocks)
+
+        return MipChain(self.mode, levels, compressed_format, self.sizes)
+
+
+class TextureCache:
+    """Stores the mip chains of image files in a directory so later launches can memory map the levels
+    and upload them without decoding or downsampling the image. Each image has one cache file, named
+    with the hash of its path, holding a header, a table of levels and the (optionally compressed) level
+    data. An entry is valid while the modification time and size of the image match the header or, if
+    they have changed, while the hash of the image contents still matches.
+
+    :param directory: directory of the cache files, None uses ~/.cache/practical_opengl/textures
+    :type directory: Union[str, None]
+    """
+    magic = b'PGLMIP01'
+    # magic, modification time (ns), file size, SHA-256 of file, mode, compressed format (0 if none), level count
+    header = struct.Struct('<8sqQ32s4sII')
+    # width, height, offset and size in bytes of a level
+    level_header = struct.Struct('<IIQQ')
+
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = os.path.join(os.path.expanduser('~'), '.cache', 'practical_opengl', 'textures')
+        self.directory = directory
+
+    @staticmethod
+    def digest(source):
+        """Computes the SHA-256 hash of a file
+
+        :param source: path of file
+        :type source: str
+        :return: hash of file contents
+        :rtype: bytes
+        """
+        sha = hashlib.sha256()
+        with open(source, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                sha.update(chunk)
+        return sha.digest()
+
+    def path(self, source):
+        """Gets the path of the cache file for an image file
+
+        :param source: path of image file
+        :type source: str
+        :return: path of cache file
+        :rtype: str
+        """
+        name = hashlib.sha256(os.path.abspath(source).encode()).hexdigest()
+        return os.path.join(self.directory, f'{name}.mip')
+
+    def read(self, source):
+        """Memory maps the cached mip chain of an image file, the level arrays are read only views of the map
+
+        :param source: path of image file
+        :type source: str
+        :return: mip chain or None if there is no valid cache entry
+        :rtype: Union[MipChain, None]
+        """
+        path = self.path(source)
+        try:
+            status = os.stat(source)
+            with open(path, 'rb') as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            magic, mtime, size, digest, mode, compressed_format, count = self.header.unpack_from(data)
+            mode = mode.rstrip(b'\0').decode()
+            if magic != self.magic or mode not in IMAGE_FORMATS:
+                return None
+            if (mtime, size) != (status.st_mtime_ns, status.st_size):
+                if digest != self.digest(source):
+                    return None
+                # The contents are unchanged (e.g. the file was copied) so store the new time to skip hashing
+                with open(path, 'r+b') as file:
+                    file.write(self.header.pack(magic, status.st_mtime_ns, status.st_size, digest,
+                                                mode.encode(), compressed_format, count))
+
+            levels = []
+            sizes = []
+            channels = len(mode)
+            for index in range(count):
+                width, height, offset, nbytes = self.level_header.unpack_from(
+                    data, self.header.size + index * self.level_header.size)
+                level = np.frombuffer(data, np.uint8, nbytes, offset)
+                levels.append(level if compressed_format else level.reshape(height, width, channels))
+                sizes.append((width, height))
+        except (OSError, ValueError, struct.error, UnicodeDecodeError):
+            return None
+
+        return MipChain(mode, levels, compressed_format or None, sizes)
+
+    def write(self, source, chain):
+        """Writes the mip chain of an image file into its cache file. The file is written under a temporary
+        name and then renamed so other processes never read a partially written file.
+
+        :param source: path of image file
+        :type source: str
+        :param chain: mip chain of the image
+        :type chain: MipChain
+        :return: indicates the cache file was written
+        :rtype: bool
+        """
+        temporary = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            status = os.stat(source)
+            digest = self.digest(source)
+            offsets, _ = chain.layout(self.header.size + len(chain.levels) * self.level_header.size)
+            with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp', delete=False) as file:
+                temporary = file.name
+                file.write(self.header.pack(self.magic, status.st_mtime_ns, status.st_size, digest,
+                                            chain.mode.encode(), chain.compressed_format or 0, len(chain.levels)))
+                for (width, height), offset, level in zip(chain.sizes, offsets, chain.levels):
+                    file.write(self.level_header.pack(width, height, offset, level.nbytes))
+                for offset, level in zip(offsets, chain.levels):
+                    file.seek(offset)
+                    file.write(np.ascontiguousarray(level).data)
+            os.replace(temporary, self.path(source))
+        except OSError:
+            if temporary is not None and os.path.exists(temporary):
+                os.remove(temporary)
+            return False
+
+        return True
+
+
+def decode_mip_chain(image, mipmaps=True, cache=None, compress=False):
+    """Gets the mip chain of an image from the cache or by decoding the image and building its mipmaps.
+    A cache entry is only used as it is if it is compressed when compress is set and uncompressed otherwise.
+    An uncompressed entry of a texture to be compressed is returned to be compressed and written back, a
+    compressed entry of an uncompressed texture is replaced by decoding the image.
+
+    :param image: path of image file or an opened image
+    :type image: Union[str, Image.Image]
+    :param mipmaps: indicates all levels should be built, otherwise the chain only has the base level
+    :type mipmaps: bool
+    :param cache: texture cache for image files or None to always decode
+    :type cache: Union[TextureCache, None]
+    :param compress: indicates the texture will be block compressed
+    :type compress: bool
+    :return: mip chain and the path of the image if the uploaded chain should be written to the cache
+    :rtype: Tuple[MipChain, Union[str, None]]
+    """
+    source = image if mipmaps and cache is not None and isinstance(image, str) else None
+    if source is not None:
+        chain = cache.read(source)
+        if chain is not None and (chain.compressed_format is not None) == compress:
+            return chain, None
+        if chain is not None and compress:
+            return chain, source
+
+    pixels, mode = load_image(image)
+    return MipChain(mode, build_mipmaps(pixels) if mipmaps else [pixels]), source
+
+
+def create_texture(image, min_filter=GL.GL_LINEAR, mag_filter=GL.GL_LINEAR, cache=None, compress=False):
+    """Creates a 2D texture from an image, a GL context must be current. The mipmaps are built when the
+    minifying filter uses them and are read from (or written to) the cache if one is given.
+
+    :param image: path of image file or an opened image
+    :type image: Union[str, Image.Image]
+    :param min_filter: texture minifying filter
+    :type min_filter: int
+    :param mag_filter: texture magnification filter
+    :type mag_filter: int
+    :param cache: texture cache for image files or None to always decode
+    :type cache: Union[TextureCache, None]
+    :param compress: indicates the texture should be block compressed
+    :type compress: bool
+    :return: ID of texture
+    :rtype: int
+    """
+    chain, source = decode_mip_chain(image, min_filter in MIPMAP_FILTERS, cache, compress)
+
+    texture = GL.glGenTextures(1)
+    GL.glBindTexture(GL.GL_TEXTURE_2D, texture)
+    GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, min_filter)
+    GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, mag_filter)
+    if compress:
+        chain = chain.compress()
+    else:
+        chain.upload()
+    GL.glBindTexture(GL.GL_TEXTURE_2D, GL.GL_FALSE)
+
+    if source is not None:
+        cache.write(source, chain)
+
+    return texture
+
+
+class TextureManager:
+    """Loads textures without blocking the GL thread. Images are decoded on a pool of worker threads
+    (Pillow releases the GIL while decoding) and each texture holds a 1 x 1 placeholder pixel until
+    its image is decoded. The decoded pixels are uploaded through a pixel buffer object when update is
+    called on the GL thread e.g. at the start of paintGL. The texture IDs do not change when the
+    images are uploaded so they can be bound straight away. Mipmaps are built on the worker threads for
+    textures with a mipmap minifying filter and, with a cache, are mapped from the cache file instead.
+
+    :param workers: maximum number of decoding threads, None uses the executor default
+    :type workers: Union[int, None]
+    :param cache: texture cache for image files or None to always decode
+    :type cache: Union[TextureCache, None]
+    :param compress: indicates the textures should be block compressed
+    :type compress: bool
+    """
+    placeholder = np.full((1, 1, 4), 128, np.uint8)
+
+    def __init__(self, workers=None, cache=None, compress=False):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='texture')
+        self.cache = cache
+        self.compress = compress
+        self.pending = {}
+        self.errors = {}
+        self.pixel_buffer = None
+
+    def load(self, image, min_filter=GL.GL_LINEAR, mag_filter=GL.GL_LINEAR):
+        """Creates a texture with a placeholder pixel and starts decoding the image in the background,
+        a GL context must be current
+
+        :param image: path of image file or an opened image
+        :type image: Union[str, Image.Image]
+        :param min_filter: texture minifying filter
+        :type min_filter: int
+        :param mag_filter: texture magnification filter
+        :type mag_filter: int
+        :return: ID of texture
+        :rtype: int
+        """
+        texture = GL.glGenTextures(1)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, texture)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, min_filter)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, mag_filter)
+        MipChain('RGBA', [self.placeholder]).upload()
+        GL.glBindTexture(GL.GL_TEXTURE_2D, GL.GL_FALSE)
+
+        self.pending[texture] = self.executor.submit(decode_mip_chain, image, min_filter in MIPMAP_FILTERS,
+                                                     self.cache, self.compress)
+        return texture
+
+    @property
+    def loading(self):
+        """Gets whether some textures are still showing the placeholder
+
+        :return: indicates textures are still loading
+        :rtype: bool
+        """
+        return bool(self.pending)
+
+    def update(self, limit=None):
+        """Uploads the images that have finished decoding, a GL context must be current.
+        Images that failed to decode keep the placeholder and the exception is kept in errors. Mip chains
+        that were not in the cache are written to it on a worker thread.
+
+        :param limit: maximum number of textures to upload in this call, None uploads all decoded textures
+        :type limit: Union[int, None]
+        :return: IDs of the textures that were updated
+        :rtype: List[int]
+        """
+        updated = []
+        for texture, future in list(self.pending.items()):
+            if limit is not None and len(updated) >= limit:
+                break
+            if not future.done():
+                continue
+
+            del self.pending[texture]
+            if future.exception() is not None:
+                self.errors[texture] = future.exception()
+                continue
+
+            chain, source = future.result()
+            chain = self._upload(texture, chain, source is not None)
+            if source is not None:
+                self.executor.submit(self.cache.write, source, chain)
+            updated.append(texture)
+
+        return updated
+
+    def _upload(self, texture, chain, read_back=False):
+        """Copies the levels into the pixel buffer object and uploads them from there into the texture.
+        Textures to be compressed are compressed by the driver as they are uploaded from the buffer. Reading
+        the compressed blocks back waits for the driver, so it is only done for chains written to the cache,
+        which happens the first time an image is loaded, and later loads map the compressed blocks instead.
+
+        :param texture: ID of texture
+        :type texture: int
+        :param chain: mip chain from decode_mip_chain
+        :type chain: MipChain
+        :param read_back: indicates the compressed blocks should be read back to write them to the cache
+        :type read_back: bool
+        :return: uploaded mip chain, compressed if the texture was compressed and read back
+        :rtype: MipChain
+        """
+        GL.glBindTexture(GL.GL_TEXTURE_2D, texture)
+        if self.pixel_buffer is None:
+            self.pixel_buffer = GL.glGenBuffers(1)
+
+        offsets, size = chain.layout()
+        GL.glBindBuffer(GL.GL_PIXEL_UNPACK_BUFFER, self.pixel_buffer)
+        # Allocating new storage (orphaning) avoids waiting for the previous upload from the buffer to finish
+        GL.glBufferData(GL.GL_PIXEL_UNPACK_BUFFER, size, None, GL.GL_STREAM_DRAW)
+        address = GL.glMapBufferRange(GL.GL_PIXEL_UNPACK_BUFFER, 0, size,
+                                      GL.GL_MAP_WRITE_BIT | GL.GL_MAP_INVALIDATE_BUFFER_BIT)
+        for offset, level in zip(offsets, chain.levels):
+            ctypes.memmove(address + offset, np.ascontiguousarray(level).ctypes.data, level.nbytes)
+        GL.glUnmapBuffer(GL.GL_PIXEL_UNPACK_BUFFER)
+
+        if self.compress and chain.compressed_format is None:
+            chain = chain.compress(from_buffer=True, read_back=read_back)
+        else:
+            chain.upload(from_buffer=True)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, GL.GL_FALSE)
+        GL.glBindBuffer(GL.GL_PIXEL_UNPACK_BUFFER, 0)
+        return chain
+
+    def delete(self):
+        """Stops the decoding threads and deletes the pixel buffer, a GL context must be current.
+        The textures are owned by the caller and are not deleted."""
+        for future in self.pending.values():
+            future.cancel()
+        self.executor.shutdown(wait=False)
+        self.pending = {}
+        if self.pixel_buffer is not None:
+            GL.glDeleteBuffers(1, [self.pixel_buffer])
+            self.pixel_buffer = None
+
+
+def benchmark_loading(sizes=(1024, 4096), repeat=3):
+    """Compares decoding JPEG images into pixel arrays with load_image and with the per pixel
+    list(image.getdata()) conversion previously used in 2_Texture.py
+
+    :param sizes: widths (and heights) of the square test images, the getdata list peaks at about 1.7 GB for a
+                  4096 x 4096 image and 7 GB for an 8192 x 8192 image
+    :type sizes: Tuple[int]
+    :param repeat: number of timed runs, the best run is reported
+    :type repeat: int
+    """
+    rng = np.random.default_rng(0)
+    print(f'JPEG decode to pixels, best of {repeat} runs')
+    for size in sizes:
+        # Smooth noise so the JPEG has a realistic size rather than incompressible noise
+        noise = rng.integers(0, 256, (size // 16, size // 16, 3), np.uint8)
+        source = io.BytesIO()
+        Image.fromarray(noise).resize((size, size), Image.Resampling.BILINEAR).save(source, 'JPEG')
+        data = source.getvalue()
+
+        def getdata():
+            image = Image.open(io.BytesIO(data))
+            return np.array(list(image.getdata()), np.uint8)
+
+        def asarray():
+            return load_image(Image.open(io.BytesIO(data)))[0]
+
+        if not np.array_equal(getdata().ravel(), asarray().ravel()):
+            raise ValueError('load_image does not match the getdata pixels')
+        getdata_time = min(timeit.repeat(getdata, number=1, repeat=repeat))
+        asarray_time = min(timeit.repeat(asarray, number=1, repeat=repeat))
+        print(f'{size:>5} x {size:<5}: getdata {getdata_time * 1000:9.1f} ms, load_image {asarray_time * 1000:8.1f} ms, '
+              f'speed up {getdata_time / asarray_time:6.1f}x')
+
+
+def benchmark_cache(size=4096, repeat=3):
+    """Compares getting the mip chain of a JPEG image by decoding it and building the mipmaps with
+    mapping the mip chain from a texture cache file
+
+    :param size: width (and height) of the square test image
+    :type size: int
+    :param repeat: number of timed runs, the best run is reported
+    :type repeat: int
+    """
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 256, (size // 16, size // 16, 3), np.uint8)
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'image.jpg')
+        Image.fromarray(noise).resize((size, size), Image.Resampling.BILINEAR).save(source, 'JPEG')
+        cache = TextureCache(os.path.join(directory, 'cache'))
+        cache.write(source, decode_mip_chain(source)[0])
+
+        def decode():
+            return decode_mip_chain(source)[0]
+
+        def mapped():
+            chain = cache.read(source)
+            # Touch every level so the pages are read as they would be by the upload
+            return [level.sum(dtype=np.uint64) for level in chain.levels]
+
+        decode_time = min(timeit.repeat(decode, number=1, repeat=repeat))
+        mapped_time = min(timeit.repeat(mapped, number=1, repeat=repeat))
+        print(f'{size} x {size} mip chain, best of {repeat} runs: decode and downsample {decode_time * 1000:.1f} ms, '
+              f'cache {mapped_time * 1000:.1f} ms, speed up {decode_time / mapped_time:.1f}x')
+
+
+if __name__ == "__main__":
+    benchmark_loading()
+    benchmark_cache()
@@ -1,11 +1,12 @@
-import ctypes
 import math
 import sys
 import numpy as np
 from OpenGL import GL
-import OpenGL.GL.shaders as shaders
 from PyQt6 import QtOpenGLWidgets, QtWidgets, QtCore
-from camera import perspective, look_at
+from camera import Camera
+import chapters
+from program import program_cache
+from mesh import Mesh
 
 
 VERTEX_SHADER = """
@@ -44,6 +45,13 @@ class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
         self.tz = 5.0
         self.rx = 0.0
         self.rz = -1.0
+
+        # The camera only recomputes its matrices when they change, the version of the
+        # uploaded MVP is kept so the uniform is only sent when the camera has changed.
+        # 45° Field of View, display range : 0.1 unit <-> 100 units, the aspect ratio is set in resizeGL
+        self.camera = Camera([self.tx, 1.0, self.tz], [self.tx + self.rx, 1.0, self.tz + self.rz], [0.0, 1.0, 0.0],
+                             45.0, 4.0 / 3.0, 0.1, 100.0)
+        self.mvp_version = None
         self.setFocusPolicy(QtCore.Qt.FocusPolicy.StrongFocus)
         
 
@@ -51,13 +59,13 @@ class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
         GL.glClearColor(0.0, 0.0, 0.4, 0.0)
         GL.glEnable(GL.GL_DEPTH_TEST)
 
-        # Create and compile our GLSL program from the shaders
-        self.program_id = shaders.compileProgram(shaders.compileShader(VERTEX_SHADER, GL.GL_VERTEX_SHADER),
-                                                 shaders.compileShader(FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER))
+        # Create and compile our GLSL program from the shaders, the cache compiles identical shaders once
+        self.program = program_cache.get([(VERTEX_SHADER, GL.GL_VERTEX_SHADER),
+                                          (FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER)])
 
         # Get a handle for our buffers
-        self.vertex_position_id = GL.glGetAttribLocation(self.program_id, "position")
-        self.vertex_colour_id = GL.glGetAttribLocation(self.program_id, "vertexColour")
+        self.vertex_position_id = GL.glGetAttribLocation(self.program.id, "position")
+        self.vertex_colour_id = GL.glGetAttribLocation(self.program.id, "vertexColour")
         vertex_buffer_data = np.array([-0.0, 0.1, 0.0, 
                                        -1.0, -1.0, -1.0, 
                                        1.0, -1.0, -1.0, 
@@ -67,71 +75,30 @@ class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
                                        1.0, 1.0, 0.0, 
                                        1.0, 0.0, 1.0], np.float32)
         element_buffer_data = np.array([1, 2, 3, 0, 1, 2, 0, 2, 3, 0, 3, 1], np.uint32)
-        
-        self.vertex_buffer = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
-        GL.glBufferData(GL.GL_ARRAY_BUFFER, vertex_buffer_data.itemsize * len(vertex_buffer_data),  vertex_buffer_data, GL.GL_STATIC_DRAW)
-
-        self.colour_buffer = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.colour_buffer)
-        GL.glBufferData(GL.GL_ARRAY_BUFFER, colour_buffer_data.itemsize * len(colour_buffer_data),  colour_buffer_data, GL.GL_STATIC_DRAW)
-
-        self.element_buffer = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.element_buffer)
-        GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, element_buffer_data.itemsize * len(element_buffer_data), element_buffer_data, GL.GL_STATIC_DRAW)
-
-        # Projection matrix : 45° Field of View, 4:3 ratio, display range : 0.1 unit <-> 100 units
-        projection = perspective(45.0, 4.0 / 3.0, 0.1, 100.0)
-	
-	    # Camera matrix
-        view = look_at([4, 3, 3], # Camera is at (4,3,3), in World Space
-					   [0, 0, 0], # and looks at the origin
-					   [0, 1, 0]  # Head is up (set to 0, -1, 0 to look upside-down)
-					  )
-	    # Model matrix : an identity matrix (model will be at the origin)
-        model = np.identity(4)
-
-	    # Model-View-Projection (MVP) matrix: multiplication of our 3 matrices
-        self.MVP = projection @ view @ model
+
+        # The attributes are interleaved into a single buffer and the layout is recorded once in the
+        # mesh's Vertex Array Object
+        self.mesh = Mesh([(self.vertex_position_id, vertex_buffer_data, 3), (self.vertex_colour_id, colour_buffer_data, 3)],
+                         element_buffer_data, interleaved=True)
+
+    def resizeGL(self, width, height):
+        # The projection follows the aspect ratio of the widget, the camera only changes version when it differs
+        self.camera.aspect = width / max(height, 1)
 
     def paintGL(self):
         GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
         
         # Use our shader
-        GL.glUseProgram(self.program_id)
-
-        projection = perspective(45.0, 4.0 / 3.0, 0.1, 100.0)
-        view = look_at([self.tx, 1.0, self.tz],
-			           [self.tx + self.rx, 1.0, self.tz + self.rz],
-			           [0.0, 1.0,  0.0])
-
-        model = np.identity(4)
-        MVP = projection @ view @ model
-
-        # Send our transformation to the currently bound shader in the "MVP" uniform
-        mvp_loc = GL.glGetUniformLocation(self.program_id, "MVP")
-        GL.glUniformMatrix4fv(mvp_loc, 1, GL.GL_FALSE, MVP.transpose())
-
-        # 1st attribute buffer : vertices
-        GL.glEnableVertexAttribArray(self.vertex_position_id)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
-        GL.glVertexAttribPointer(self.vertex_position_id, # The attribute we want to configure
-                                 3,                     # size
-                                 GL.GL_FLOAT,              # type
-                                 GL.GL_FALSE,              # normalized?
-                                 0,                     # stride
-                                 ctypes.c_void_p(0)     # array buffer offset
-                                )
-        
-        # 2nd attribute buffer : colour
-        GL.glEnableVertexAttribArray(self.vertex_colour_id)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.colour_buffer)
-        GL.glVertexAttribPointer(self.vertex_colour_id, 3, GL.GL_FLOAT, GL.GL_FALSE, 0, ctypes.c_void_p(0))
-                             
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.element_buffer)
-        GL.glDrawElements(GL.GL_TRIANGLES, 12, GL.GL_UNSIGNED_INT, ctypes.c_void_p(0))
-        GL.glDisableVertexAttribArray(self.vertex_position_id)
-        GL.glDisableVertexAttribArray(self.vertex_colour_id)
+        self.program.use()
+
+        # Model matrix is an identity matrix so MVP = projection @ view
+        if self.mvp_version != self.camera.version:
+            # Send our transformation to the currently bound shader in the "MVP" uniform
+            self.program.setUniform("MVP", self.camera.view_projection)
+            self.mvp_version = self.camera.version
+
+        # Binds the mesh's Vertex Array Object and draws the pyramid
+        self.mesh.draw()
     
     def keyPressEvent(self, event):
         angle_offset = 0.01
@@ -150,6 +117,7 @@ class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
         elif event.key() == QtCore.Qt.Key.Key_Down:
             self.tx -= self.rx * translation_offset
             self.tz -= self.rz * translation_offset
+        self.camera.lookAt([self.tx, 1.0, self.tz], [self.tx + self.rx, 1.0, self.tz + self.rz], [0.0, 1.0, 0.0])
         self.update()
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -0,0 +1,171 @@
+import colorsys
+import math
+import sys
+import timeit
+import numpy as np
+from OpenGL import GL
+from PyQt6 import QtOpenGLWidgets, QtWidgets, QtCore
+from camera import Camera, screen_rays
+import chapters
+from program import program_cache
+from bvh import InstanceBVH, TriangleBVH
+from mesh import InstancedMesh, Mesh, model_batch
+
+SIDE = 50
+
+
+VERTEX_SHADER = """
+#version 330
+uniform mat4 VP;
+in vec3 position;
+in vec3 vertexColour;
+// Per instance attributes, the model matrix takes 4 attribute locations
+in mat4 model;
+in vec4 instanceColour;
+out vec3 outColour;
+
+void main(){
+  outColour = vertexColour * instanceColour.rgb;
+  gl_Position = VP * model * vec4(position, 1.0);
+}
+"""
+
+
+FRAGMENT_SHADER = """
+#version 330
+
+out vec4 colour;
+in vec3 outColour;
+
+void main(){
+  colour = vec4(outColour, 0);
+}
+"""
+
+class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
+    def __init__(self, parent=None):
+        self.parent = parent
+        super().__init__(parent)
+
+        self.angle = 0.0
+        self.tx = 0.0
+        self.tz = 5.0
+        self.rx = 0.0
+        self.rz = -1.0
+        self.frame = 0
+        self.picked = -1
+
+        self.camera = Camera([self.tx, 1.0, self.tz], [self.tx + self.rx, 1.0, self.tz + self.rz], [0.0, 1.0, 0.0],
+                             45.0, 4.0 / 3.0, 0.1, 100.0)
+        self.vp_version = None
+        self.setFocusPolicy(QtCore.Qt.FocusPolicy.StrongFocus)
+
+    def initializeGL(self):
+        GL.glClearColor(0.0, 0.0, 0.4, 0.0)
+        GL.glEnable(GL.GL_DEPTH_TEST)
+
+        self.program = program_cache.get([(VERTEX_SHADER, GL.GL_VERTEX_SHADER),
+                                          (FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER)])
+
+        vertex_buffer_data = np.array([-0.0, 0.1, 0.0,
+                                       -1.0, -1.0, -1.0,
+                                       1.0, -1.0, -1.0,
+                                       0.0, 1.0, -1.0], np.float32)
+        colour_buffer_data = np.array([0.0, 0.0, 0.0,
+                                       1.0, 0.0, 0.0,
+                                       1.0, 1.0, 0.0,
+                                       1.0, 0.0, 1.0], np.float32)
+        element_buffer_data = np.array([1, 2, 3, 0, 1, 2, 0, 2, 3, 0, 3, 1], np.uint32)
+        self.mesh = Mesh([(GL.glGetAttribLocation(self.program.id, "position"), vertex_buffer_data, 3),
+                          (GL.glGetAttribLocation(self.program.id, "vertexColour"), colour_buffer_data, 3)],
+                         element_buffer_data, interleaved=True)
+        self.instances = InstancedMesh(self.mesh, {'model': GL.glGetAttribLocation(self.program.id, "model"),
+                                                   'colour': GL.glGetAttribLocation(self.program.id, "instanceColour")},
+                                       capacity=SIDE * SIDE)
+
+        cells = np.stack(np.unravel_index(np.arange(SIDE * SIDE), (SIDE, SIDE)), axis=1)
+        self.positions = np.zeros((SIDE * SIDE, 3), np.float32)
+        self.positions[:, [0, 2]] = (cells - SIDE / 2) * 2.0
+        hues = np.linalg.norm(self.positions, axis=1) / np.sqrt(2) / SIDE
+        self.colours = np.array([(*colorsys.hsv_to_rgb(hue, 0.7, 1.0), 1.0) for hue in hues], np.float32)
+        self.models = model_batch(self.positions, 0.0, 0.5)
+        self.instances.setInstances(self.models, self.colours)
+
+        # The pyramid's triangles are in a BVH in model space and the instances in a BVH over their boxes,
+        # the instance boxes are refitted when a pick needs them rather than every frame
+        self.picker = InstanceBVH(TriangleBVH(vertex_buffer_data, element_buffer_data), self.models)
+        self.picker_frame = 0
+
+    def paintGL(self):
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+
+        self.program.use()
+        if self.vp_version != self.camera.version:
+            self.program.setUniform("VP", self.camera.view_projection)
+            self.vp_version = self.camera.version
+
+        # The pyramids spin so their boxes change every frame
+        self.frame += 1
+        model_batch(self.positions, self.frame * 0.02, 0.5, out=self.models)
+        self.instances.setInstances(self.models)
+        self.instances.draw()
+        self.update()
+
+    def mousePressEvent(self, event):
+        start = timeit.default_timer()
+        if self.picker_frame != self.frame:
+            self.picker.setModels(self.models)
+            self.picker_frame = self.frame
+        position = event.position()
+        origins, directions = screen_rays(self.camera.view_projection, [position.x(), position.y()],
+                                          self.width(), self.height())
+        _, instances, _ = self.picker.intersect(origins, directions, 1.0)
+        elapsed = timeit.default_timer() - start
+
+        # Only the colours of the previous and new picked pyramids are uploaded
+        if self.picked >= 0:
+            self.instances.updateInstances(self.picked, colours=self.colours[self.picked:self.picked + 1])
+        self.picked = int(instances[0])
+        if self.picked >= 0:
+            self.instances.updateInstances(self.picked, colours=[[1.0, 1.0, 1.0, 1.0]])
+        if self.parent is not None:
+            self.parent.setWindowTitle(f'Picking (pyramid {self.picked}, {elapsed * 1000:.2f} ms)')
+
+    def keyPressEvent(self, event):
+        angle_offset = 0.05
+        translation_offset = 1.0
+        if event.key() == QtCore.Qt.Key.Key_Right:
+            self.angle += angle_offset
+            self.rx = math.sin(self.angle)
+            self.rz = -math.cos(self.angle)
+        elif event.key() == QtCore.Qt.Key.Key_Left:
+            self.angle -= angle_offset
+            self.rx = math.sin(self.angle)
+            self.rz = -math.cos(self.angle)
+        elif event.key() == QtCore.Qt.Key.Key_Up:
+            self.tx += self.rx * translation_offset
+            self.tz += self.rz * translation_offset
+        elif event.key() == QtCore.Qt.Key.Key_Down:
+            self.tx -= self.rx * translation_offset
+            self.tz -= self.rz * translation_offset
+        self.camera.lookAt([self.tx, 1.0, self.tz], [self.tx + self.rx, 1.0, self.tz + self.rz], [0.0, 1.0, 0.0])
+        self.update()
+
+class MainWindow(QtWidgets.QMainWindow):
+    def __init__(self):
+        super().__init__()
+
+        self.resize(500, 500)
+        self.setWindowTitle('Picking (Click a pyramid, Up/Down key to move, Left/Right to turn)')
+
+        self.glWidget = GLWidget(self)
+        self.setCentralWidget(self.glWidget)
+
+
+if __name__ == "__main__":
+    app = QtWidgets.QApplication(sys.argv)
+
+    window = MainWindow()
+    window.show()
+
+    sys.exit(app.exec())
@@ -117,3 +117,842 @@ def orthographic(fov, aspect, z_near, z_far):
     projection[3, 3] = 1
 
     return projection
+
+
+def _norm(vectors):
+    """Computes the length of each row with the same dot product as np.linalg.norm does for
+    a single vector so batched results match the single camera functions exactly
+
+    :param vectors: N x 3 vectors
+    :type vectors: np.ndarray
+    :return: N lengths
+    :rtype: np.ndarray
+    """
+    return np.sqrt((vectors[:, None, :] @ vectors[:, :, None]).ravel())
+
+
+def look_at_batch(positions, targets, up_dirs=None):
+    """Computes the view matrices for many cameras in one pass. Each row gives the
+    same result as calling look_at with the corresponding position, target and up direction.
+
+    :param positions: N x 3 positions of cameras
+    :type positions: np.ndarray
+    :param targets: N x 3 points to look at
+    :type targets: np.ndarray
+    :param up_dirs: N x 3 (or 3) up directions of cameras
+    :type up_dirs: Union[np.ndarray, None]
+    :return: N x 4 x 4 view matrices
+    :rtype: np.ndarray
+    """
+    positions = np.asarray(positions).reshape(-1, 3)
+    targets = np.asarray(targets).reshape(-1, 3)
+    count = len(positions)
+    views = np.zeros((count, 4, 4), np.float32)
+    views[:, 3, 3] = 1
+
+    forward = positions - targets
+    norm = _norm(forward)
+    coincident = norm == 0
+    # avoids divide by zero for cameras that sit on their target, the rows are replaced below
+    forward = forward / np.where(coincident, 1, norm)[:, None]
+
+    if up_dirs is None:
+        vertical = (np.fabs(forward[:, 0]) < eps) & (np.fabs(forward[:, 2]) < eps)
+        up = np.zeros((count, 3), np.int64)
+        up[:, 1] = 1
+        up[vertical, 1] = 0
+        up[vertical, 2] = np.where(forward[vertical, 1] > 0, -1, 1)
+    else:
+        up = np.broadcast_to(np.asarray(up_dirs), (count, 3))
+
+    left = np.cross(up, forward)
+    left = left / _norm(left)[:, None]
+
+    up = np.cross(forward, left)
+
+    views[:, 0, :3] = left
+    views[:, 1, :3] = up
+    views[:, 2, :3] = forward
+
+    views[:, 0, 3] = left[:, 0] * -positions[:, 0] + left[:, 1] * -positions[:, 1] + left[:, 2] * -positions[:, 2]
+    views[:, 1, 3] = up[:, 0] * -positions[:, 0] + up[:, 1] * -positions[:, 1] + up[:, 2] * -positions[:, 2]
+    views[:, 2, 3] = (forward[:, 0] * -positions[:, 0] + forward[:, 1] * -positions[:, 1]
+                      + forward[:, 2] * -positions[:, 2])
+
+    if np.any(coincident):
+        views[coincident, :3, :3] = np.identity(3, np.float32)
+        views[coincident, :3, 3] = -positions[coincident]
+
+    return views
+
+
+def perspective_batch(fov, aspect, z_near, z_far):
+    """Computes the one-point perspective projection matrices for many cameras in one pass.
+    Each parameter can be a scalar or an array of size N, and each row gives the same result as
+    calling perspective with the corresponding parameters.
+
+    :param aspect: ratios of the x and y dimension ie x / y
+    :type aspect: Union[float, np.ndarray]
+    :param fov: fields of view for y dimension in degrees
+    :type fov: Union[float, np.ndarray]
+    :param z_near: the distances from the viewer to the near clipping plane (always positive)
+    :type z_near: Union[float, np.ndarray]
+    :param z_far: the distances from the viewer to the far clipping plane (always positive).
+    :type z_far: Union[float, np.ndarray]
+    :return: N x 4 x 4 perspective projection matrices
+    :rtype: np.ndarray
+    """
+    fov, aspect, z_near, z_far = np.broadcast_arrays(*(np.asarray(value, np.float64).ravel()
+                                                       for value in (fov, aspect, z_near, z_far)))
+    projections = np.zeros((len(fov), 4, 4), np.float32)
+
+    y_max = z_near * np.tan(0.5 * np.radians(fov))
+    x_max = y_max * aspect
+
+    z_depth = z_far - z_near
+
+    projections[:, 0, 0] = z_near / x_max
+    projections[:, 1, 1] = z_near / y_max
+    projections[:, 2, 2] = (-z_near - z_far) / z_depth
+    projections[:, 3, 2] = -1
+    projections[:, 2, 3] = -2 * z_near * z_far / z_depth
+
+    return projections
+
+
+def orthographic_batch(fov, aspect, z_near, z_far):
+    """Computes the orthographic projection matrices for many cameras in one pass.
+    Each parameter can be a scalar or an array of size N, and each row gives the same result as
+    calling orthographic with the corresponding parameters.
+
+    :param aspect: ratios of the x and y dimension ie x / y
+    :type aspect: Union[float, np.ndarray]
+    :param fov: fields of view for y dimension in degrees
+    :type fov: Union[float, np.ndarray]
+    :param z_near: the distances from the viewer to the near clipping plane (always positive)
+    :type z_near: Union[float, np.ndarray]
+    :param z_far: the distances from the viewer to the far clipping plane (always positive).
+    :type z_far: Union[float, np.ndarray]
+    :return: N x 4 x 4 orthographic projection matrices
+    :rtype: np.ndarray
+    """
+    fov, aspect, z_near, z_far = np.broadcast_arrays(*(np.asarray(value, np.float64).ravel()
+                                                       for value in (fov, aspect, z_near, z_far)))
+    projections = np.zeros((len(fov), 4, 4), np.float32)
+
+    y_max = z_near * np.tan(0.5 * np.radians(fov))
+    x_max = y_max * aspect
+
+    z_depth = z_far - z_near
+
+    projections[:, 0, 0] = 1 / x_max
+    projections[:, 1, 1] = 1 / y_max
+    projections[:, 2, 2] = -2 / z_depth
+    projections[:, 2, 3] = (-z_far - z_near) / z_depth
+    projections[:, 3, 3] = 1
+
+    return projections
+
+
+def frustum_planes(matrix):
+    """Extracts the planes of the view frustum from a projection @ view matrix, the planes are in world
+    space (or in model space for a full MVP matrix). A point p is inside a plane (a, b, c, d) when
+    a * p.x + b * p.y + c * p.z + d >= 0, the normals are unit length so this is the signed distance.
+
+    :param matrix: 4 x 4 projection @ view matrix e.g. perspective(...) @ look_at(...)
+    :type matrix: np.ndarray
+    :return: 6 x 4 planes in the order left, right, bottom, top, near, far
+    :rtype: np.ndarray
+    """
+    matrix = np.asarray(matrix, np.float64)
+    # Each clip space bound -w <= x, y, z <= w is a plane from the sum or difference of the matrix rows
+    planes = np.array([matrix[3] + matrix[0], matrix[3] - matrix[0],
+                       matrix[3] + matrix[1], matrix[3] - matrix[1],
+                       matrix[3] + matrix[2], matrix[3] - matrix[2]])
+    planes /= np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+    return planes.astype(np.float32)
+
+
+def _inside_planes(distances, planes):
+    """Combines the signed distances of objects to each plane into a visibility mask
+
+    :param distances: 6 x N distances of the objects to the planes without the plane offsets
+    :type distances: np.ndarray
+    :param planes: 6 x 4 frustum planes
+    :type planes: np.ndarray
+    :return: N visibility mask
+    :rtype: np.ndarray
+    """
+    # Comparing one contiguous row at a time is much faster than reducing an N x 6 mask along its rows
+    visible = distances[0] >= -planes[0, 3]
+    for row, plane in zip(distances[1:], planes[1:]):
+        visible &= row >= -plane[3]
+    return visible
+
+
+def cull_spheres(planes, spheres):
+    """Tests bounding spheres against the frustum planes, a sphere is visible unless it is entirely
+    outside a plane. Spheres close to a corner of the frustum can be visible without intersecting it, as
+    with any plane test.
+
+    :param planes: 6 x 4 frustum planes e.g. from frustum_planes
+    :type planes: np.ndarray
+    :param spheres: N x 4 centres and radii
+    :type spheres: np.ndarray
+    :return: N visibility mask
+    :rtype: np.ndarray
+    """
+    spheres = np.asarray(spheres, np.float32)
+    # The distance of the furthest point of a sphere is the distance of its centre plus its radius
+    weights = np.ones((6, 4), np.float32)
+    weights[:, :3] = planes[:, :3]
+    return _inside_planes(weights @ spheres.T, planes)
+
+
+def cull_boxes(planes, boxes):
+    """Tests axis aligned bounding boxes against the frustum planes, a box is visible unless it is
+    entirely outside a plane i.e. its corner furthest along the plane normal is outside
+
+    :param planes: 6 x 4 frustum planes e.g. from frustum_planes
+    :type planes: np.ndarray
+    :param boxes: N x 6 boxes as minimum x, y, z and maximum x, y, z
+    :type boxes: np.ndarray
+    :return: N visibility mask
+    :rtype: np.ndarray
+    """
+    boxes = np.asarray(boxes, np.float32)
+    # The furthest corner takes the maximum where the normal is positive and the minimum elsewhere,
+    # so its distance is one dot product of the box with the negative and positive parts of the normal
+    normals = planes[:, :3]
+    weights = np.hstack([np.minimum(normals, 0), np.maximum(normals, 0)])
+    return _inside_planes(weights @ boxes.T, planes)
+
+
+def screen_rays(matrix, points, width, height):
+    """Creates the rays from the camera through points of the window e.g. under the mouse for picking,
+    the points are unprojected onto the near and far planes with the inverse of the matrix
+
+    :param matrix: 4 x 4 projection @ view matrix
+    :type matrix: np.ndarray
+    :param points: N x 2 window coordinates in pixels with the origin at the top left, as in Qt events
+    :type points: np.ndarray
+    :param width: width of window
+    :type width: int
+    :param height: height of window
+    :type height: int
+    :return: N x 3 origins on the near plane and N x 3 directions, the rays reach the far plane at t = 1
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    points = np.asarray(points, np.float64).reshape(-1, 2)
+    ndc = np.ones((len(points), 2, 4))
+    ndc[:, :, 0] = (2.0 * points[:, 0] / width - 1.0)[:, None]
+    ndc[:, :, 1] = (1.0 - 2.0 * points[:, 1] / height)[:, None]
+    ndc[:, 0, 2] = -1.0
+    world = ndc @ np.linalg.inv(matrix).T
+    world = world[..., :3] / world[..., 3:]
+    return world[:, 0].astype(np.float32), (world[:, 1] - world[:, 0]).astype(np.float32)
+
+
+class MatrixBuilder:
+    """Builds view and projection matrices into caller-owned float32 buffers. The scratch
+    arrays and the views into them are created once so rebuilding a matrix does not allocate
+    new arrays. The results are the same as look_at, perspective and orthographic for float64 (or integer)
+    inputs. The scratch arrays are float64, so with float32 inputs, which look_at computes in float32, they
+    are equal within float32 rounding.
+    """
+    LEFT, UP, FORWARD, UP_DIR = range(4)
+
+    def __init__(self):
+        # Vectors are stored twice in a row so that the slices [1:4] and [2:5] give the rotated
+        # components (y, z, x) and (z, x, y) needed by the cross product without fancy indexing
+        vectors = np.zeros((4, 6))
+        self._xyz = [vector[:3] for vector in vectors]
+        self._yzx = [vector[1:4] for vector in vectors]
+        self._zxy = [vector[2:5] for vector in vectors]
+        self._copy = [vector[3:] for vector in vectors]
+        self._product = list(np.zeros((2, 3)))
+        self._length = np.zeros(())
+
+        self._position = np.zeros(3)
+        self._target = np.zeros(3)
+        self._equal = np.zeros(3, bool)
+
+        self._view = np.identity(4)
+        self._rotation = self._view[:3, :3]
+        self._translation = self._view[:3, 3]
+        self._identity = np.identity(3)
+        self._rows = [(self._view[0, :3], self._xyz[self.LEFT]), (self._view[1, :3], self._xyz[self.UP]),
+                      (self._view[2, :3], self._xyz[self.FORWARD])]
+        self._terms = np.zeros((3, 3))
+        self._columns = [self._terms[:, 0], self._terms[:, 1], self._terms[:, 2]]
+
+    def _cross(self, a, b, out):
+        """Computes the cross product of two stored vectors into another
+
+        :param a: index of first vector
+        :type a: int
+        :param b: index of second vector
+        :type b: int
+        :param out: index of vector for the result
+        :type out: int
+        """
+        np.multiply(self._yzx[a], self._zxy[b], out=self._product[0])
+        np.multiply(self._zxy[a], self._yzx[b], out=self._product[1])
+        np.subtract(self._product[0], self._product[1], out=self._xyz[out])
+        np.copyto(self._copy[out], self._xyz[out])
+
+    def _normalize(self, index):
+        """Normalizes a stored vector in-place
+
+        :param index: index of vector
+        :type index: int
+        """
+        vector = self._xyz[index]
+        np.dot(vector, vector, out=self._length)
+        np.sqrt(self._length, out=self._length)
+        np.divide(vector, self._length, out=vector)
+        np.copyto(self._copy[index], vector)
+
+    def look_at(self, out, position, target, up_dir=None):
+        """Computes the view matrix so that camera is looking at a target
+        from a desired position and orientation.
+
+        :param out: 4 x 4 float32 array that receives the view matrix
+        :type out: np.ndarray
+        :param position: position of camera
+        :type position: np.ndarray
+        :param target: point to look at
+        :type target: np.ndarray
+        :param up_dir: up direction of camera
+        :type up_dir: Union[np.ndarray, None]
+        :return: the out array
+        :rtype: np.ndarray
+        """
+        np.copyto(self._position, position)
+        np.copyto(self._target, target)
+
+        np.equal(self._position, self._target, out=self._equal)
+        if self._equal.all():
+            np.copyto(self._rotation, self._identity)
+            np.negative(self._position, out=self._translation)
+            np.copyto(out, self._view, casting='same_kind')
+            return out
+
+        forward = self._xyz[self.FORWARD]
+        np.subtract(self._position, self._target, out=forward)
+        self._normalize(self.FORWARD)
+
+        up_dir_vector = self._xyz[self.UP_DIR]
+        if up_dir is None:
+            up_dir_vector.fill(0)
+            if math.fabs(forward.item(0)) < eps and math.fabs(forward.item(2)) < eps:
+                up_dir_vector[2] = -1 if forward.item(1) > 0 else 1
+            else:
+                up_dir_vector[1] = 1
+        else:
+            np.copyto(up_dir_vector, up_dir)
+        np.copyto(self._copy[self.UP_DIR], up_dir_vector)
+
+        self._cross(self.UP_DIR, self.FORWARD, self.LEFT)
+        self._normalize(self.LEFT)
+        self._cross(self.FORWARD, self.LEFT, self.UP)
+
+        for row, vector in self._rows:
+            np.copyto(row, vector)
+
+        # Same summation order as look_at so the results are identical for float64 inputs
+        np.negative(self._position, out=self._position)
+        np.multiply(self._rotation, self._position, out=self._terms)
+        np.add(self._columns[0], self._columns[1], out=self._translation)
+        np.add(self._translation, self._columns[2], out=self._translation)
+
+        np.copyto(out, self._view, casting='same_kind')
+        return out
+
+    @staticmethod
+    def perspective(out, fov, aspect, z_near, z_far):
+        """Computes the one-point perspective projection matrix of camera
+
+        :param out: 4 x 4 float32 array that receives the projection matrix
+        :type out: np.ndarray
+        :param aspect: ratio of the x and y dimension ie x / y
+        :type aspect: float
+        :param fov: field of view for y dimension in degrees
+        :type fov: float
+        :param z_near: the distance from the viewer to the near clipping plane (always positive)
+        :type z_near: float
+        :param z_far: the distance from the viewer to the far clipping plane (always positive).
+        :type z_far: float
+        :return: the out array
+        :rtype: np.ndarray
+        """
+        out.fill(0)
+
+        y_max = z_near * math.tan(0.5 * math.radians(fov))
+        x_max = y_max * aspect
+
+        z_depth = z_far - z_near
+
+        out[0, 0] = z_near / x_max
+        out[1, 1] = z_near / y_max
+        out[2, 2] = (-z_near - z_far) / z_depth
+        out[3, 2] = -1
+        out[2, 3] = -2 * z_near * z_far / z_depth
+
+        return out
+
+    @staticmethod
+    def orthographic(out, fov, aspect, z_near, z_far):
+        """Computes the orthographic projection matrix of camera
+
+        :param out: 4 x 4 float32 array that receives the projection matrix
+        :type out: np.ndarray
+        :param aspect: ratio of the x and y dimension ie x / y
+        :type aspect: float
+        :param fov: field of view for y dimension in degrees
+        :type fov: float
+        :param z_near: the distance from the viewer to the near clipping plane (always positive)
+        :type z_near: float
+        :param z_far: the distance from the viewer to the far clipping plane (always positive).
+        :type z_far: float
+        :return: the out array
+        :rtype: np.ndarray
+        """
+        out.fill(0)
+
+        y_max = z_near * math.tan(0.5 * math.radians(fov))
+        x_max = y_max * aspect
+
+        z_depth = z_far - z_near
+
+        out[0, 0] = 1 / x_max
+        out[1, 1] = 1 / y_max
+        out[2, 2] = -2 / z_depth
+        out[2, 3] = (-z_far - z_near) / z_depth
+        out[3, 3] = 1
+
+        return out
+
+
+class Camera:
+    """Scene camera that keeps the view, projection and view-projection (MVP with an identity
+    model) matrices. The matrices are recomputed lazily only when the camera parameters they depend
+    on change and the version is incremented on every change so renderers can skip uploading
+    matrices that have not changed.
+
+    :param position: position of camera
+    :type position: np.ndarray
+    :param target: point to look at
+    :type target: np.ndarray
+    :param up_dir: up direction of camera
+    :type up_dir: Union[np.ndarray, None]
+    :param fov: field of view for y dimension in degrees
+    :type fov: float
+    :param aspect: ratio of the x and y dimension ie x / y
+    :type aspect: float
+    :param z_near: the distance from the viewer to the near clipping plane (always positive)
+    :type z_near: float
+    :param z_far: the distance from the viewer to the far clipping plane (always positive).
+    :type z_far: float
+    :param ortho: indicates the orthographic projection should be used instead of perspective
+    :type ortho: bool
+    """
+    def __init__(self, position, target, up_dir=None, fov=45.0, aspect=1.0, z_near=0.1, z_far=100.0,
+                 ortho=False):
+        self._builder = MatrixBuilder()
+        self._position = np.array(position, np.float64)
+        self._target = np.array(target, np.float64)
+        self._up_dir = None if up_dir is None else np.array(up_dir, np.float64)
+        self._fov = fov
+        self._aspect = aspect
+        self._z_near = z_near
+        self._z_far = z_far
+        self._ortho = ortho
+
+        self._view = np.zeros((4, 4), np.float32)
+        self._projection = np.zeros((4, 4), np.float32)
+        self._view_projection = np.zeros((4, 4), np.float32)
+        self._view_dirty = True
+        self._projection_dirty = True
+        self._view_projection_dirty = True
+        self._planes = None
+        self._planes_version = None
+        self.version = 0
+
+    def _viewChanged(self):
+        self._view_dirty = True
+        self._view_projection_dirty = True
+        self.version += 1
+
+    def _projectionChanged(self):
+        self._projection_dirty = True
+        self._view_projection_dirty = True
+        self.version += 1
+
+    @property
+    def position(self):
+        """Gets a read-only copy of the camera position
+
+        :return: position of camera
+        :rtype: np.ndarray
+        """
+        position = self._position.copy()
+        position.flags.writeable = False
+        return position
+
+    @position.setter
+    def position(self, value):
+        if not np.array_equal(self._position, value):
+            np.copyto(self._position, value)
+            self._viewChanged()
+
+    @property
+    def target(self):
+        """Gets a read-only copy of the point the camera looks at
+
+        :return: point to look at
+        :rtype: np.ndarray
+        """
+        target = self._target.copy()
+        target.flags.writeable = False
+        return target
+
+    @target.setter
+    def target(self, value):
+        if not np.array_equal(self._target, value):
+            np.copyto(self._target, value)
+            self._viewChanged()
+
+    @property
+    def up_dir(self):
+        """Gets a read-only copy of the up direction of the camera
+
+        :return: up direction of camera
+        :rtype: Union[np.ndarray, None]
+        """
+        if self._up_dir is None:
+            return None
+        up_dir = self._up_dir.copy()
+        up_dir.flags.writeable = False
+        return up_dir
+
+    @up_dir.setter
+    def up_dir(self, value):
+        if value is None and self._up_dir is None:
+            return
+        if value is not None and self._up_dir is not None and np.array_equal(self._up_dir, value):
+            return
+        self._up_dir = None if value is None else np.array(value, np.float64)
+        self._viewChanged()
+
+    def lookAt(self, position, target, up_dir=None):
+        """Sets the position, target and up direction of the camera together
+
+        :param position: position of camera
+        :type position: np.ndarray
+        :param target: point to look at
+        :type target: np.ndarray
+        :param up_dir: up direction of camera
+        :type up_dir: Union[np.ndarray, None]
+        """
+        version = self.version
+        self.position = position
+        self.target = target
+        self.up_dir = up_dir
+        if self.version != version:
+            self.version = version + 1
+
+    def _setProjectionParameter(self, name, value):
+        if getattr(self, name) != value:
+            setattr(self, name, value)
+            self._projectionChanged()
+
+    @property
+    def fov(self):
+        """Gets or sets the field of view for y dimension in degrees
+
+        :return: field of view
+        :rtype: float
+        """
+        return self._fov
+
+    @fov.setter
+    def fov(self, value):
+        self._setProjectionParameter('_fov', value)
+
+    @property
+    def aspect(self):
+        """Gets or sets the ratio of the x and y dimension ie x / y
+
+        :return: aspect ratio
+        :rtype: float
+        """
+        return self._aspect
+
+    @aspect.setter
+    def aspect(self, value):
+        self._setProjectionParameter('_aspect', value)
+
+    @property
+    def z_near(self):
+        """Gets or sets the distance from the viewer to the near clipping plane
+
+        :return: near clipping plane distance
+        :rtype: float
+        """
+        return self._z_near
+
+    @z_near.setter
+    def z_near(self, value):
+        self._setProjectionParameter('_z_near', value)
+
+    @property
+    def z_far(self):
+        """Gets or sets the distance from the viewer to the far clipping plane
+
+        :return: far clipping plane distance
+        :rtype: float
+        """
+        return self._z_far
+
+    @z_far.setter
+    def z_far(self, value):
+        self._setProjectionParameter('_z_far', value)
+
+    @property
+    def ortho(self):
+        """Gets or sets whether the orthographic projection is used instead of perspective
+
+        :return: indicates orthographic projection is used
+        :rtype: bool
+        """
+        return self._ortho
+
+    @ortho.setter
+    def ortho(self, value):
+        self._setProjectionParameter('_ortho', value)
+
+    @property
+    def view(self):
+        """Gets the 4 x 4 view matrix, the returned array is updated in-place when the camera changes
+
+        :return: view matrix
+        :rtype: np.ndarray
+        """
+        if self._view_dirty:
+            self._builder.look_at(self._view, self._position, self._target, self._up_dir)
+            self._view_dirty = False
+        return self._view
+
+    @property
+    def projection(self):
+        """Gets the 4 x 4 projection matrix, the returned array is updated in-place when the camera changes
+
+        :return: projection matrix
+        :rtype: np.ndarray
+        """
+        if self._projection_dirty:
+            build = self._builder.orthographic if self._ortho else self._builder.perspective
+            build(self._projection, self._fov, self._aspect, self._z_near, self._z_far)
+            self._projection_dirty = False
+        return self._projection
+
+    @property
+    def view_projection(self):
+        """Gets the 4 x 4 projection @ view matrix i.e. the MVP matrix for an identity model matrix,
+        the returned array is updated in-place when the camera changes
+
+        :return: view-projection matrix
+        :rtype: np.ndarray
+        """
+        if self._view_projection_dirty:
+            np.matmul(self.projection, self.view, out=self._view_projection)
+            self._view_projection_dirty = False
+        return self._view_projection
+
+    def frustumPlanes(self):
+        """Gets the 6 x 4 world space frustum planes of the camera (see frustum_planes), the planes are
+        only extracted again when the camera has changed
+
+        :return: frustum planes
+        :rtype: np.ndarray
+        """
+        if self._planes_version != self.version:
+            self._planes = frustum_planes(self.view_projection)
+            self._planes_version = self.version
+        return self._planes
+
+    def mvp(self, model, out=None):
+        """Computes the Model-View-Projection matrix for the given model matrix
+
+        :param model: 4 x 4 model matrix
+        :type model: np.ndarray
+        :param out: 4 x 4 float32 array that receives the MVP matrix
+        :type out: Union[np.ndarray, None]
+        :return: MVP matrix
+        :rtype: np.ndarray
+        """
+        if out is None:
+            out = np.zeros((4, 4), np.float32)
+        return np.matmul(self.view_projection, model, out=out)
+
+
+def measure_allocations(frame, calls=1000, warm_up=10):
+    """Measures the memory allocated by a function once it has warmed up. The loop iterates over a list
+    created before measuring so the loop itself allocates nothing.
+
+    :param frame: function to measure e.g. building the matrices of a frame
+    :type frame: Callable[[], None]
+    :param calls: number of calls to measure
+    :type calls: int
+    :param warm_up: number of calls before measuring, they fill caches such as the float free list
+    :type warm_up: int
+    :return: bytes still allocated after the calls and the peak bytes allocated during them
+    :rtype: Tuple[int, int]
+    """
+    import tracemalloc
+
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start()
+    for _ in range(warm_up):
+        frame()
+
+    loop = [None] * calls
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in loop:
+        frame()
+    after, peak = tracemalloc.get_traced_memory()
+
+    if not started:
+        tracemalloc.stop()
+    return after - before, peak - before
+
+
+def benchmark_allocations(calls=1000, retained_tolerance=256, peak_tolerance=2048):
+    """Measures the memory allocated by rebuilding the matrices of a frame with MatrixBuilder and with a
+    moving Camera's mvp once warmed up, which should be none. Each frame is measured over calls and
+    10 * calls calls. A frame is reported as allocating if the memory still allocated afterwards moves by more
+    than retained_tolerance, as Python's float free list moves it by a few dozen bytes, or if the peak
+    exceeds peak_tolerance, as numpy's ufuncs and matmul allocate about 0.5 to 1.3 KB of scratch buffers
+    during a call and free them before returning. tracemalloc also sees allocations made by numpy itself
+    e.g. caches filled on first use, so the results are reported rather than raised.
+
+    :param calls: number of calls of the shorter measurement
+    :type calls: int
+    :param retained_tolerance: bytes the total may move by
+    :type retained_tolerance: int
+    :param peak_tolerance: bytes of scratch memory allowed during a call
+    :type peak_tolerance: int
+    """
+    builder = MatrixBuilder()
+    view = np.zeros((4, 4), np.float32)
+    projection = np.zeros((4, 4), np.float32)
+    mvp = np.zeros((4, 4), np.float32)
+    position = np.array([4.0, 3.0, 3.0])
+    target = np.zeros(3)
+    up = np.array([0.0, 1.0, 0.0])
+
+    def builder_frame():
+        builder.perspective(projection, 45.0, 4.0 / 3.0, 0.1, 100.0)
+        builder.look_at(view, position, target, up)
+        np.matmul(projection, view, out=mvp)
+
+    # The camera moves between two positions so every frame rebuilds its view matrix
+    camera = Camera(position, target, up, 45.0, 4.0 / 3.0, 0.1, 100.0)
+    positions = [np.array([4.0, 3.0, 3.0]), np.array([3.0, 3.0, 4.0])]
+    model = np.identity(4, np.float32)
+
+    def camera_frame():
+        camera.lookAt(positions[camera.version % 2], target, up)
+        camera.mvp(model, out=mvp)
+
+    print(f'Memory allocated once warmed up, over {calls} and {10 * calls} frames')
+    for name, frame in (('MatrixBuilder', builder_frame), ('Camera.mvp', camera_frame)):
+        results = [measure_allocations(frame, count) for count in (calls, 10 * calls)]
+        allocates = any(abs(retained) > retained_tolerance or peak > peak_tolerance for retained, peak in results)
+        print(f'{name:>14}: {results[0][0]:5d} and {results[1][0]:5d} bytes retained, '
+              f'{max(peak for _, peak in results):5d} bytes scratch peak, '
+              f'{"allocates" if allocates else "no allocations"}')
+
+
+def benchmark_batch(count=10000, repeat=5):
+    """Compares the batched matrix functions with a python loop over the single camera functions
+
+    :param count: number of cameras
+    :type count: int
+    :param repeat: number of timed runs, the best run is reported
+    :type repeat: int
+    """
+    import timeit
+
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(-10, 10, (count, 3))
+    targets = rng.uniform(-10, 10, (count, 3))
+    fov = rng.uniform(30, 90, count)
+    aspect = rng.uniform(0.5, 2, count)
+    z_near = rng.uniform(0.1, 1, count)
+    z_far = rng.uniform(10, 100, count)
+
+    cases = [('look_at', lambda: [look_at(p, t, [0, 1, 0]) for p, t in zip(positions, targets)],
+                         lambda: look_at_batch(positions, targets, [0, 1, 0])),
+             ('perspective', lambda: [perspective(*args) for args in zip(fov, aspect, z_near, z_far)],
+                             lambda: perspective_batch(fov, aspect, z_near, z_far)),
+             ('orthographic', lambda: [orthographic(*args) for args in zip(fov, aspect, z_near, z_far)],
+                              lambda: orthographic_batch(fov, aspect, z_near, z_far))]
+
+    print(f'{count} cameras, best of {repeat} runs')
+    for name, loop, batch in cases:
+        if not np.array_equal(np.array(loop()), batch()):
+            raise ValueError(f'{name}_batch does not match {name}')
+        loop_time = min(timeit.repeat(loop, number=1, repeat=repeat))
+        batch_time = min(timeit.repeat(batch, number=1, repeat=repeat))
+        print(f'{name:>12}: loop {loop_time * 1000:8.2f} ms, batch {batch_time * 1000:8.2f} ms, '
+              f'speed up {loop_time / batch_time:6.1f}x')
+
+
+def benchmark_culling(count=1000000, loop_count=10000, repeat=5):
+    """Compares culling bounding spheres and boxes against the frustum with cull_spheres and cull_boxes
+    and with a python loop over each object, the loop is timed on fewer objects and scaled
+
+    :param count: number of objects
+    :type count: int
+    :param loop_count: number of objects tested with the loop
+    :type loop_count: int
+    :param repeat: number of timed runs, the best run is reported
+    :type repeat: int
+    """
+    import timeit
+
+    rng = np.random.default_rng(0)
+    centres = rng.uniform(-100, 100, (count, 3)).astype(np.float32)
+    radii = rng.uniform(0.1, 2, (count, 1)).astype(np.float32)
+    spheres = np.hstack([centres, radii])
+    boxes = np.hstack([centres - radii, centres + radii])
+    planes = frustum_planes(perspective(45.0, 4.0 / 3.0, 0.1, 100.0) @ look_at([0, 1, 0], [1, 1, -1], [0, 1, 0]))
+
+    def loop_spheres():
+        return [all(plane[:3] @ sphere[:3] + plane[3] >= -sphere[3] for plane in planes)
+                for sphere in spheres[:loop_count]]
+
+    def loop_boxes():
+        return [all(plane[:3] @ np.where(plane[:3] > 0, box[3:], box[:3]) + plane[3] >= 0 for plane in planes)
+                for box in boxes[:loop_count]]
+
+    print(f'{count} objects, best of {repeat} runs')
+    for name, loop, batch in (('spheres', loop_spheres, lambda: cull_spheres(planes, spheres)),
+                              ('boxes', loop_boxes, lambda: cull_boxes(planes, boxes))):
+        mask = batch()
+        if not np.array_equal(np.array(loop()), mask[:loop_count]):
+            raise ValueError(f'cull_{name} does not match the loop')
+        loop_time = min(timeit.repeat(loop, number=1, repeat=1)) * count / loop_count
+        batch_time = min(timeit.repeat(batch, number=1, repeat=repeat))
+        print(f'{name:>12}: loop {loop_time * 1000:10.1f} ms, batch {batch_time * 1000:8.2f} ms, '
+              f'speed up {loop_time / batch_time:6.1f}x, {mask.sum()} visible')
+
+
+if __name__ == "__main__":
+    benchmark_batch()
+    benchmark_culling()
+    benchmark_allocations()
@@ -0,0 +1,71 @@
+import sys
+from OpenGL import GL
+from PyQt6 import QtOpenGLWidgets, QtWidgets, QtGui
+from text import GlyphAtlas, Text, create_text_program
+
+
+class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
+    def __init__(self, parent=None):
+        self.parent = parent
+        super().__init__(parent)
+        self.frame = 0
+
+    def initializeGL(self):
+        GL.glClearColor(0.0, 0.0, 0.4, 0.0)
+
+        # Create and compile our GLSL program from the shaders
+        self.program = create_text_program()
+        locations = (GL.glGetAttribLocation(self.program.id, "vertexPos"),
+                     GL.glGetAttribLocation(self.program.id, "vertexUV"))
+
+        # Each glyph is rasterized once into the shared atlas, the texts only hold a quad per glyph
+        self.atlas = GlyphAtlas()
+        self.font = QtGui.QFont("Times", 10)
+        self.title = Text(self.atlas, self.font, locations, 'This is just a test')
+        self.counter = Text(self.atlas, self.font, locations)
+
+    def paintGL(self):
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+        # Enable Transparency
+        GL.glEnable(GL.GL_BLEND)
+        GL.glBlendFunc(GL.GL_SRC_ALPHA, GL.GL_ONE_MINUS_SRC_ALPHA)
+        # Use our shader
+        self.program.use()
+
+        self.program.setUniform("scale", [2.0/self.width(), -2.0/self.height()])
+        self.program.setUniform("colour", [0, 1, 0, 1])
+        # Set our atlas sampler to user Texture Unit 0
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        self.program.setUniform("atlas", 0)
+
+        self.program.setUniform("position", [10, 10, 0])
+        self.title.draw()
+
+        # Changing the text only rewrites the vertices of the counter, the digits are already in the atlas
+        self.frame += 1
+        self.counter.setText(f'Frame {self.frame}')
+        self.program.setUniform("position", [10, 30, 0])
+        self.counter.draw()
+
+        GL.glDisable(GL.GL_BLEND)
+        self.update()
+
+
+class MainWindow(QtWidgets.QMainWindow):
+    def __init__(self):
+        super().__init__()
+
+        self.resize(500, 500)
+        self.setWindowTitle('Glyph Atlas')
+
+        self.glWidget = GLWidget(self)
+        self.setCentralWidget(self.glWidget)
+
+
+if __name__ == "__main__":
+    app = QtWidgets.QApplication(sys.argv)
+
+    window = MainWindow()
+    window.show()
+
+    sys.exit(app.exec())
@@ -0,0 +1,76 @@
+import colorsys
+import sys
+from OpenGL import GL
+from PyQt6 import QtOpenGLWidgets, QtWidgets, QtGui
+from text import GlyphAtlas, TextBatch, create_batch_program
+
+COLUMNS, ROWS = 10, 40
+
+
+class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
+    def __init__(self, parent=None):
+        self.parent = parent
+        super().__init__(parent)
+        self.frame = 0
+
+    def initializeGL(self):
+        GL.glClearColor(0.0, 0.0, 0.4, 0.0)
+
+        # Create and compile our GLSL program from the shaders
+        self.program = create_batch_program()
+        locations = (GL.glGetAttribLocation(self.program.id, "vertexPos"),
+                     GL.glGetAttribLocation(self.program.id, "vertexUV"),
+                     GL.glGetAttribLocation(self.program.id, "vertexColour"))
+
+        # All labels share one vertex buffer and are drawn with a single draw call
+        self.batch = TextBatch(GlyphAtlas(), locations)
+        font = QtGui.QFont("Times", 8)
+        self.labels = []
+        for row in range(ROWS):
+            for column in range(COLUMNS):
+                colour = (*colorsys.hsv_to_rgb(row / ROWS, 0.6, 1.0), 1.0)
+                label = self.batch.add(f'{row * COLUMNS + column:04d}', (10 + column * 48, 10 + row * 12), font,
+                                       colour)
+                self.labels.append(label)
+
+    def paintGL(self):
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+        # Enable Transparency
+        GL.glEnable(GL.GL_BLEND)
+        GL.glBlendFunc(GL.GL_SRC_ALPHA, GL.GL_ONE_MINUS_SRC_ALPHA)
+        # Use our shader
+        self.program.use()
+
+        self.program.setUniform("scale", [2.0/self.width(), -2.0/self.height()])
+        # Set our atlas sampler to user Texture Unit 0
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        self.program.setUniform("atlas", 0)
+
+        # A few labels change every frame, only their ranges of the vertex buffer are uploaded
+        self.frame += 1
+        for index in range(self.frame % 7, len(self.labels), 97):
+            self.batch.setText(self.labels[index], f'{self.frame % 10000:04d}')
+        self.batch.draw()
+
+        GL.glDisable(GL.GL_BLEND)
+        self.update()
+
+
+class MainWindow(QtWidgets.QMainWindow):
+    def __init__(self):
+        super().__init__()
+
+        self.resize(500, 500)
+        self.setWindowTitle('Text Batch')
+
+        self.glWidget = GLWidget(self)
+        self.setCentralWidget(self.glWidget)
+
+
+if __name__ == "__main__":
+    app = QtWidgets.QApplication(sys.argv)
+
+    window = MainWindow()
+    window.show()
+
+    sys.exit(app.exec())
@@ -0,0 +1,69 @@
+import sys
+from OpenGL import GL
+from PyQt6 import QtOpenGLWidgets, QtWidgets, QtGui
+from text import SDFGlyphAtlas, Text, create_text_program
+
+SIZES = (8, 12, 18, 28, 42, 64)
+
+
+class GLWidget(QtOpenGLWidgets.QOpenGLWidget):
+    def __init__(self, parent=None):
+        self.parent = parent
+        super().__init__(parent)
+
+    def initializeGL(self):
+        GL.glClearColor(0.0, 0.0, 0.4, 0.0)
+
+        # Create and compile our GLSL program from the shaders, the SDF fragment shader rebuilds the edges
+        self.program = create_text_program(sdf=True)
+        locations = (GL.glGetAttribLocation(self.program.id, "vertexPos"),
+                     GL.glGetAttribLocation(self.program.id, "vertexUV"))
+
+        # Every size is drawn from the same distance field glyphs, each glyph is only rasterized once
+        self.atlas = SDFGlyphAtlas()
+        self.texts = []
+        y = 10
+        for size in SIZES:
+            font = QtGui.QFont("Times", size)
+            self.texts.append((Text(self.atlas, font, locations, 'This is just a test'), y))
+            y += QtGui.QFontMetrics(font).lineSpacing()
+
+    def paintGL(self):
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+        # Enable Transparency
+        GL.glEnable(GL.GL_BLEND)
+        GL.glBlendFunc(GL.GL_SRC_ALPHA, GL.GL_ONE_MINUS_SRC_ALPHA)
+        # Use our shader
+        self.program.use()
+
+        self.program.setUniform("scale", [2.0/self.width(), -2.0/self.height()])
+        self.program.setUniform("colour", [0, 1, 0, 1])
+        # Set our atlas sampler to user Texture Unit 0
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        self.program.setUniform("atlas", 0)
+
+        for text, y in self.texts:
+            self.program.setUniform("position", [10, y, 0])
+            text.draw()
+
+        GL.glDisable(GL.GL_BLEND)
+
+
+class MainWindow(QtWidgets.QMainWindow):
+    def __init__(self):
+        super().__init__()
+
+        self.resize(500, 500)
+        self.setWindowTitle('SDF Text')
+
+        self.glWidget = GLWidget(self)
+        self.setCentralWidget(self.glWidget)
+
+
+if __name__ == "__main__":
+    app = QtWidgets.QApplication(sys.argv)
+
+    window = MainWindow()
+    window.show()
+
+    sys.exit(app.exec())
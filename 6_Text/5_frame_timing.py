@@ -0,0 +1,34 @@
+import importlib
+import sys
+from PyQt6 import QtWidgets, QtCore
+from profiler import instrument
+
+# The GLWidget of the text batch demo is measured without changing it, its paintGL is wrapped by the profiler
+text_batch = importlib.import_module('3_text_batch')
+GLWidget = instrument(text_batch.GLWidget)
+
+
+class MainWindow(QtWidgets.QMainWindow):
+    def __init__(self):
+        super().__init__()
+
+        self.resize(500, 500)
+        self.setWindowTitle('Frame Timing [Press C or J to export the frame times]')
+
+        self.glWidget = GLWidget(self)
+        self.setCentralWidget(self.glWidget)
+
+    def keyPressEvent(self, event):
+        if event.key() == QtCore.Qt.Key.Key_C:
+            self.glWidget.profiler.export('frame_timing.csv')
+        elif event.key() == QtCore.Qt.Key.Key_J:
+            self.glWidget.profiler.export('frame_timing.json')
+
+
+if __name__ == "__main__":
+    app = QtWidgets.QApplication(sys.argv)
+
+    window = MainWindow()
+    window.show()
+
+    sys.exit(app.exec())
@@ -0,0 +1,18 @@
+"""
+Adds the directories of the chapters whose modules this chapter uses to the module search path. The chapters
+are directories of scripts run from their own directory rather than packages, so their modules are found
+through the path. Import it before the modules of the other chapters:
+
+Example:
+    import chapters
+    from program import program_cache
+"""
+import os
+import sys
+
+CHAPTERS = ('2_Shaders', '4_3D')
+
+for chapter in CHAPTERS:
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', chapter)
+    if path not in sys.path:
+        sys.path.append(path)
@@ -0,0 +1,351 @@
+"""
+Classes and functions for measuring the CPU and GPU time of frames and showing them in a text overlay
+"""
+import csv
+import ctypes
+import json
+import os
+import timeit
+from collections import deque
+from itertools import islice
+import numpy as np
+from OpenGL import GL
+from OpenGL.raw.GL.VERSION.GL_3_3 import glGetQueryObjectui64v
+from PyQt6 import QtGui
+from text import GlyphAtlas, Text, create_text_program
+import chapters
+from mesh import GLCallCounter
+
+PERCENTILES = (50, 95, 99)
+RECORD_FIELDS = ('frame', 'interval_ms', 'cpu_ms', 'gpu_ms', 'gl_calls')
+
+
+class GPUTimer:
+    """Measures the GPU time of frames with GL_TIME_ELAPSED queries. The queries are used as a ring and their
+    results are read once available, a few frames later, so reading them never waits for the GPU. A frame is
+    not timed if every query is still waiting for its result. Results longer than the time since their query
+    began are discarded, Mesa's llvmpipe returns a timestamp instead of the elapsed time for the first query
+    that contains rendering in a context.
+
+    :param queries: number of queries in the ring
+    :type queries: int
+    """
+    def __init__(self, queries=4):
+        self.free = list(np.atleast_1d(GL.glGenQueries(queries)))
+        self.pending = deque()
+        self.active = None
+        self.skipped = 0
+        self.invalid = 0
+
+    def begin(self, frame):
+        """Starts timing the GPU commands of a frame
+
+        :param frame: number of frame
+        :type frame: int
+        """
+        if not self.free:
+            self.skipped += 1
+            return
+        self.active = (frame, self.free.pop(), timeit.default_timer())
+        GL.glBeginQuery(GL.GL_TIME_ELAPSED, self.active[1])
+
+    def end(self):
+        """Stops timing the frame started with begin"""
+        if self.active is not None:
+            GL.glEndQuery(GL.GL_TIME_ELAPSED)
+            self.pending.append(self.active)
+            self.active = None
+
+    def results(self):
+        """Gets the GPU times of the frames whose queries have their results, oldest first
+
+        :return: generator of frame number and GPU time in milliseconds
+        :rtype: Generator[Tuple[int, float]]
+        """
+        elapsed = ctypes.c_uint64()
+        while self.pending:
+            frame, query, start = self.pending[0]
+            if not GL.glGetQueryObjectiv(query, GL.GL_QUERY_RESULT_AVAILABLE):
+                break
+            self.pending.popleft()
+            # The PyOpenGL wrapper of glGetQueryObjectui64v fails to create its output array, the raw function is used
+            glGetQueryObjectui64v(query, GL.GL_QUERY_RESULT, ctypes.byref(elapsed))
+            self.free.append(query)
+            gpu = elapsed.value / 1e6
+            if gpu > (timeit.default_timer() - start) * 1000:
+                self.invalid += 1
+                continue
+            yield frame, gpu
+
+    def delete(self):
+        """Deletes the queries, a GL context must be current"""
+        queries = self.free + [query for _, query, _ in self.pending]
+        GL.glDeleteQueries(len(queries), queries)
+        self.free = []
+        self.pending.clear()
+
+
+def percentiles(values):
+    """Computes the percentiles in PERCENTILES and the mean of a sequence of values
+
+    :param values: values e.g. frame times
+    :type values: Sequence[float]
+    :return: percentile name (e.g. p95) or mean to value, empty if there are no values
+    :rtype: Dict[str, float]
+    """
+    if not values:
+        return {}
+    values = np.asarray(values, np.float64)
+    summary = {f'p{percentile}': float(value) for percentile, value in zip(PERCENTILES,
+                                                                          np.percentile(values, PERCENTILES))}
+    summary['mean'] = float(values.mean())
+    return summary
+
+
+class FrameProfiler:
+    """Records the time between frames, the CPU time of paintGL, the GPU time of its commands and the number
+    of GL calls it makes. The code to measure is run in a with block, or between begin() and end(), e.g. by
+    instrument. The last history frames are kept for export, so memory stays flat however long the session,
+    and the rolling percentiles are computed from the last window of them.
+
+    Counting GL calls with GLCallCounter costs a few milliseconds, so calls are counted on one frame every
+    call_interval frames and the CPU time of that frame is not recorded.
+
+    :param window: number of frames in the rolling statistics
+    :type window: int
+    :param history: number of frames kept for export, at least window frames are kept
+    :type history: int
+    :param queries: number of GPU timer queries, 0 disables GPU timing
+    :type queries: int
+    :param call_interval: number of frames between frames whose GL calls are counted, 0 disables counting
+    :type call_interval: int
+    """
+    def __init__(self, window=300, history=100000, queries=4, call_interval=60):
+        self.gpu_timer = GPUTimer(queries) if queries else None
+        self.call_interval = call_interval
+        self.window = window
+        self.records = deque(maxlen=max(history, window))
+        self.frame = 0
+        self.start = None
+        self.last_start = None
+        self.counter = None
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, *exc):
+        self.end()
+
+    def begin(self):
+        """Starts measuring a frame, a GL context must be current. end must be called even if the measured code
+        raises, as the GL functions stay wrapped by the call counter until then, so prefer using the profiler
+        as a context manager:
+
+        Example:
+            with profiler:
+                paint()
+        """
+        self.start = timeit.default_timer()
+        if self.gpu_timer is not None:
+            self.gpu_timer.begin(self.frame)
+        if self.call_interval and self.frame % self.call_interval == 0:
+            self.counter = GLCallCounter().__enter__()
+
+    def end(self):
+        """Stops measuring the frame started with begin and collects the GPU times that are ready"""
+        calls = None
+        if self.counter is not None:
+            self.counter.__exit__(None, None, None)
+            calls = self.counter.total
+            self.counter = None
+        end = timeit.default_timer()
+        if self.gpu_timer is not None:
+            self.gpu_timer.end()
+
+        cpu = None if calls is not None else (end - self.start) * 1000
+        interval = None if self.last_start is None else (self.start - self.last_start) * 1000
+        self.last_start = self.start
+        self.records.append([self.frame, interval, cpu, None, calls])
+        self.frame += 1
+
+        if self.gpu_timer is not None:
+            for frame, gpu in self.gpu_timer.results():
+                # The records are consecutive frames, results of frames no longer kept are skipped
+                index = frame - self.records[0][0]
+                if index >= 0:
+                    self.records[index][3] = gpu
+
+    def summary(self):
+        """Gets the rolling percentiles and mean of each measurement over the last window frames
+
+        :return: measurement name e.g. cpu_ms to its statistics, see percentiles
+        :rtype: Dict[str, Dict[str, float]]
+        """
+        recent = list(islice(self.records, max(len(self.records) - self.window, 0), None))
+        return {name: percentiles([record[index] for record in recent if record[index] is not None])
+                for index, name in enumerate(RECORD_FIELDS[1:], 1)}
+
+    def export(self, path):
+        """Writes the kept frames to a CSV file, or to a JSON file with the summary, for regression tracking.
+        Measurements a frame does not have are empty in the CSV file and null in the JSON file.
+
+        :param path: path of .csv or .json file
+        :type path: str
+        :raises ValueError: if the extension is not .csv or .json
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            with open(path, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(RECORD_FIELDS)
+                writer.writerows(['' if value is None else value for value in record] for record in self.records)
+        elif extension == '.json':
+            with open(path, 'w') as file:
+                json.dump({'summary': self.summary(),
+                           'frames': [dict(zip(RECORD_FIELDS, record)) for record in self.records]}, file, indent=1)
+        else:
+            raise ValueError(f'Unknown export format: {path}')
+
+    def delete(self):
+        """Deletes the GPU timer queries, a GL context must be current"""
+        if self.gpu_timer is not None:
+            self.gpu_timer.delete()
+            self.gpu_timer = None
+
+
+class ProfilerOverlay:
+    """Draws the rolling statistics of a FrameProfiler as text on a dark backdrop in the top left of the widget.
+    The text is laid out again every refresh frames so the overlay costs one small draw call on the other frames.
+
+    :param font: font of overlay, None uses the fixed width system font so the columns line up
+    :type font: Union[QtGui.QFont, None]
+    :param refresh: number of frames between text updates
+    :type refresh: int
+    """
+    def __init__(self, font=None, refresh=15):
+        self.font = QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.SystemFont.FixedFont) if font is None else font
+        self.metrics = QtGui.QFontMetrics(self.font)
+        self.refresh = refresh
+        self.margin = 8
+        self.program = create_text_program()
+        locations = (GL.glGetAttribLocation(self.program.id, "vertexPos"),
+                     GL.glGetAttribLocation(self.program.id, "vertexUV"))
+        self.atlas = GlyphAtlas()
+        self.text = Text(self.atlas, self.font, locations)
+
+    def format(self, profiler):
+        """Formats the statistics of a profiler, one line per measurement
+
+        :param profiler: frame profiler
+        :type profiler: FrameProfiler
+        :return: text of overlay
+        :rtype: str
+        """
+        lines = [f'{"":<12}' + ''.join(f'{f"p{percentile}":>8}' for percentile in PERCENTILES)]
+        for name, stats in profiler.summary().items():
+            if stats:
+                lines.append(f'{name:<12}' + ''.join(f'{stats[f"p{percentile}"]:8.2f}' for percentile in PERCENTILES))
+        return '\n'.join(lines)
+
+    def draw(self, profiler, width, height):
+        """Draws the overlay on top of the frame. The GL state it changes is restored afterwards: the clear
+        colour, the scissor test and box, blending and the blend function, the depth test, the bound program,
+        vertex array object, array buffer and active texture unit, and the texture bound to unit 0. The unpack
+        alignment is left at its default of 4 by the atlas.
+
+        :param profiler: frame profiler
+        :type profiler: FrameProfiler
+        :param width: width of widget
+        :type width: int
+        :param height: height of widget
+        :type height: int
+        """
+        clear_colour = GL.glGetFloatv(GL.GL_COLOR_CLEAR_VALUE)
+        scissor_test = GL.glIsEnabled(GL.GL_SCISSOR_TEST)
+        scissor_box = GL.glGetIntegerv(GL.GL_SCISSOR_BOX)
+        blend = GL.glIsEnabled(GL.GL_BLEND)
+        blend_func = [GL.glGetIntegerv(name) for name in (GL.GL_BLEND_SRC_RGB, GL.GL_BLEND_DST_RGB,
+                                                          GL.GL_BLEND_SRC_ALPHA, GL.GL_BLEND_DST_ALPHA)]
+        depth_test = GL.glIsEnabled(GL.GL_DEPTH_TEST)
+        program = GL.glGetIntegerv(GL.GL_CURRENT_PROGRAM)
+        vertex_array = GL.glGetIntegerv(GL.GL_VERTEX_ARRAY_BINDING)
+        array_buffer = GL.glGetIntegerv(GL.GL_ARRAY_BUFFER_BINDING)
+        active_texture = GL.glGetIntegerv(GL.GL_ACTIVE_TEXTURE)
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        texture = GL.glGetIntegerv(GL.GL_TEXTURE_BINDING_2D)
+        # Laying out the text binds its vertex array and buffers
+        if profiler.frame % self.refresh == 1 or self.text.text == '':
+            self.text.setText(self.format(profiler))
+
+        # The backdrop is cleared with the scissor test so it needs no geometry, the scissor box has its
+        # origin in the bottom left
+        lines = self.text.text.split('\n')
+        backdrop_width = max(self.metrics.horizontalAdvance(line) for line in lines) + 2 * self.margin
+        backdrop_height = len(lines) * self.metrics.lineSpacing() + 2 * self.margin
+        GL.glEnable(GL.GL_SCISSOR_TEST)
+        GL.glScissor(0, height - backdrop_height, backdrop_width, backdrop_height)
+        GL.glClearColor(0.0, 0.0, 0.0, 1.0)
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT)
+        GL.glDisable(GL.GL_SCISSOR_TEST)
+
+        GL.glEnable(GL.GL_BLEND)
+        GL.glDisable(GL.GL_DEPTH_TEST)
+        GL.glBlendFunc(GL.GL_SRC_ALPHA, GL.GL_ONE_MINUS_SRC_ALPHA)
+        self.program.use()
+        self.program.setUniform("scale", [2.0/width, -2.0/height])
+        self.program.setUniform("colour", [1, 1, 0, 1])
+        self.program.setUniform("position", [self.margin, self.margin, 0])
+        self.program.setUniform("atlas", 0)
+        self.text.draw()
+
+        GL.glClearColor(*clear_colour)
+        if scissor_test:
+            GL.glEnable(GL.GL_SCISSOR_TEST)
+        GL.glScissor(*scissor_box)
+        if not blend:
+            GL.glDisable(GL.GL_BLEND)
+        GL.glBlendFuncSeparate(*blend_func)
+        if depth_test:
+            GL.glEnable(GL.GL_DEPTH_TEST)
+        GL.glUseProgram(program)
+        GL.glBindVertexArray(vertex_array)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, array_buffer)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, texture)
+        GL.glActiveTexture(active_texture)
+
+    def delete(self):
+        """Deletes the text and the atlas, the program belongs to the program cache"""
+        self.text.delete()
+        self.atlas.delete()
+
+
+def instrument(widget_class, overlay=True, **kwargs):
+    """Creates a subclass of a GLWidget whose paintGL is measured by a FrameProfiler (the profiler attribute)
+    and, optionally, followed by a ProfilerOverlay. Works for any QOpenGLWidget subclass with initializeGL and
+    paintGL, including with the HeadlessRenderer for measuring in batch jobs.
+
+    :param widget_class: class of widget to instrument
+    :type widget_class: Type[QtOpenGLWidgets.QOpenGLWidget]
+    :param overlay: indicates the statistics are drawn on top of the frames
+    :type overlay: bool
+    :param kwargs: arguments of FrameProfiler
+    :type kwargs: Dict[str, Any]
+    :return: instrumented widget class
+    :rtype: Type[QtOpenGLWidgets.QOpenGLWidget]
+    """
+    class InstrumentedWidget(widget_class):
+        def initializeGL(self):
+            super().initializeGL()
+            self.profiler = FrameProfiler(**kwargs)
+            self.overlay = ProfilerOverlay() if overlay else None
+
+        def paintGL(self):
+            with self.profiler:
+                super().paintGL()
+            if self.overlay is not None:
+                self.overlay.draw(self.profiler, self.width(), self.height())
+
+    InstrumentedWidget.__name__ = f'Instrumented{widget_class.__name__}'
+    InstrumentedWidget.__qualname__ = InstrumentedWidget.__name__
+    return InstrumentedWidget
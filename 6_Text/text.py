@@ -0,0 +1,1285 @@
+"""
+Classes and functions for drawing text with glyphs packed into a shared texture atlas
+"""
+import os
+import sys
+import timeit
+from collections import OrderedDict
+import numpy as np
+from OpenGL import GL
+from PyQt6 import QtCore, QtGui
+import chapters
+from program import program_cache
+from mesh import GLCallCounter, Mesh
+
+
+# The vertex positions are in pixels from the top left of the widget and the UVs are in texels of the
+# atlas, so the vertices stay valid when the atlas texture grows
+TEXT_VERTEX_SHADER = """
+#version 330
+
+in vec2 vertexPos;
+in vec2 vertexUV;
+uniform vec2 scale;
+uniform vec3 position;
+uniform sampler2D atlas;
+out vec2 outUV;
+
+void main()
+{
+    outUV = vertexUV / vec2(textureSize(atlas, 0));
+    float x = ((position.x + vertexPos.x) * scale.x) - 1.0;
+    float y = ((position.y + vertexPos.y) * scale.y) + 1.0;
+    gl_Position = vec4(x, y, position.z, 1.0);
+}
+"""
+
+TEXT_FRAGMENT_SHADER = """
+#version 330
+
+in vec2 outUV;
+uniform sampler2D atlas;
+uniform vec4 colour;
+out vec4 fragColour;
+
+void main()
+{
+    // The atlas only stores coverage which is sampled as alpha
+    fragColour = colour * texture(atlas, outUV);
+}
+"""
+
+# Labels in a batch have their position and size baked into the vertices and a colour per vertex so
+# all labels are drawn with the same uniforms
+BATCH_VERTEX_SHADER = """
+#version 330
+
+in vec2 vertexPos;
+in vec2 vertexUV;
+in vec4 vertexColour;
+uniform vec2 scale;
+uniform sampler2D atlas;
+out vec2 outUV;
+out vec4 outColour;
+
+void main()
+{
+    outUV = vertexUV / vec2(textureSize(atlas, 0));
+    outColour = vertexColour;
+    gl_Position = vec4(vertexPos.x * scale.x - 1.0, vertexPos.y * scale.y + 1.0, 0.0, 1.0);
+}
+"""
+
+BATCH_FRAGMENT_SHADER = """
+#version 330
+
+in vec2 outUV;
+in vec4 outColour;
+uniform sampler2D atlas;
+out vec4 fragColour;
+
+void main()
+{
+    fragColour = outColour * texture(atlas, outUV);
+}
+"""
+
+# Fragment shaders for SDF atlases, the atlas stores the signed distance to the glyph outline mapped so
+# the outline is at 0.5 and the edge is antialiased over the width of a screen pixel at any text size
+TEXT_SDF_FRAGMENT_SHADER = """
+#version 330
+
+in vec2 outUV;
+uniform sampler2D atlas;
+uniform vec4 colour;
+out vec4 fragColour;
+
+void main()
+{
+    float distance = texture(atlas, outUV).a;
+    float width = fwidth(distance);
+    fragColour = vec4(colour.rgb, colour.a * smoothstep(0.5 - width, 0.5 + width, distance));
+}
+"""
+
+BATCH_SDF_FRAGMENT_SHADER = """
+#version 330
+
+in vec2 outUV;
+in vec4 outColour;
+uniform sampler2D atlas;
+out vec4 fragColour;
+
+void main()
+{
+    float distance = texture(atlas, outUV).a;
+    float width = fwidth(distance);
+    fragColour = vec4(outColour.rgb, outColour.a * smoothstep(0.5 - width, 0.5 + width, distance));
+}
+"""
+
+VERTEX_TYPE = np.dtype([('position', np.float32, (2,)), ('uv', np.float32, (2,))])
+
+BATCH_VERTEX_TYPE = np.dtype([('position', np.float32, (2,)), ('uv', np.float32, (2,)),
+                              ('colour', np.float32, (4,))])
+
+# Corners of a glyph quad in the order used by quad_indices
+QUAD_CORNERS = np.array([[0, 0], [0, 1], [1, 0], [1, 1]], np.float32)
+
+
+def quad_indices(count):
+    """Computes the element indices for drawing quads of 4 vertices as 2 triangles each
+
+    :param count: number of quads
+    :type count: int
+    :return: 6 indices per quad
+    :rtype: np.ndarray
+    """
+    return (np.array([0, 1, 2, 1, 2, 3], np.uint32) + 4 * np.arange(count, dtype=np.uint32)[:, None]).ravel()
+
+
+def create_text_program(sdf=False):
+    """Gets the shader program for drawing text from a glyph atlas from the program cache, a GL context
+    must be current
+
+    :param sdf: indicates the program is for an SDFGlyphAtlas
+    :type sdf: bool
+    :return: text shader program
+    :rtype: Program
+    """
+    fragment_shader = TEXT_SDF_FRAGMENT_SHADER if sdf else TEXT_FRAGMENT_SHADER
+    return program_cache.get([(TEXT_VERTEX_SHADER, GL.GL_VERTEX_SHADER), (fragment_shader, GL.GL_FRAGMENT_SHADER)])
+
+
+def create_batch_program(sdf=False):
+    """Gets the shader program for drawing a text batch from a glyph atlas from the program cache, a GL
+    context must be current
+
+    :param sdf: indicates the program is for an SDFGlyphAtlas
+    :type sdf: bool
+    :return: text batch shader program
+    :rtype: Program
+    """
+    fragment_shader = BATCH_SDF_FRAGMENT_SHADER if sdf else BATCH_FRAGMENT_SHADER
+    return program_cache.get([(BATCH_VERTEX_SHADER, GL.GL_VERTEX_SHADER), (fragment_shader, GL.GL_FRAGMENT_SHADER)])
+
+
+class Glyph:
+    """Location of a rasterized glyph in the atlas and its metrics in pixels
+
+    :param x: left of the glyph bitmap in the atlas
+    :type x: int
+    :param y: top of the glyph bitmap in the atlas
+    :type y: int
+    :param width: width of the glyph bitmap, zero for glyphs with nothing to draw e.g. space
+    :type width: int
+    :param height: height of the glyph bitmap
+    :type height: int
+    :param left: horizontal offset of the bitmap from the pen position
+    :type left: int
+    :param top: vertical offset of the bitmap from the baseline
+    :type top: int
+    :param advance: horizontal distance to the next pen position
+    :type advance: int
+    """
+    def __init__(self, x, y, width, height, left, top, advance):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.left = left
+        self.top = top
+        self.advance = advance
+
+
+class GlyphAtlas:
+    """Rasterizes each (font, size, character) once with QPainter and packs the glyphs into rows
+    (shelves) of a single channel texture shared by all text. The glyphs are rasterized into a copy of the
+    texture in memory and the rows added since the last upload are uploaded together when update is
+    called. The atlas doubles in height when it is full, the UVs of laid out text are in texels so they
+    stay valid.
+
+    :param width: width of the atlas texture
+    :type width: int
+    :param height: initial height of the atlas texture
+    :type height: int
+    :param padding: empty pixels around each glyph so neighbouring glyphs do not bleed when filtered
+    :type padding: int
+    """
+    def __init__(self, width=512, height=128, padding=1):
+        self.width = width
+        self.height = height
+        self.padding = padding
+        self.pixels = np.zeros((height, width), np.uint8)
+        self.fonts = {}
+        self.texture = None
+        self._shelf_x = 0
+        self._shelf_y = 0
+        self._shelf_height = 0
+        self._dirty_rows = None
+        self._resized = True
+
+    def metrics(self, font):
+        """Gets the cached font metrics of a font
+
+        :param font: font
+        :type font: QtGui.QFont
+        :return: metrics of font
+        :rtype: QtGui.QFontMetrics
+        """
+        return self._font(font.key(), font)[0]
+
+    def fontGlyphs(self, font):
+        """Gets the metrics of a font, its glyphs that are in the atlas and the scale from the glyph metrics
+        to the font size (always 1 as glyphs are rasterized at the font size). Layouts should look glyphs
+        up in the dictionary and only call glyph for missing characters as computing the font key is slow.
+
+        :param font: font
+        :type font: QtGui.QFont
+        :return: metrics of glyphs, dictionary of character to glyph and scale of the glyphs
+        :rtype: Tuple[QtGui.QFontMetrics, Dict[str, Glyph], float]
+        """
+        return self._font(font.key(), font)
+
+    def _font(self, key, font):
+        """Gets the cached metrics, glyph table and glyph scale of a font
+
+        :param key: key of font
+        :type key: str
+        :param font: font
+        :type font: QtGui.QFont
+        :return: metrics, glyph table and glyph scale of font
+        :rtype: Tuple[QtGui.QFontMetrics, Dict[str, Glyph], float]
+        """
+        entry = self.fonts.get(key)
+        if entry is None:
+            entry = (QtGui.QFontMetrics(font), {}, 1.0)
+            self.fonts[key] = entry
+        return entry
+
+    def glyph(self, font, character):
+        """Gets a glyph from the atlas, the glyph is rasterized into the atlas the first time it is used
+
+        :param font: font of the glyph
+        :type font: QtGui.QFont
+        :param character: character of the glyph
+        :type character: str
+        :return: glyph
+        :rtype: Glyph
+        """
+        metrics, table, _ = self._font(font.key(), font)
+        glyph = table.get(character)
+        if glyph is None:
+            glyph = self._rasterize(font, metrics, character)
+            table[character] = glyph
+        return glyph
+
+    def _rasterize(self, font, metrics, character):
+        """Draws a glyph into the in-memory copy of the atlas
+
+        :param font: font of the glyph
+        :type font: QtGui.QFont
+        :param metrics: metrics of the font
+        :type metrics: QtGui.QFontMetrics
+        :param character: character of the glyph
+        :type character: str
+        :return: glyph
+        :rtype: Glyph
+        """
+        rect = metrics.tightBoundingRect(character)
+        advance = metrics.horizontalAdvance(character)
+        if rect.isEmpty():
+            return Glyph(0, 0, 0, 0, 0, 0, advance)
+
+        # Antialiasing can cover one pixel outside the tight bounds
+        border = self.padding + 1
+        width = rect.width() + 2 * border
+        height = rect.height() + 2 * border
+        coverage = rasterize_glyph(font, character, border - rect.left(), border - rect.top(), width, height)
+
+        x, y = self._allocate(width, height)
+        self.pixels[y:y + height, x:x + width] = coverage
+        return Glyph(x, y, width, height, rect.left() - border, rect.top() - border, advance)
+
+    def _allocate(self, width, height):
+        """Finds space for a bitmap on the current shelf or starts a new shelf, the atlas is
+        doubled in height if there is no space left
+
+        :param width: width of bitmap
+        :type width: int
+        :param height: height of bitmap
+        :type height: int
+        :return: top left of the space in the atlas
+        :rtype: Tuple[int, int]
+        """
+        if width > self.width:
+            raise ValueError(f'Glyph of width {width} does not fit in an atlas of width {self.width}')
+
+        if self._shelf_x + width > self.width:
+            self._shelf_y += self._shelf_height
+            self._shelf_x = 0
+            self._shelf_height = 0
+
+        while self._shelf_y + height > self.height:
+            self.pixels = np.vstack((self.pixels, np.zeros_like(self.pixels)))
+            self.height *= 2
+            self._resized = True
+
+        x, y = self._shelf_x, self._shelf_y
+        self._shelf_x += width
+        self._shelf_height = max(self._shelf_height, height)
+
+        start, end = (y, y + height) if self._dirty_rows is None else self._dirty_rows
+        self._dirty_rows = (min(start, y), max(end, y + height))
+        return x, y
+
+    def update(self):
+        """Uploads the glyphs rasterized since the last update into the atlas texture, the texture
+        is created on the first call. A GL context must be current.
+
+        :return: indicates the texture was changed
+        :rtype: bool
+        """
+        if self.texture is None:
+            self.texture = GL.glGenTextures(1)
+            GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+            GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_EDGE)
+            GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP_TO_EDGE)
+            GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
+            GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
+            # Coverage is stored in red and sampled as white with alpha so the text colour is a uniform
+            swizzle = np.array([GL.GL_ONE, GL.GL_ONE, GL.GL_ONE, GL.GL_RED], np.int32)
+            GL.glTexParameteriv(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_SWIZZLE_RGBA, swizzle)
+        elif not self._resized and self._dirty_rows is None:
+            return False
+
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 1)
+        if self._resized:
+            GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_R8, self.width, self.height, 0, GL.GL_RED,
+                            GL.GL_UNSIGNED_BYTE, self.pixels)
+        else:
+            start, end = self._dirty_rows
+            GL.glTexSubImage2D(GL.GL_TEXTURE_2D, 0, 0, start, self.width, end - start, GL.GL_RED,
+                               GL.GL_UNSIGNED_BYTE, self.pixels[start:end])
+        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 4)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, GL.GL_FALSE)
+
+        self._resized = False
+        self._dirty_rows = None
+        return True
+
+    def delete(self):
+        """Deletes the atlas texture, a GL context must be current"""
+        if self.texture is not None:
+            GL.glDeleteTextures(1, [self.texture])
+            self.texture = None
+        self._resized = True
+
+
+def distance_transform(sites, limit):
+    """Computes the Euclidean distance from every pixel to the nearest site pixel with two separable
+    passes of the squared distance (columns then rows). Each pass takes the minimum over shifted copies of
+    the whole array for offsets up to the limit, so it is vectorized and exact for distances up to the limit.
+    Larger distances are returned as the limit.
+
+    :param sites: height x width mask of site pixels
+    :type sites: np.ndarray
+    :param limit: maximum distance in pixels
+    :type limit: int
+    :return: height x width array of distances
+    :rtype: np.ndarray
+    """
+    height, width = sites.shape
+    far = np.float32((limit + 1) ** 2)
+
+    padded = np.full((height + 2 * limit, width), far, np.float32)
+    padded[limit:limit + height][sites] = 0
+    columns = padded[limit:limit + height].copy()
+    for offset in range(1, limit + 1):
+        squared = np.float32(offset * offset)
+        np.minimum(columns, padded[limit - offset:limit - offset + height] + squared, out=columns)
+        np.minimum(columns, padded[limit + offset:limit + offset + height] + squared, out=columns)
+
+    padded = np.full((height, width + 2 * limit), far, np.float32)
+    padded[:, limit:limit + width] = columns
+    rows = columns.copy()
+    for offset in range(1, limit + 1):
+        squared = np.float32(offset * offset)
+        np.minimum(rows, padded[:, limit - offset:limit - offset + width] + squared, out=rows)
+        np.minimum(rows, padded[:, limit + offset:limit + offset + width] + squared, out=rows)
+
+    return np.sqrt(np.minimum(rows, np.float32(limit * limit)))
+
+
+def signed_distance_field(coverage, limit):
+    """Computes the signed distance from every pixel to the outline of a shape, positive inside the shape
+
+    :param coverage: height x width array of coverage, pixels above half coverage are inside
+    :type coverage: np.ndarray
+    :param limit: maximum distance in pixels
+    :type limit: int
+    :return: height x width array of signed distances
+    :rtype: np.ndarray
+    """
+    inside = coverage > 127
+    # The outline lies half a pixel from the centres of the pixels on either side of it
+    outside_distance = distance_transform(inside, limit) - 0.5
+    inside_distance = distance_transform(~inside, limit) - 0.5
+    return np.where(inside, inside_distance, -outside_distance)
+
+
+class SDFGlyphAtlas(GlyphAtlas):
+    """Glyph atlas of signed distance fields (SDF) which serves every size of a font from one set of
+    glyphs. Each glyph is rasterized once, at the base size times the upscale, and the signed distance
+    to its outline is computed at that resolution then averaged down to the base size. The distances within
+    spread pixels of the outline are stored so 0.5 is the outline, and the SDF fragment shaders
+    (create_text_program(sdf=True)) turn them back into an antialiased edge at any scale.
+
+    :param width: width of the atlas texture
+    :type width: int
+    :param height: initial height of the atlas texture
+    :type height: int
+    :param padding: empty pixels around each glyph so neighbouring glyphs do not bleed when filtered
+    :type padding: int
+    :param base_size: pixel size of the glyphs in the atlas
+    :type base_size: int
+    :param spread: distance in base size pixels covered by the field on each side of the outline
+    :type spread: int
+    :param upscale: factor of the base size at which glyphs are rasterized for the distance transform
+    :type upscale: int
+    """
+    def __init__(self, width=512, height=128, padding=1, base_size=32, spread=4, upscale=8):
+        super().__init__(width, height, padding)
+        self.base_size = base_size
+        self.spread = spread
+        self.upscale = upscale
+        self._tables = {}
+
+    def _baseFont(self, font, pixel_size):
+        """Copies a font with a different pixel size
+
+        :param font: font
+        :type font: QtGui.QFont
+        :param pixel_size: pixel size of the copy
+        :type pixel_size: int
+        :return: copy of font
+        :rtype: QtGui.QFont
+        """
+        base = QtGui.QFont(font)
+        base.setPixelSize(pixel_size)
+        return base
+
+    def _font(self, key, font):
+        """Gets the cached base size metrics and glyph table of a font and the scale from the base size
+        to the size of the font. Fonts that only differ in size share the glyph table.
+
+        :param key: key of font
+        :type key: str
+        :param font: font
+        :type font: QtGui.QFont
+        :return: metrics, glyph table and glyph scale of font
+        :rtype: Tuple[QtGui.QFontMetricsF, Dict[str, Glyph], float]
+        """
+        entry = self.fonts.get(key)
+        if entry is None:
+            base = self._baseFont(font, self.base_size)
+            metrics = QtGui.QFontMetricsF(base)
+            table = self._tables.setdefault(base.key(), {})
+            entry = (metrics, table, QtGui.QFontMetricsF(font).height() / metrics.height())
+            self.fonts[key] = entry
+        return entry
+
+    def _rasterize(self, font, metrics, character):
+        """Draws a glyph at high resolution and stores its signed distance field in the in-memory copy of
+        the atlas
+
+        :param font: font of the glyph
+        :type font: QtGui.QFont
+        :param metrics: base size metrics of the font
+        :type metrics: QtGui.QFontMetricsF
+        :param character: character of the glyph
+        :type character: str
+        :return: glyph in base size pixels
+        :rtype: Glyph
+        """
+        upscale = self.upscale
+        raster_font = self._baseFont(font, self.base_size * upscale)
+        raster_metrics = QtGui.QFontMetrics(raster_font)
+        rect = raster_metrics.tightBoundingRect(character)
+        advance = raster_metrics.horizontalAdvance(character) / upscale
+        if rect.isEmpty():
+            return Glyph(0, 0, 0, 0, 0, 0, advance)
+
+        # The field extends spread pixels beyond the outline, the raster is a whole number of base pixels
+        border = (self.spread + 1) * upscale
+        width = -(-(rect.width() + 2 * border) // upscale)
+        height = -(-(rect.height() + 2 * border) // upscale)
+        coverage = rasterize_glyph(raster_font, character, border - rect.left(), border - rect.top(),
+                                   width * upscale, height * upscale)
+
+        limit = self.spread * upscale
+        distance = signed_distance_field(coverage, limit)
+        distance = distance.reshape(height, upscale, width, upscale).mean(axis=(1, 3)) / upscale
+        field = np.clip(0.5 + distance / (2 * self.spread), 0, 1)
+
+        x, y = self._allocate(width + 2 * self.padding, height + 2 * self.padding)
+        x += self.padding
+        y += self.padding
+        self.pixels[y:y + height, x:x + width] = np.round(field * 255).astype(np.uint8)
+        return Glyph(x, y, width, height, (rect.left() - border) / upscale, (rect.top() - border) / upscale,
+                     advance)
+
+
+def rasterize_glyph(font, character, x, y, width, height):
+    """Draws an antialiased glyph into an array of coverage values
+
+    :param font: font of the glyph
+    :type font: QtGui.QFont
+    :param character: character of the glyph
+    :type character: str
+    :param x: horizontal pen position in the array
+    :type x: int
+    :param y: baseline position in the array
+    :type y: int
+    :param width: width of the array
+    :type width: int
+    :param height: height of the array
+    :type height: int
+    :return: height x width array of coverage
+    :rtype: np.ndarray
+    """
+    image = QtGui.QImage(width, height, QtGui.QImage.Format.Format_Alpha8)
+    image.fill(QtCore.Qt.GlobalColor.transparent)
+    painter = QtGui.QPainter()
+    painter.begin(image)
+    painter.setRenderHints(QtGui.QPainter.RenderHint.Antialiasing | QtGui.QPainter.RenderHint.TextAntialiasing)
+    painter.setFont(font)
+    painter.setPen(QtGui.QColor.fromRgbF(1, 1, 1))
+    painter.drawText(x, y, character)
+    painter.end()
+    return image_to_array(image)
+
+
+def image_to_array(image):
+    """Gets the pixels of a single channel image as an array without the row padding of the image
+
+    :param image: 8 bit single channel image e.g. Format_Alpha8
+    :type image: QtGui.QImage
+    :return: height x width array of pixels
+    :rtype: np.ndarray
+    """
+    pixels = np.frombuffer(image.constBits().asstring(image.sizeInBytes()), np.uint8)
+    return pixels.reshape(image.height(), image.bytesPerLine())[:, :image.width()]
+
+
+def rasterize_text(text, font, colour):
+    """Rasterizes a whole string into an image with QPainter
+
+    :param text: text to rasterize
+    :type text: str
+    :param font: font of text
+    :type font: QtGui.QFont
+    :param colour: colour of text
+    :type colour: QtGui.QColor
+    :return: RGBA image of the text and the vertices of a quad the size of the image
+    :rtype: Tuple[QtGui.QImage, List[float]]
+    """
+    metrics = QtGui.QFontMetrics(font)
+    rect = metrics.boundingRect(text)
+
+    # The glyph texture would typically be generated for each character (see GlyphAtlas) but QT helps
+    image = QtGui.QImage(rect.size(), QtGui.QImage.Format.Format_RGBA8888)
+    image.fill(QtCore.Qt.GlobalColor.transparent)
+    painter = QtGui.QPainter()
+    painter.begin(image)
+    painter.setRenderHints(QtGui.QPainter.RenderHint.Antialiasing | QtGui.QPainter.RenderHint.TextAntialiasing)
+    painter.setFont(font)
+    painter.setPen(colour)
+    painter.drawText(0, metrics.ascent(), text)
+    painter.end()
+
+    w = rect.width()
+    h = rect.height()
+    vertex = [0., 0., 0., 0., h, 0., w, 0., 0., w, h, 0.]
+
+    return image, vertex
+
+
+def layout_text(atlas, font, text, x=0.0, y=0.0):
+    """Lays out a string as one quad per visible glyph, glyphs that are not in the atlas are rasterized.
+    Glyphs are placed with their advances (kerning is not applied) and new lines start a line below.
+
+    :param atlas: glyph atlas
+    :type atlas: GlyphAtlas
+    :param font: font of text
+    :type font: QtGui.QFont
+    :param text: text to lay out
+    :type text: str
+    :param x: left of the text in pixels
+    :type x: float
+    :param y: top of the text in pixels
+    :type y: float
+    :return: 4 vertices per glyph quad, see VERTEX_TYPE
+    :rtype: np.ndarray
+    """
+    metrics, table, scale = atlas.fontGlyphs(font)
+    pen_x = x
+    baseline = y + metrics.ascent() * scale
+    quads = []
+    for character in text:
+        if character == '\n':
+            pen_x = x
+            baseline += metrics.lineSpacing() * scale
+            continue
+
+        glyph = table.get(character) or atlas.glyph(font, character)
+        if glyph.width:
+            quads.append((pen_x + glyph.left * scale, baseline + glyph.top * scale, glyph.x, glyph.y, glyph.width,
+                          glyph.height))
+        pen_x += glyph.advance * scale
+
+    # Each vertex is the position and UV of a corner, the float array is viewed as VERTEX_TYPE. The quad
+    # is scaled to the font size (for SDF glyphs) but the UVs cover the glyph bitmap
+    quads = np.array(quads, np.float32).reshape(-1, 1, 3, 2)
+    factors = np.array([[scale], [1.0]], np.float32)
+    vertices = quads[:, :, :2] + QUAD_CORNERS[:, None, :] * quads[:, :, 2:] * factors
+    return vertices.reshape(-1, 4).view(VERTEX_TYPE).ravel()
+
+
+class Text:
+    """String drawn as one quad per glyph with glyphs from an atlas. Changing the text rewrites the
+    vertices in the existing buffer, only glyphs that are new to the atlas are rasterized and uploaded.
+    The buffer is reallocated (doubling its capacity) when the text has more glyphs than fit.
+    A GL context must be current when the text is created or changed.
+
+    :param atlas: glyph atlas
+    :type atlas: GlyphAtlas
+    :param font: font of text
+    :type font: QtGui.QFont
+    :param locations: attribute locations of the vertex position and UV e.g. from create_text_program
+    :type locations: Tuple[int, int]
+    :param text: initial text
+    :type text: str
+    """
+    def __init__(self, atlas, font, locations, text=''):
+        self.atlas = atlas
+        self.font = font
+        self.locations = {'position': locations[0], 'uv': locations[1]}
+        self.capacity = 0
+        self.mesh = None
+        self.text = None
+        self.setText(text)
+
+    def setText(self, text):
+        """Changes the text, nothing is done if the text is the same
+
+        :param text: new text
+        :type text: str
+        """
+        if text == self.text:
+            return
+
+        self.text = text
+        vertices = layout_text(self.atlas, self.font, text)
+        count = len(vertices) // 4
+        if self.mesh is None or count > self.capacity:
+            self.capacity = max(count, 2 * self.capacity, 16)
+            if self.mesh is not None:
+                self.mesh.delete()
+            buffer = np.zeros(self.capacity * 4, VERTEX_TYPE)
+            buffer[:len(vertices)] = vertices
+            self.mesh = Mesh.fromVertices(buffer, self.locations, quad_indices(self.capacity),
+                                          usage=GL.GL_DYNAMIC_DRAW)
+        elif count:
+            self.mesh.updateVertices(vertices)
+        self.mesh.count = 6 * count
+
+    def draw(self):
+        """Uploads new glyphs in the atlas and draws the text with the bound text program. The atlas texture
+        is bound to the active texture unit."""
+        self.atlas.update()
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.atlas.texture)
+        self.mesh.draw()
+
+    def delete(self):
+        """Deletes the buffers of the text, the atlas is shared so it is not deleted"""
+        if self.mesh is not None:
+            self.mesh.delete()
+            self.mesh = None
+        self.capacity = 0
+
+
+class Label:
+    """Label in a text batch and the range of glyph quads it occupies in the batch's vertex buffer
+
+    :param text: text of label
+    :type text: str
+    :param font: font of label
+    :type font: QtGui.QFont
+    :param position: top left of the label in pixels
+    :type position: Tuple[float, float]
+    :param colour: RGBA colour of label
+    :type colour: Tuple[float, float, float, float]
+    :param size: scale of the glyphs relative to the rasterized font size
+    :type size: float
+    """
+    def __init__(self, text, font, position, colour, size):
+        self.text = text
+        self.font = font
+        self.position = position
+        self.colour = colour
+        self.size = size
+        self.start = 0
+        self.capacity = 0
+
+
+class TextBatch:
+    """Many labels drawn with one glDrawElements call. The glyph quads of all labels are kept in a single
+    dynamic vertex buffer, with a copy in memory, and each label owns a range of quads with some spare
+    room. Changing a label rewrites its range in memory and marks it dirty, when the batch is drawn only
+    the dirty ranges (merged when they are close) are uploaded. Labels that outgrow their range move to
+    the end of the buffer and leave a hole of empty (zero area) quads. The buffer is compacted when more
+    than half of it is holes and doubled in size when it is full, both upload the whole buffer.
+    A GL context must be current when the batch is drawn.
+
+    :param atlas: glyph atlas
+    :type atlas: GlyphAtlas
+    :param locations: attribute locations of the vertex position, UV and colour e.g. from create_batch_program
+    :type locations: Tuple[int, int, int]
+    :param capacity: initial number of glyph quads in the vertex buffer
+    :type capacity: int
+    :param merge_gap: dirty ranges separated by fewer quads than this are uploaded together
+    :type merge_gap: int
+    """
+    def __init__(self, atlas, locations, capacity=1024, merge_gap=64):
+        self.atlas = atlas
+        self.locations = {'position': locations[0], 'uv': locations[1], 'colour': locations[2]}
+        self.merge_gap = merge_gap
+        self.labels = {}
+        self.vertices = np.zeros(capacity * 4, BATCH_VERTEX_TYPE)
+        self.mesh = None
+        self.end = 0
+        self.holes = 0
+        self.uploads = 0
+        self._next_id = 0
+        self._dirty = []
+        self._reallocate = True
+
+    @property
+    def capacity(self):
+        """Gets the number of glyph quads that fit in the vertex buffer
+
+        :return: number of quads
+        :rtype: int
+        """
+        return len(self.vertices) // 4
+
+    def add(self, text, position, font, colour=(1.0, 1.0, 1.0, 1.0), size=1.0):
+        """Adds a label to the batch
+
+        :param text: text of label
+        :type text: str
+        :param position: top left of the label in pixels
+        :type position: Tuple[float, float]
+        :param font: font of label
+        :type font: QtGui.QFont
+        :param colour: RGBA colour of label
+        :type colour: Tuple[float, float, float, float]
+        :param size: scale of the glyphs relative to the rasterized font size
+        :type size: float
+        :return: ID of label
+        :rtype: int
+        """
+        label = Label(text, font, position, colour, size)
+        label_id = self._next_id
+        self._next_id += 1
+        self.labels[label_id] = label
+        self._write(label)
+        return label_id
+
+    def remove(self, label_id):
+        """Removes a label from the batch, its quads are cleared and left as a hole
+
+        :param label_id: ID of label
+        :type label_id: int
+        """
+        label = self.labels.pop(label_id)
+        self._clear(label.start, label.capacity)
+        self.holes += label.capacity
+
+    def setText(self, label_id, text):
+        """Changes the text of a label, nothing is done if the text is the same
+
+        :param label_id: ID of label
+        :type label_id: int
+        :param text: new text
+        :type text: str
+        """
+        label = self.labels[label_id]
+        if text != label.text:
+            label.text = text
+            self._write(label)
+
+    def setPosition(self, label_id, position):
+        """Moves a label
+
+        :param label_id: ID of label
+        :type label_id: int
+        :param position: top left of the label in pixels
+        :type position: Tuple[float, float]
+        """
+        label = self.labels[label_id]
+        label.position = position
+        self._write(label)
+
+    def setColour(self, label_id, colour):
+        """Changes the colour of a label
+
+        :param label_id: ID of label
+        :type label_id: int
+        :param colour: RGBA colour of label
+        :type colour: Tuple[float, float, float, float]
+        """
+        label = self.labels[label_id]
+        label.colour = colour
+        self._write(label)
+
+    def _clear(self, start, count):
+        """Replaces quads with empty quads that are not rasterized
+
+        :param start: index of first quad
+        :type start: int
+        :param count: number of quads
+        :type count: int
+        """
+        self.vertices[start * 4:(start + count) * 4] = 0
+        self._markDirty(start, count)
+
+    def _markDirty(self, start, count):
+        """Records that a range of quads must be uploaded
+
+        :param start: index of first quad
+        :type start: int
+        :param count: number of quads
+        :type count: int
+        """
+        if count and not self._reallocate:
+            self._dirty.append((start, start + count))
+
+    def _write(self, label):
+        """Lays out a label and writes its quads into its range, moving it to the end of the buffer
+        when it does not fit
+
+        :param label: label
+        :type label: Label
+        """
+        vertices = layout_text(self.atlas, label.font, label.text)
+        count = len(vertices) // 4
+        if count > label.capacity:
+            if label.capacity:
+                self._clear(label.start, label.capacity)
+                self.holes += label.capacity
+                label.capacity = 0
+            # Spare room lets labels such as counters grow a little without moving
+            capacity = count + max(count // 4, 4)
+            if self.end + capacity > self.capacity:
+                self._makeRoom(capacity)
+            label.start = self.end
+            label.capacity = capacity
+            self.end += capacity
+
+        start = label.start * 4
+        written = self.vertices[start:start + len(vertices)]
+        written['position'] = vertices['position'] * label.size + label.position
+        written['uv'] = vertices['uv']
+        written['colour'] = label.colour
+        self.vertices[start + len(vertices):start + label.capacity * 4] = 0
+        self._markDirty(label.start, label.capacity)
+
+    def _makeRoom(self, count):
+        """Compacts the labels when more than half of the buffer is holes and doubles the buffer until
+        the count of quads fits after the last label
+
+        :param count: number of quads needed
+        :type count: int
+        """
+        if self.holes > self.capacity // 2:
+            vertices = np.zeros_like(self.vertices)
+            end = 0
+            for label in sorted(self.labels.values(), key=lambda item: item.start):
+                if label.capacity:
+                    vertices[end * 4:(end + label.capacity) * 4] = \
+                        self.vertices[label.start * 4:(label.start + label.capacity) * 4]
+                    label.start = end
+                    end += label.capacity
+            self.vertices = vertices
+            self.end = end
+            self.holes = 0
+
+        capacity = self.capacity
+        while self.end + count > capacity:
+            capacity *= 2
+        if capacity != self.capacity:
+            vertices = np.zeros(capacity * 4, BATCH_VERTEX_TYPE)
+            vertices[:len(self.vertices)] = self.vertices
+            self.vertices = vertices
+
+        self._reallocate = True
+        self._dirty = []
+
+    def _dirtyRanges(self):
+        """Sorts and merges the dirty ranges, ranges that overlap or are closer than merge_gap are merged
+
+        :return: merged (start, end) ranges of quads
+        :rtype: List[Tuple[int, int]]
+        """
+        merged = []
+        for start, end in sorted(self._dirty):
+            if merged and start <= merged[-1][1] + self.merge_gap:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def update(self):
+        """Uploads new glyphs in the atlas and the dirty ranges of the vertex buffer, the whole buffer
+        is uploaded if it was reallocated or compacted. A GL context must be current.
+        """
+        self.atlas.update()
+        if self._reallocate:
+            if self.mesh is not None:
+                self.mesh.delete()
+            self.mesh = Mesh.fromVertices(self.vertices, self.locations, quad_indices(self.capacity),
+                                          usage=GL.GL_DYNAMIC_DRAW)
+            self.uploads += 1
+            self._reallocate = False
+        else:
+            for start, end in self._dirtyRanges():
+                self.mesh.updateVertices(self.vertices[start * 4:end * 4], start * 4)
+                self.uploads += 1
+        self._dirty = []
+        self.mesh.count = 6 * self.end
+
+    def draw(self):
+        """Uploads the changes and draws all labels with the bound batch program in one draw call. The atlas
+        texture is bound to the active texture unit."""
+        self.update()
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.atlas.texture)
+        self.mesh.draw()
+
+    def delete(self):
+        """Deletes the buffers of the batch, the atlas is shared so it is not deleted"""
+        if self.mesh is not None:
+            self.mesh.delete()
+            self.mesh = None
+        self._reallocate = True
+
+
+class TextTexture:
+    """Rasterized string in a text texture cache
+
+    :param texture: ID of texture
+    :type texture: int
+    :param image: RGBA image of the text
+    :type image: QtGui.QImage
+    :param vertex: vertices of a quad the size of the image
+    :type vertex: List[float]
+    """
+    def __init__(self, texture, image, vertex):
+        self.texture = texture
+        self.image = image
+        self.vertex = vertex
+        self.nbytes = image.width() * image.height() * 4
+
+
+class TextTextureCache:
+    """Keeps the images and textures of rasterized strings so strings that are drawn again are not
+    rasterized and uploaded again. Entries are keyed by the text, font (including its size) and colour,
+    and the least recently used entries are evicted when the textures exceed the memory budget.
+    The textures of evicted entries are deleted so entries should not be kept after the next call to get.
+    A GL context must be current when getting or clearing entries.
+
+    :param budget: maximum bytes of texture memory, a single entry larger than the budget is still kept
+    :type budget: int
+    """
+    def __init__(self, budget=16 * 1024 * 1024):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.resident = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        """Gets the fraction of gets that were found in the cache
+
+        :return: hit rate between 0 and 1
+        :rtype: float
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, text, font, colour):
+        """Gets the texture of a string, the string is rasterized and uploaded if it is not in the cache
+
+        :param text: text to draw
+        :type text: str
+        :param font: font of text
+        :type font: QtGui.QFont
+        :param colour: colour of text
+        :type colour: QtGui.QColor
+        :return: rasterized string
+        :rtype: TextTexture
+        """
+        key = (text, font.key(), colour.rgba())
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        image, vertex = rasterize_text(text, font, colour)
+        entry = TextTexture(self._upload(image), image, vertex)
+        self._evict(self.budget - entry.nbytes)
+        self.entries[key] = entry
+        self.resident += entry.nbytes
+        return entry
+
+    @staticmethod
+    def _upload(image):
+        """Creates a texture from an RGBA image
+
+        :param image: RGBA image
+        :type image: QtGui.QImage
+        :return: ID of texture
+        :rtype: int
+        """
+        texture = GL.glGenTextures(1)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, texture)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_EDGE)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP_TO_EDGE)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
+        GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA, image.width(), image.height(), 0, GL.GL_RGBA,
+                        GL.GL_UNSIGNED_BYTE, image.constBits().asstring(image.sizeInBytes()))
+        GL.glBindTexture(GL.GL_TEXTURE_2D, GL.GL_FALSE)
+        return texture
+
+    def _evict(self, limit):
+        """Deletes the least recently used entries until the resident bytes are within the limit
+
+        :param limit: maximum resident bytes
+        :type limit: int
+        """
+        while self.entries and self.resident > limit:
+            _, entry = self.entries.popitem(last=False)
+            GL.glDeleteTextures(1, [entry.texture])
+            self.resident -= entry.nbytes
+            self.evictions += 1
+
+    def stats(self):
+        """Gets the statistics of the cache
+
+        :return: dictionary of hits, misses, hit rate, evictions, entries and resident bytes
+        :rtype: Dict[str, Union[int, float]]
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate, 'evictions': self.evictions,
+                'entries': len(self.entries), 'resident': self.resident}
+
+    def clear(self):
+        """Deletes all entries and their textures, the statistics are kept"""
+        if self.entries:
+            GL.glDeleteTextures(len(self.entries), [entry.texture for entry in self.entries.values()])
+        self.entries.clear()
+        self.resident = 0
+
+
+def _offscreen_context():
+    """Creates the GL context of the benchmarks, headless.py is only imported when a benchmark runs so using
+    the module does not load it
+
+    :return: current offscreen context
+    :rtype: OffscreenContext
+    """
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '1_Windowing'))
+    from headless import OffscreenContext
+    return OffscreenContext()
+
+
+def benchmark_text_update(frames=200):
+    """Compares the cost of changing a label every frame by rasterizing the string into a new image
+    and texture (as createTexture in 1_glyphs_texture.py) and by updating a Text. An offscreen GL
+    context is created so no window is shown.
+
+    :param frames: number of text changes to time
+    :type frames: int
+    """
+    context = _offscreen_context()
+
+    font = QtGui.QFont("Times", 10)
+    colour = QtGui.QColor.fromRgbF(0, 1, 0)
+    texture = GL.glGenTextures(1)
+
+    def rasterize(text):
+        image, _ = rasterize_text(text, font, colour)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, texture)
+        GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA, image.width(), image.height(), 0, GL.GL_RGBA,
+                        GL.GL_UNSIGNED_BYTE, image.constBits().asstring(image.sizeInBytes()))
+
+    atlas = GlyphAtlas()
+    label = Text(atlas, font, (0, 1))
+
+    def update_text(text):
+        label.setText(text)
+        atlas.update()
+
+    labels = [f'Frame {index} of {frames}: x = {index * 0.25:.2f}' for index in range(frames)]
+    print(f'Changing a label {frames} times')
+    for name, change in (('rasterize string', rasterize), ('glyph atlas', update_text)):
+        def run():
+            for text in labels:
+                change(text)
+            GL.glFinish()
+        elapsed = min(timeit.repeat(run, number=1, repeat=5)) / frames
+        print(f'{name:>16}: {elapsed * 1e6:8.1f} us per change')
+
+    label.delete()
+    atlas.delete()
+    GL.glDeleteTextures(1, [texture])
+    context.delete()
+
+
+def benchmark_text_batch(count=2000, frames=50):
+    """Compares drawing many labels as a Text each (a draw call and position uniform per label) with
+    drawing them as one TextBatch while 1% of the labels change every frame. An offscreen GL context is
+    created so no window is shown.
+
+    :param count: number of labels
+    :type count: int
+    :param frames: number of frames to draw
+    :type frames: int
+    """
+    context = _offscreen_context()
+
+    font = QtGui.QFont("Times", 8)
+    atlas = GlyphAtlas()
+    text_program = create_text_program()
+    batch_program = create_batch_program()
+    positions = [(10 + (index % 20) * 48, 10 + (index // 20) * 12) for index in range(count)]
+
+    text_locations = [GL.glGetAttribLocation(text_program.id, name) for name in ("vertexPos", "vertexUV")]
+    batch_locations = [GL.glGetAttribLocation(batch_program.id, name)
+                       for name in ("vertexPos", "vertexUV", "vertexColour")]
+
+    texts = [Text(atlas, font, text_locations, f'Label {index}') for index in range(count)]
+    batch = TextBatch(atlas, batch_locations)
+    labels = [batch.add(f'Label {index}', position, font) for index, position in enumerate(positions)]
+    changed = range(0, count, 100)
+    frame = [0]
+
+    def draw_texts():
+        frame[0] += 1
+        for index in changed:
+            texts[index].setText(f'Value {frame[0]}')
+        text_program.use()
+        text_program.setUniform("colour", [1, 1, 1, 1])
+        for label, position in zip(texts, positions):
+            text_program.setUniform("position", [*position, 0])
+            label.draw()
+
+    def draw_batch():
+        frame[0] += 1
+        for index in changed:
+            batch.setText(labels[index], f'Value {frame[0]}')
+        batch_program.use()
+        batch.draw()
+
+    print(f'{count} labels with {len(changed)} changing per frame, {frames} frames')
+    for name, draw in (('Text per label', draw_texts), ('TextBatch', draw_batch)):
+        draw()
+        with GLCallCounter() as counter:
+            draw()
+        GL.glFinish()
+        elapsed = min(timeit.repeat(lambda: (draw(), GL.glFinish()), number=frames, repeat=3)) / frames
+        print(f'{name:>16}: {counter.total:6d} GL calls, {counter.calls.get("glDrawElements", 0):5d} draw calls, '
+              f'{elapsed * 1000:8.2f} ms per frame')
+
+    for label in texts:
+        label.delete()
+    batch.delete()
+    atlas.delete()
+    program_cache.delete()
+    context.delete()
+
+
+def benchmark_text_cache(requests=2000, distinct=100):
+    """Compares rasterizing and uploading a label every time it is drawn with getting it from a
+    TextTextureCache, for labels drawn with a skewed (Zipf) frequency. An offscreen GL context is created
+    so no window is shown.
+
+    :param requests: number of labels drawn
+    :type requests: int
+    :param distinct: number of distinct labels
+    :type distinct: int
+    """
+    context = _offscreen_context()
+
+    font = QtGui.QFont("Times", 10)
+    colour = QtGui.QColor.fromRgbF(0, 1, 0)
+    rng = np.random.default_rng(0)
+    labels = [f'Annotation {index}' for index in np.minimum(rng.zipf(1.5, requests), distinct)]
+    cache = TextTextureCache(budget=256 * 1024)
+
+    def uncached():
+        for text in labels:
+            image, _ = rasterize_text(text, font, colour)
+            GL.glDeleteTextures(1, [TextTextureCache._upload(image)])
+        GL.glFinish()
+
+    def cached():
+        for text in labels:
+            cache.get(text, font, colour)
+        GL.glFinish()
+
+    uncached_time = min(timeit.repeat(uncached, number=1, repeat=3)) / requests
+    cache.clear()
+    cached()
+    stats = cache.stats()
+    cached_time = min(timeit.repeat(cached, number=1, repeat=3)) / requests
+    print(f'{requests} labels from {distinct} distinct strings')
+    print(f'  rasterize every label: {uncached_time * 1e6:8.1f} us per label')
+    print(f'         cached labels: {cached_time * 1e6:8.1f} us per label, first pass hit rate {stats["hit_rate"]:.1%}, '
+          f'{stats["evictions"]} evictions, {stats["resident"] / 1024:.0f} KiB resident')
+
+    cache.clear()
+    context.delete()
+
+
+def benchmark_sdf_atlas(sizes=(8, 10, 12, 14, 18, 24, 32, 48, 64)):
+    """Compares the glyphs rasterized and the atlas memory needed to draw the printable ASCII characters at
+    several font sizes with a bitmap GlyphAtlas (glyphs for every size) and an SDFGlyphAtlas (one set of glyphs)
+
+    :param sizes: point sizes of the font
+    :type sizes: Tuple[int]
+    """
+    app = QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+    characters = ''.join(chr(code) for code in range(33, 127))
+    print(f'{len(characters)} characters at {len(sizes)} sizes')
+    for name, atlas in (('GlyphAtlas', GlyphAtlas()), ('SDFGlyphAtlas', SDFGlyphAtlas())):
+        start = timeit.default_timer()
+        for size in sizes:
+            layout_text(atlas, QtGui.QFont("Times", size), characters)
+        elapsed = timeit.default_timer() - start
+        glyphs = sum(len(table) for table in {id(table): table for _, table, _ in atlas.fonts.values()}.values())
+        print(f'{name:>16}: {glyphs:5d} glyphs rasterized in {elapsed * 1000:7.1f} ms, '
+              f'atlas {atlas.width} x {atlas.height} ({atlas.pixels.nbytes / 1024:.0f} KiB)')
+
+
+if __name__ == "__main__":
+    benchmark_text_update()
+    benchmark_text_batch()
+    benchmark_text_cache()
+    benchmark_sdf_atlas()